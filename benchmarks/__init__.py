@@ -0,0 +1 @@
+"""离线基准测试：见 python -m benchmarks --help"""
@@ -0,0 +1,86 @@
+"""
+离线基准测试入口。在插件根目录下运行:
+
+    python -m benchmarks                         # 全部基准，结果打印为表格
+    python -m benchmarks --quick --only log,fm   # 缩小规模，只跑部分基准
+    python -m benchmarks --json current.json     # 保存机器可读的结果
+    python -m benchmarks --baseline base.json    # 与基线对比，有退化时以状态码 1 退出
+"""
+import argparse
+import importlib
+import os
+import sys
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakes, harness  # noqa: E402
+
+SUITES = {
+    "log": "benchmarks.bench_log_manager",
+    "fm": "benchmarks.bench_file_manager",
+    "load": "benchmarks.bench_load_plugin",
+}
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline benchmarks for the plugin.")
+    parser.add_argument("--only", default="", help=f"comma separated suites: {', '.join(SUITES)}")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats (for CI smoke runs)")
+    parser.add_argument("--json", dest="json_path", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --json")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown that counts as a regression (default 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    options = _parse_args(argv)
+    fakes.install()
+    selected = [name.strip() for name in options.only.split(",") if name.strip()] or list(SUITES)
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        print(f"unknown suite(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    results, skipped = [], {}
+    for name in selected:
+        print(f"== {name}", file=sys.stderr, flush=True)
+        try:
+            suite = importlib.import_module(SUITES[name])
+            results.extend(suite.run(options))
+        except ImportError as e:
+            # 例如未安装 pydantic 时无法导入 utils.tools
+            skipped[name] = f"skipped: {e}"
+        except Exception:
+            skipped[name] = "failed:\n" + traceback.format_exc()
+    for name, reason in skipped.items():
+        print(f"[{name}] {reason}", file=sys.stderr)
+
+    width = max((len(item["name"]) for item in results), default=10)
+    for item in results:
+        extra = f"  (p95 {harness.format_value(item['p95'], item['unit'])})" if "p95" in item else ""
+        print(f"{item['name']:<{width}}  {harness.format_value(item['value'], item['unit'])}{extra}")
+
+    if options.json_path:
+        meta = dict(harness.environment(), quick=options.quick, skipped=skipped)
+        harness.save(options.json_path, results, meta)
+
+    status = 1 if any(reason.startswith("failed") for reason in skipped.values()) else 0
+    if options.baseline:
+        rows = harness.compare(results, harness.load(options.baseline), options.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nbaseline comparison ({len(rows)} matched, threshold {options.threshold:.0%}):")
+        for name, base, current, change, regressed in rows:
+            unit = next(item["unit"] for item in results if item["name"] == name)
+            mark = "REGRESSION" if regressed else ("faster" if change > options.threshold else "")
+            print(f"{name:<{width}}  {harness.format_value(base, unit):>12} -> "
+                  f"{harness.format_value(current, unit):>12}  {change:+.1%}  {mark}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {options.threshold:.0%}.")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""FileManager: 在 10 ~ 10,000 个文件的合成插件目录上测量读、写和列目录"""
+import os
+import shutil
+import tempfile
+from typing import List
+
+from .harness import result, run_async, time_async
+
+PLUGIN = "bench_plugin"
+_MODULE = '''import asyncio
+
+
+class Handler{index}:
+    """合成模块 {index}"""
+
+    def __init__(self, context):
+        self.context = context
+        self.counter = 0
+
+    async def handle(self, event):
+        self.counter += 1
+        await asyncio.sleep(0)
+        return f"handled {{self.counter}}"
+
+''' + "\n".join(f"CONSTANT_{i} = {i}" for i in range(40)) + "\n"
+
+
+def make_tree(base: str, files: int) -> List[str]:
+    """生成一个插件目录：每个子包 20 个模块，返回所有文件的相对路径"""
+    root = os.path.join(base, PLUGIN)
+    paths = ["main.py"]
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "main.py"), "w", encoding="utf-8") as f:
+        f.write(_MODULE.format(index=0))
+    for i in range(1, files):
+        rel = f"pkg_{i // 20}/mod_{i}.py"
+        full = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(_MODULE.format(index=i))
+        paths.append(rel)
+    return paths
+
+
+async def _bench_tree(base: str, files: int, paths: List[str], repeat: int) -> List[dict]:
+    from utils.file_manager import FileManager
+    from utils.snapshots import SnapshotStore
+
+    def fresh(**kwargs) -> FileManager:
+        return FileManager(base, validate=False, lint_async=False, **kwargs)
+
+    tag = f"files={files}"
+    results = []
+
+    timing = await time_async(lambda: fresh().list_files(PLUGIN), repeat=repeat, warmup=1)
+    results.append(result(f"fm.list_cold[{tag}]", timing["median"], "s", **timing))
+
+    manager = fresh()
+    timing = await time_async(lambda: manager.list_files(PLUGIN), repeat=repeat, number=3)
+    results.append(result(f"fm.list_warm[{tag}]", timing["median"], "s", **timing))
+
+    sample = paths[:: max(1, len(paths) // 100)][:100]
+
+    async def read_all(fm: FileManager):
+        for rel in sample:
+            await fm.read_file(PLUGIN, rel)
+
+    timing = await time_async(lambda: read_all(fresh()), repeat=repeat)
+    per_file = {k: (v / len(sample) if k != "samples" else v) for k, v in timing.items()}
+    results.append(result(f"fm.read_cold[{tag}]", per_file["median"], "s", **per_file))
+
+    timing = await time_async(lambda: read_all(manager), repeat=repeat)
+    per_file = {k: (v / len(sample) if k != "samples" else v) for k, v in timing.items()}
+    results.append(result(f"fm.read_warm[{tag}]", per_file["median"], "s", **per_file))
+
+    timing = await time_async(lambda: manager.read_file(PLUGIN, "main.py", symbol="Handler0.handle"),
+                              repeat=repeat, number=10)
+    results.append(result(f"fm.read_symbol[{tag}]", timing["median"], "s", **timing))
+
+    counter = iter(range(10 ** 9))
+
+    def write(fm: FileManager):
+        return fm.write_file(PLUGIN, "main.py", _MODULE.format(index=next(counter)))
+
+    timing = await time_async(lambda: write(manager), repeat=repeat, number=3)
+    results.append(result(f"fm.write[{tag}]", timing["median"], "s", **timing))
+
+    snapshot_dir = tempfile.mkdtemp(prefix="astrbot_bench_snapshots_")
+    try:
+        with_snapshots = fresh(snapshots=SnapshotStore(snapshot_dir))
+        timing = await time_async(lambda: write(with_snapshots), repeat=repeat, number=3)
+        results.append(result(f"fm.write_snapshot[{tag}]", timing["median"], "s", **timing))
+        if len(paths) > 1:
+            batch = [{"file_path": rel, "content": _MODULE.format(index=-1)} for rel in paths[1:11]]
+            timing = await time_async(lambda: with_snapshots.write_files(PLUGIN, batch), repeat=repeat)
+            results.append(result(f"fm.write_batch10_snapshot[{tag}]", timing["median"], "s", **timing))
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    timing = await time_async(lambda: manager.search_code("Handler1", plugin_name=PLUGIN), repeat=repeat)
+    results.append(result(f"fm.search_definition[{tag}]", timing["median"], "s", **timing))
+    return results
+
+
+def run(options) -> List[dict]:
+    sizes = (10, 100, 1000) if options.quick else (10, 100, 1000, 10000)
+    repeat = 3 if options.quick else 7
+    results = []
+    for files in sizes:
+        base = tempfile.mkdtemp(prefix="astrbot_bench_plugins_")
+        try:
+            paths = make_tree(base, files)
+            results.extend(run_async(_bench_tree(base, files, paths, repeat)))
+        finally:
+            shutil.rmtree(base, ignore_errors=True)
+    return results
@@ -0,0 +1,76 @@
+"""LoadPluginTool: 扫描插件根目录并加载未加载的插件（PluginManager 为本地替身）"""
+import os
+import shutil
+import tempfile
+from typing import List
+
+from .fakes import AstrBotConfig, Context, tool_context
+from .harness import result, run_async, time_async
+
+
+def make_plugins(base: str, count: int) -> None:
+    """生成 count 个插件目录，另外混入一些不是插件的目录和缓存目录"""
+    for i in range(count):
+        root = os.path.join(base, f"plugin_{i:05d}")
+        os.makedirs(os.path.join(root, "__pycache__"))
+        with open(os.path.join(root, "main.py"), "w", encoding="utf-8") as f:
+            f.write("from astrbot.api.star import Star\n\n\nclass Main(Star):\n    pass\n")
+        with open(os.path.join(root, "metadata.yaml"), "w", encoding="utf-8") as f:
+            f.write(f"name: plugin_{i}\nversion: v1.0.0\n")
+    for i in range(max(1, count // 10)):
+        os.makedirs(os.path.join(base, f"not_a_plugin_{i}", "data"))
+
+
+async def _bench(base: str, count: int, repeat: int) -> List[dict]:
+    from utils import tools
+
+    tool = tools.LoadPluginTool()
+    tag = f"plugins={count}"
+    results = []
+
+    async def load_all(**kwargs):
+        context = Context(load_delay=kwargs.pop("load_delay", 0.0))
+        output = await tool.call(tool_context(context), **kwargs)
+        assert output.startswith(f"Loaded {count},"), output[:200]
+
+    timing = await time_async(lambda: load_all(), repeat=repeat)
+    results.append(result(f"load.scan_and_load[{tag}]", timing["median"], "s", **timing))
+
+    loaded = Context()
+    for i in range(count):
+        await loaded._star_manager.load(specified_dir_name=f"plugin_{i:05d}")
+    timing = await time_async(lambda: tool.call(tool_context(loaded)), repeat=repeat, number=5)
+    results.append(result(f"load.scan_all_loaded[{tag}]", timing["median"], "s", **timing))
+
+    if count <= 100:
+        # 每个插件模拟 5ms 的加载耗时，对比顺序与并发加载的调度开销
+        for parallel in (False, True):
+            timing = await time_async(lambda: load_all(parallel=parallel, load_delay=0.005), repeat=repeat)
+            mode = "parallel" if parallel else "sequential"
+            results.append(result(f"load.{mode}_5ms[{tag}]", timing["median"], "s", **timing))
+    return results
+
+
+def run(options) -> List[dict]:
+    from utils import tools
+
+    sizes = (10, 100) if options.quick else (10, 100, 1000)
+    repeat = 3 if options.quick else 7
+    results = []
+    for count in sizes:
+        base = tempfile.mkdtemp(prefix="astrbot_bench_load_")
+        try:
+            make_plugins(base, count)
+            tools.init_managers(AstrBotConfig(
+                plugin_base_dir=base,
+                enable_whitelist=False,
+                verbose_steps=False,
+                loop_monitor_enabled=False,
+                snapshot_enabled=False,
+                plugin_load_concurrency=4,
+            ))
+            results.extend(run_async(_bench(base, count, repeat)))
+        finally:
+            tools.shutdown_managers()
+            shutil.rmtree(base, ignore_errors=True)
+    return results
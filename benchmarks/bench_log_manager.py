@@ -0,0 +1,82 @@
+"""LogManager: 多线程 emit 吞吐量，以及不同缓冲区大小下 get_logs / query 的延迟"""
+import logging
+import os
+import threading
+import time
+from typing import List
+
+from .fakes import AstrBotConfig
+from .harness import HIGHER, result, time_calls
+
+
+def _records(count: int, seed: int, base_dir: str) -> List[logging.LogRecord]:
+    """预先构造日志记录，只测量 emit 本身；每 50 条混入一条 WARNING，按 5 个插件目录轮换归属"""
+    records = []
+    for i in range(count):
+        level = logging.WARNING if i % 50 == 0 else logging.INFO
+        pathname = os.path.join(base_dir, f"plugin_{(seed + i) % 5}", "main.py")
+        records.append(logging.LogRecord("astrbot", level, pathname, 42 + i % 100,
+                                         "handled request %d from thread %d in %.1fms", (i, seed, 1.5), None))
+    return records
+
+
+def _manager(history: int):
+    from utils.log_manager import LogManager
+
+    config = AstrBotConfig(log_max_history=history, log_lazy_format=True, plugin_base_dir="./data/plugins")
+    return LogManager(config=config)
+
+
+def bench_emit(threads: int, total: int) -> dict:
+    manager = _manager(3000)
+    base_dir = os.path.abspath("./data/plugins")
+    per_thread = total // threads
+    batches = [_records(per_thread, t, base_dir) for t in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(batch):
+        barrier.wait()
+        emit = manager.emit
+        for record in batch:
+            emit(record)
+
+    workers = [threading.Thread(target=worker, args=(batch,)) for batch in batches]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    manager.shutdown()
+    return result(f"log.emit[threads={threads}]", per_thread * threads / elapsed, "records/s", HIGHER,
+                  records=per_thread * threads)
+
+
+def bench_read(history: int, repeat: int) -> List[dict]:
+    manager = _manager(history)
+    base_dir = os.path.abspath("./data/plugins")
+    for record in _records(history, 0, base_dir):
+        manager.emit(record)
+    results = []
+    try:
+        for lines in (50, 500):
+            timing = time_calls(lambda: manager.get_logs(lines), repeat=repeat, number=5)
+            results.append(result(f"log.get_logs[buffer={history},lines={lines}]", timing["median"], "s", **timing))
+        timing = time_calls(lambda: manager.query(lines=50, min_level="WARNING"), repeat=repeat, number=5)
+        results.append(result(f"log.query_level[buffer={history}]", timing["median"], "s", **timing))
+        timing = time_calls(lambda: manager.query(lines=50, plugin="plugin_3", pattern=r"request \d+7 "),
+                            repeat=repeat, number=5)
+        results.append(result(f"log.query_plugin_regex[buffer={history}]", timing["median"], "s", **timing))
+    finally:
+        manager.shutdown()
+    return results
+
+
+def run(options) -> List[dict]:
+    total = 20_000 if options.quick else 200_000
+    results = [bench_emit(threads, total) for threads in (1, 4, 8)]
+    histories = (1000, 3000) if options.quick else (1000, 3000, 10000, 50000)
+    for history in histories:
+        results.extend(bench_read(history, repeat=5 if options.quick else 15))
+    return results
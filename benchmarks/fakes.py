@@ -0,0 +1,153 @@
+"""
+AstrBot API 的本地替身。
+
+install() 把 astrbot.api / astrbot.core 下本插件用到的名字注册到 sys.modules，
+之后即可在没有运行中的 Bot 的情况下导入 utils.* 并驱动各个工具。
+替身只实现本插件实际调用到的接口，行为尽量接近真实对象，但不做任何网络或平台操作。
+"""
+import asyncio
+import sys
+import types
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class MessageChain:
+    def __init__(self, chain: Optional[list] = None):
+        self.chain = chain or []
+
+    def message(self, text: str) -> "MessageChain":
+        self.chain.append(text)
+        return self
+
+
+class AstrMessageEvent:
+    def __init__(self, message: str = "", sender_id: str = "10000", umo: str = "bench:FriendMessage:10000"):
+        self.message_str = message
+        self.unified_msg_origin = umo
+        self._sender_id = sender_id
+
+    def get_sender_id(self) -> str:
+        return self._sender_id
+
+    def get_message_str(self) -> str:
+        return self.message_str
+
+    def plain_result(self, text: str = ""):
+        return MessageChain().message(text)
+
+
+class StarMetadata:
+    def __init__(self, root_dir_name: str):
+        self.root_dir_name = root_dir_name
+        self.name = root_dir_name
+        self.activated = True
+
+
+class PluginManager:
+    """按目录名“加载”插件：只登记元数据，可选地模拟每个插件的加载耗时"""
+
+    def __init__(self, context: "Context", load_delay: float = 0.0):
+        self.context = context
+        self.load_delay = load_delay
+        self.load_calls = 0
+
+    async def load(self, specified_dir_name: Optional[str] = None):
+        self.load_calls += 1
+        if self.load_delay:
+            await asyncio.sleep(self.load_delay)
+        self.context.stars.append(StarMetadata(specified_dir_name))
+        return True, None
+
+
+class Context:
+    def __init__(self, load_delay: float = 0.0):
+        self.stars: List[StarMetadata] = []
+        self.sent: List[tuple] = []
+        self._star_manager = PluginManager(self, load_delay)
+
+    def get_all_stars(self) -> List[StarMetadata]:
+        return list(self.stars)
+
+    async def send_message(self, umo: str, chain: MessageChain):
+        self.sent.append((umo, chain))
+        return True
+
+    def add_llm_tools(self, *tools):
+        pass
+
+
+class AstrBotConfig(dict):
+    """真实的 AstrBotConfig 同时支持下标和属性访问"""
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(item) from None
+
+
+class AstrAgentContext:
+    def __init__(self, context: Context, event: AstrMessageEvent):
+        self.context = context
+        self.event = event
+
+
+class ContextWrapper(Generic[T]):
+    def __init__(self, context: T):
+        self.context = context
+
+
+class FunctionTool(Generic[T]):
+    pass
+
+
+class Star:
+    def __init__(self, context: Context, config: Optional[dict] = None):
+        self.context = context
+
+
+class _Filter:
+    """filter.command(...) 等装饰器工厂：原样返回被装饰的函数"""
+
+    def __getattr__(self, item):
+        def factory(*args, **kwargs):
+            def decorator(func):
+                return func
+            return decorator
+        return factory
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    module.__path__ = []
+    return module
+
+
+def install() -> None:
+    """注册替身模块。总是覆盖已安装的 astrbot，保证基准结果不受宿主版本影响"""
+    import logging
+
+    modules = {
+        "astrbot": _module("astrbot"),
+        "astrbot.api": _module("astrbot.api", AstrBotConfig=AstrBotConfig, logger=logging.getLogger("astrbot")),
+        "astrbot.api.event": _module("astrbot.api.event", filter=_Filter(), AstrMessageEvent=AstrMessageEvent,
+                                     MessageChain=MessageChain),
+        "astrbot.api.star": _module("astrbot.api.star", Context=Context, Star=Star),
+        "astrbot.core": _module("astrbot.core"),
+        "astrbot.core.agent": _module("astrbot.core.agent"),
+        "astrbot.core.agent.run_context": _module("astrbot.core.agent.run_context", ContextWrapper=ContextWrapper),
+        "astrbot.core.agent.tool": _module("astrbot.core.agent.tool", FunctionTool=FunctionTool),
+        "astrbot.core.astr_agent_context": _module("astrbot.core.astr_agent_context",
+                                                   AstrAgentContext=AstrAgentContext),
+        "astrbot.core.star": _module("astrbot.core.star"),
+        "astrbot.core.star.star_manager": _module("astrbot.core.star.star_manager", PluginManager=PluginManager),
+    }
+    sys.modules.update(modules)
+
+
+def tool_context(context: Context, message: str = "") -> ContextWrapper:
+    """构造工具 call() 收到的 ContextWrapper[AstrAgentContext]"""
+    return ContextWrapper(AstrAgentContext(context, AstrMessageEvent(message)))
@@ -0,0 +1,105 @@
+"""计时、结果记录和基线对比"""
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+LOWER = "lower"
+HIGHER = "higher"
+
+
+def result(name: str, value: float, unit: str, better: str = LOWER, **extra) -> dict:
+    """单项结果。value 是用于基线对比的主指标，extra 中的数值只作参考"""
+    return {"name": name, "value": value, "unit": unit, "better": better, **extra}
+
+
+def _summary(samples: List[float]) -> dict:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, max(0, int(round(0.95 * len(samples))) - 1))]
+    return {"median": statistics.median(samples), "p95": p95, "min": samples[0], "samples": len(samples)}
+
+
+def time_calls(func: Callable[[], object], repeat: int = 7, number: int = 1, warmup: int = 1) -> dict:
+    """重复 repeat 轮、每轮调用 number 次，返回单次调用耗时（秒）的中位数 / p95 / 最小值"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return _summary(samples)
+
+
+async def time_async(factory: Callable[[], Awaitable], repeat: int = 7, number: int = 1, warmup: int = 1) -> dict:
+    """time_calls 的协程版本，factory 每次返回一个新的可等待对象"""
+    for _ in range(warmup):
+        await factory()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await factory()
+        samples.append((time.perf_counter() - start) / number)
+    return _summary(samples)
+
+
+def run_async(coro):
+    return asyncio.run(coro)
+
+
+def environment() -> dict:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def save(path: str, results: List[dict], meta: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def load(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {item["name"]: item for item in data.get("results", [])}
+
+
+def compare(results: List[dict], baseline: Dict[str, dict], threshold: float) -> List[tuple]:
+    """
+    与基线逐项对比，返回 [(名字, 基线值, 当前值, 变化比例, 是否退化)]。
+    变化比例以“变好为正”表示；比基线差超过 threshold 视为退化。
+    """
+    rows = []
+    for item in results:
+        base = baseline.get(item["name"])
+        if base is None or not base.get("value") or item.get("value") is None:
+            continue
+        ratio = item["value"] / base["value"]
+        change = (1 / ratio - 1) if item["better"] == LOWER else (ratio - 1)
+        rows.append((item["name"], base["value"], item["value"], change, change < -threshold))
+    return rows
+
+
+def format_value(value: Optional[float], unit: str) -> str:
+    if value is None:
+        return "-"
+    if unit == "s":
+        if value < 1e-3:
+            return f"{value * 1e6:.1f}µs"
+        if value < 1:
+            return f"{value * 1e3:.2f}ms"
+        return f"{value:.2f}s"
+    if value >= 1e6:
+        return f"{value / 1e6:.2f}M {unit}"
+    if value >= 1e3:
+        return f"{value / 1e3:.1f}k {unit}"
+    return f"{value:.1f} {unit}"
@@ -1,30 +1,71 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star
 from astrbot.api import AstrBotConfig
 from .utils.tools import *
 
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
 
 class PluginDeveloper(Star):
     def __init__(self, context: Context, config: AstrBotConfig = None):
         super().__init__(context)
+        started = time.perf_counter()
         self.config = config or {}
 
         init_managers(self.config)
+        start_error_stream(self.context)
 
         self.context.add_llm_tools(
             WriteFileTool(),
+            WriteFilesTool(),
+            EditFileTool(),
+            RollbackTool(),
             ReadFileTool(),
+            CheckAsyncTool(),
+            SearchCodeTool(),
             ListFilesTool(),
             LoadPluginTool(),
             CheckLogsTool(),
             ListPluginsTool(),
-            UninstallPluginTool()
+            UninstallPluginTool(),
+            WaitReloadTool(),
+            LoopStatsTool(),
+            BenchmarkPluginTool(),
+            StatsTool(),
+            MoreOutputTool()
         )
+        record_startup(_IMPORT_SECONDS, time.perf_counter() - started)
 
     @filter.command("自迭代测试")
     async def ping(self, event: AstrMessageEvent):
-        yield event.plain_result("自迭代核心已加载，配置已生效✅️")
+        yield event.plain_result(f"自迭代核心已加载，配置已生效✅️\n{startup_report()}")
+
+    @filter.command("自迭代统计")
+    async def tool_stats(self, event: AstrMessageEvent):
+        if not is_whitelisted(event):
+            yield event.plain_result(PERMISSION_DENIED_MSG)
+            return
+        yield event.plain_result(stats.report())
+
+    @filter.command("自迭代订阅")
+    async def subscribe_errors(self, event: AstrMessageEvent):
+        """把当前会话订阅到插件的 WARNING 及以上日志；可跟插件目录名和级别，例如: 自迭代订阅 my_plugin ERROR"""
+        if not is_whitelisted(event):
+            yield event.plain_result(PERMISSION_DENIED_MSG)
+            return
+        yield event.plain_result(subscribe_error_stream(event, self.context))
+
+    @filter.command("自迭代退订")
+    async def unsubscribe_errors(self, event: AstrMessageEvent):
+        if not is_whitelisted(event):
+            yield event.plain_result(PERMISSION_DENIED_MSG)
+            return
+        yield event.plain_result(unsubscribe_error_stream(event))
 
     async def terminate(self):
-        if log_manager is not None:
-            log_manager.shutdown()
+        await flush_tips()
+        shutdown_managers()
@@ -0,0 +1,225 @@
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+_HTTP_HINT = "use 'aiohttp.ClientSession' / 'httpx.AsyncClient', or wrap it in 'await asyncio.to_thread(...)'"
+_SUBPROCESS_HINT = "use 'await asyncio.create_subprocess_exec(...)' / 'create_subprocess_shell(...)'"
+_FILE_HINT = "use 'aiofiles', or wrap the read/write in 'await asyncio.to_thread(...)'"
+_SQLITE_HINT = "use 'aiosqlite', or run the queries in 'await asyncio.to_thread(...)'"
+
+# 已知会阻塞事件循环的调用（按导入别名还原后的完整名字）-> 建议
+BLOCKING_CALLS: Dict[str, str] = {
+    "time.sleep": "use 'await asyncio.sleep(...)'",
+    "urllib.request.urlopen": _HTTP_HINT,
+    "subprocess.run": _SUBPROCESS_HINT,
+    "subprocess.call": _SUBPROCESS_HINT,
+    "subprocess.check_call": _SUBPROCESS_HINT,
+    "subprocess.check_output": _SUBPROCESS_HINT,
+    "subprocess.getoutput": _SUBPROCESS_HINT,
+    "subprocess.getstatusoutput": _SUBPROCESS_HINT,
+    "os.system": _SUBPROCESS_HINT,
+    "os.popen": _SUBPROCESS_HINT,
+    "sqlite3.connect": _SQLITE_HINT,
+    "socket.create_connection": "use 'await asyncio.open_connection(...)'",
+    "input": "never read stdin in a bot; take the value from the message event instead",
+}
+for _method in ("get", "post", "put", "patch", "delete", "head", "options", "request"):
+    BLOCKING_CALLS[f"requests.{_method}"] = _HTTP_HINT
+    BLOCKING_CALLS[f"httpx.{_method}"] = _HTTP_HINT
+BLOCKING_CALLS["urllib3.request"] = _HTTP_HINT
+BLOCKING_CALLS["requests.Session"] = _HTTP_HINT
+BLOCKING_CALLS["httpx.Client"] = "use 'httpx.AsyncClient' with 'async with'"
+
+# 对文件对象 / pathlib 的同步读写方法
+_FILE_READ_METHODS = {"read", "readlines", "write", "writelines"}
+_PATH_METHODS = {"read_text", "read_bytes", "write_text", "write_bytes"}
+
+
+class BlockingCall:
+    """一处可从协程到达的阻塞调用"""
+    __slots__ = ("line", "col", "call", "chain", "hint")
+
+    def __init__(self, line: int, col: int, call: str, chain: Tuple[str, ...], hint: str):
+        self.line = line
+        self.col = col
+        self.call = call
+        # 从哪个 async 函数经由哪些同步函数到达这里
+        self.chain = chain
+        self.hint = hint
+
+    def format(self, rel_path: str) -> str:
+        via = " -> ".join(self.chain)
+        return (f"{rel_path}:{self.line}:{self.col}: warning: blocking call '{self.call}' "
+                f"reachable from coroutine ({via}); {self.hint}")
+
+
+def _dotted(node: ast.expr) -> Optional[str]:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _import_aliases(tree: ast.Module) -> Dict[str, str]:
+    """本地名字 -> 完整模块路径，例如 {'r': 'requests', 'sleep': 'time.sleep'}"""
+    aliases = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    top = alias.name.split(".")[0]
+                    aliases[top] = top
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            for alias in node.names:
+                aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+    return aliases
+
+
+def _own_nodes(func: ast.AST):
+    """遍历函数体，但不进入嵌套的函数、lambda 和类（它们单独分析）"""
+    stack = list(ast.iter_child_nodes(func))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            continue
+        yield node
+        stack.extend(ast.iter_child_nodes(node))
+
+
+class _Function:
+    __slots__ = ("key", "node", "is_async", "calls", "blocking")
+
+    def __init__(self, key: str, node):
+        self.key = key
+        self.node = node
+        self.is_async = isinstance(node, ast.AsyncFunctionDef)
+        self.calls: List[str] = []
+        self.blocking: List[Tuple[int, int, str, str]] = []
+
+
+def _collect_functions(body, prefix: str, table: Dict[str, _Function]):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            key = prefix + node.name
+            table[key] = _Function(key, node)
+            _collect_functions(node.body, key + ".", table)
+        elif isinstance(node, ast.ClassDef):
+            _collect_functions(node.body, prefix + node.name + ".", table)
+
+
+def _scan_function(func: _Function, aliases: Dict[str, str], lines: List[str]):
+    file_handles = set()
+    for node in _own_nodes(func.node):
+        if isinstance(node, (ast.With, ast.AsyncWith)):
+            for item in node.items:
+                if isinstance(item.context_expr, ast.Call) and _dotted(item.context_expr.func) == "open" \
+                        and isinstance(item.optional_vars, ast.Name):
+                    file_handles.add(item.optional_vars.id)
+        if not isinstance(node, ast.Call):
+            continue
+        # 允许用 "# noqa" 显式豁免（例如确认只读取很小的文件）
+        if 0 < node.lineno <= len(lines) and "# noqa" in lines[node.lineno - 1]:
+            continue
+
+        name = _dotted(node.func)
+        if name:
+            head, _, rest = name.partition(".")
+            resolved = aliases.get(head, head) + ("." + rest if rest else "")
+            if resolved in BLOCKING_CALLS:
+                func.blocking.append((node.lineno, node.col_offset + 1, resolved, BLOCKING_CALLS[resolved]))
+                continue
+            # 记录对本文件中函数的调用：foo() / self.foo() / cls.foo() / Class.foo()
+            func.calls.append(name.split(".")[-1] if head in ("self", "cls") else name)
+
+        if isinstance(node.func, ast.Attribute):
+            attr = node.func.attr
+            target = node.func.value
+            if attr in _FILE_READ_METHODS and (
+                    (isinstance(target, ast.Call) and _dotted(target.func) == "open")
+                    or (isinstance(target, ast.Name) and target.id in file_handles)):
+                func.blocking.append((node.lineno, node.col_offset + 1, f"open().{attr}", _FILE_HINT))
+            elif attr in _PATH_METHODS:
+                func.blocking.append((node.lineno, node.col_offset + 1, f"Path.{attr}", _FILE_HINT))
+
+
+def find_blocking_calls(source: str) -> List[BlockingCall]:
+    """
+    找出可从 async 函数到达的阻塞调用。
+    同步函数只有被协程（直接或间接）调用时才会被报告；作为参数传给
+    asyncio.to_thread / run_in_executor 的函数不是直接调用，因此不会被报告。
+    源码有语法错误时返回空列表。
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    aliases = _import_aliases(tree)
+    lines = source.splitlines()
+    table: Dict[str, _Function] = {}
+    _collect_functions(tree.body, "", table)
+
+    by_short: Dict[str, List[_Function]] = {}
+    for func in table.values():
+        _scan_function(func, aliases, lines)
+        by_short.setdefault(func.key.split(".")[-1], []).append(func)
+
+    def resolve(call: str) -> List[_Function]:
+        if call in table:
+            return [table[call]]
+        if "." in call:
+            # obj.method() 无法确定 obj 的类型，不做猜测
+            return []
+        # foo() / self.foo() 按短名匹配嵌套函数或方法，可能有多个同名候选，全部视为可达（宁可多报）
+        return [f for f in by_short.get(call, []) if not f.is_async]
+
+    findings: List[BlockingCall] = []
+    reported = set()
+    for root in table.values():
+        if not root.is_async:
+            continue
+        # 广度优先，记录到达路径
+        queue = [(root, (root.key,))]
+        visited = {root.key}
+        while queue:
+            func, chain = queue.pop(0)
+            for line, col, call, hint in func.blocking:
+                if (line, col) not in reported:
+                    reported.add((line, col))
+                    findings.append(BlockingCall(line, col, call, chain, hint))
+            for call in func.calls:
+                for callee in resolve(call):
+                    if callee.key not in visited and not callee.is_async:
+                        visited.add(callee.key)
+                        queue.append((callee, chain + (callee.key,)))
+    return sorted(findings, key=lambda f: (f.line, f.col))
+
+
+# ========== 按内容哈希缓存 ==========
+
+_CACHE_SIZE = 256
+_cache: "OrderedDict[str, List[BlockingCall]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def find_blocking_calls_cached(source: str) -> List[BlockingCall]:
+    """同一份内容只分析一次，内容不变时重复调用直接返回缓存结果"""
+    digest = hashlib.sha1(source.encode("utf-8", "surrogatepass")).hexdigest()
+    with _cache_lock:
+        cached = _cache.get(digest)
+        if cached is not None:
+            _cache.move_to_end(digest)
+            return cached
+    findings = find_blocking_calls(source)
+    with _cache_lock:
+        _cache[digest] = findings
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return findings
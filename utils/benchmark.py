@@ -0,0 +1,470 @@
+"""
+插件处理函数的微基准测试。
+
+本文件既是宿主侧的启动器（run_benchmark / format_report），也是子进程中执行的 worker
+（以脚本方式运行，只依赖标准库）。worker 用桩模块替换 astrbot，导入插件、实例化 Star 子类，
+用合成消息反复调用指定的 @filter.command 处理函数，结果以 JSON 写入指定文件。
+"""
+import asyncio
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import inspect
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+import types
+from typing import List, Optional
+
+# ========== 宿主侧 ==========
+
+
+async def run_benchmark(plugin_dir: str, commands: Optional[List[str]] = None, iterations: int = 20,
+                        message: Optional[str] = None, args: Optional[List[str]] = None,
+                        timeout: float = 60.0) -> dict:
+    """
+    在独立子进程中运行基准测试，超过 timeout 秒直接杀掉子进程。
+    子进程的工作目录是一个临时目录，插件按相对路径写入的文件不会落到宿主的数据目录中。
+    """
+    options = {
+        "plugin_dir": os.path.abspath(plugin_dir),
+        "commands": commands or [],
+        "iterations": iterations,
+        "message": message,
+        "args": args or [],
+        "call_timeout": max(1.0, timeout / 2),
+    }
+    with tempfile.TemporaryDirectory(prefix="astrbot_bench_") as workdir:
+        output = os.path.join(workdir, "result.json")
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), json.dumps(options), output,
+            cwd=workdir, env=env,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+            return {"error": f"benchmark killed after the {timeout:.0f}s hard timeout "
+                             f"(a handler or the plugin import is probably stuck or blocking)"}
+        except asyncio.CancelledError:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            raise
+
+        tail = stdout.decode("utf-8", "replace")[-2000:] if stdout else ""
+        try:
+            with open(output, encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return {"error": f"worker exited with code {proc.returncode} without a result", "output": tail}
+        result["output"] = tail
+        return result
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def _kb(size: float) -> str:
+    return f"{size / 1024:.1f}KB"
+
+
+def format_report(result: dict) -> str:
+    if result.get("error"):
+        text = f"[Benchmark] FAILED: {result['error']}"
+        if result.get("traceback"):
+            text += f"\n{result['traceback']}"
+        if result.get("output"):
+            text += f"\nWorker output (tail):\n{result['output']}"
+        return text
+
+    lines = [f"[Benchmark] import {_ms(result['import_time'])}, instantiate {_ms(result['init_time'])}, "
+             f"import allocated {_kb(result['import_alloc'])}"]
+    for name, stats in result["commands"].items():
+        if stats.get("error"):
+            lines.append(f"- /{name}: ERROR {stats['error']}")
+            continue
+        lines.append(
+            f"- /{name} x{stats['runs']}: p50 {_ms(stats['p50'])}, p95 {_ms(stats['p95'])}, "
+            f"p99 {_ms(stats['p99'])}, max {_ms(stats['max'])}; "
+            f"alloc/call {_kb(stats['alloc_per_call'])}, peak {_kb(stats['peak'])}; "
+            f"results/call {stats['results']}"
+        )
+        if stats.get("failures"):
+            lines.append(f"    {stats['failures']} call(s) raised: {stats['first_failure']}")
+    if result.get("missing"):
+        lines.append(f"Unknown commands: {', '.join(result['missing'])}. "
+                     f"Available: {', '.join(result['available']) or 'none'}")
+    if result.get("output"):
+        lines.append(f"Worker output (tail):\n{result['output']}")
+    return "\n".join(lines)
+
+
+# ========== 子进程 worker ==========
+
+
+class _Anything:
+    """万能桩对象：任意属性、调用、await、迭代都能成功，用来顶替不需要真实行为的宿主对象"""
+
+    def __init__(self, name: str = "stub"):
+        self._name = name
+
+    def __getattr__(self, item):
+        if item.startswith("__") and item.endswith("__"):
+            raise AttributeError(item)
+        return _Anything(f"{self._name}.{item}")
+
+    def __call__(self, *args, **kwargs):
+        return _Anything(f"{self._name}()")
+
+    def __await__(self):
+        return self
+        yield
+
+    def __iter__(self):
+        return iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+    def __or__(self, other):
+        return self
+
+    __ror__ = __and__ = __rand__ = __or__
+
+    def __bool__(self):
+        return True
+
+    def __str__(self):
+        return ""
+
+    def __fspath__(self):
+        return "."
+
+    def __repr__(self):
+        return f"<{self._name}>"
+
+
+class _MessageEvent:
+    """AstrMessageEvent 的桩，提供生成器处理函数常用的方法"""
+
+    def __init__(self, message: str):
+        self.message_str = message
+        self.unified_msg_origin = "bench:FriendMessage:bench_user"
+        self.session_id = "bench_user"
+        self.role = "admin"
+        self.message_obj = _Anything("message_obj")
+        self._stopped = False
+
+    def get_message_str(self):
+        return self.message_str
+
+    def get_sender_id(self):
+        return "bench_user"
+
+    def get_sender_name(self):
+        return "bench"
+
+    def get_group_id(self):
+        return ""
+
+    def get_self_id(self):
+        return "bench_bot"
+
+    def get_platform_name(self):
+        return "bench"
+
+    def is_admin(self):
+        return True
+
+    def is_private_chat(self):
+        return True
+
+    def stop_event(self):
+        self._stopped = True
+
+    def plain_result(self, text=""):
+        return ("plain", text)
+
+    def image_result(self, url=""):
+        return ("image", url)
+
+    def chain_result(self, chain=None):
+        return ("chain", chain)
+
+    def make_result(self):
+        return _Anything("result")
+
+    async def send(self, *args, **kwargs):
+        return None
+
+    def __getattr__(self, item):
+        return _Anything(f"event.{item}")
+
+
+class _Star:
+    def __init__(self, context=None, config=None, *args, **kwargs):
+        self.context = context
+
+    async def terminate(self):
+        pass
+
+
+class _Filter:
+    """
+    filter 的桩：command 记录命令名，command_group 只记录前缀（指令组本身不是处理函数），
+    其它过滤器原样返回被装饰的函数
+    """
+
+    def __getattr__(self, item):
+        if item == "command":
+            return self._command(prefix="")
+        if item == "command_group":
+            return self._command(prefix="", group=True)
+        if item[:1].isupper():
+            # EventMessageType / PermissionType 等枚举
+            return _Anything(f"filter.{item}")
+
+        def factory(*args, **kwargs):
+            if len(args) == 1 and callable(args[0]) and not kwargs:
+                return args[0]
+            return lambda func: func
+        return factory
+
+    def _command(self, prefix: str, group: bool = False):
+        def factory(name=None, *args, **kwargs):
+            full = f"{prefix}{name}".strip()
+
+            def decorator(func):
+                if not group:
+                    func.__bench_command__ = full
+                # 支持 @group.command("sub") 和嵌套指令组的写法
+                func.command = self._command(prefix=full + " ")
+                func.command_group = self._command(prefix=full + " ", group=True)
+                func.group = func.command_group
+                return func
+            return decorator
+        return factory
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """把所有 astrbot.* 导入替换为桩模块"""
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname == "astrbot" or fullname.startswith("astrbot."):
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        module = types.ModuleType(spec.name)
+        module.__path__ = []
+        stub = _Anything(spec.name)
+        module.__getattr__ = lambda item: getattr(stub, item)
+        module.filter = _Filter()
+        module.Star = _Star
+        module.Context = _Anything
+        module.AstrMessageEvent = _MessageEvent
+        module.register = lambda *a, **k: (lambda cls: cls)
+        module.logger = _Anything("logger")
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank 百分位
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _convert_args(func, raw_args: List[str]) -> list:
+    """按照处理函数的类型注解转换命令参数，与宿主解析参数的方式保持一致"""
+    params = list(inspect.signature(func).parameters.values())[2:]
+    if not any(p.kind == p.VAR_POSITIONAL for p in params):
+        # 多余的参数宿主会忽略，这里同样丢弃
+        raw_args = raw_args[:len(params)]
+    converted = []
+    for i, value in enumerate(raw_args):
+        annotation = params[i].annotation if i < len(params) else str
+        try:
+            converted.append(annotation(value) if annotation in (int, float) else value)
+        except ValueError:
+            converted.append(value)
+    return converted
+
+
+async def _invoke(handler, event, args, call_timeout: float) -> int:
+    """调用一次处理函数，返回产生的结果数量"""
+
+    async def consume():
+        result = handler(event, *args)
+        count = 0
+        if inspect.isasyncgen(result):
+            async for _ in result:
+                count += 1
+        elif inspect.isgenerator(result):
+            count = sum(1 for _ in result)
+        elif inspect.isawaitable(result):
+            if await result is not None:
+                count += 1
+        return count
+
+    return await asyncio.wait_for(consume(), timeout=call_timeout)
+
+
+async def _bench_command(instance, name, func, options) -> dict:
+    handler = func.__get__(instance)
+    message = options["message"] or " ".join(["/" + name] + options["args"])
+    args = _convert_args(func, options["args"])
+    iterations = max(1, int(options["iterations"]))
+    call_timeout = options["call_timeout"]
+
+    failures, first_failure, results = 0, None, 0
+
+    async def once(timed: bool = False) -> float:
+        """timed 为 True 时计入失败次数；预热和分配统计的调用不计"""
+        nonlocal failures, first_failure, results
+        start = time.perf_counter()
+        try:
+            results = await _invoke(handler, _MessageEvent(message), args, call_timeout)
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            if timed:
+                failures += 1
+            first_failure = first_failure or f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start
+
+    try:
+        await once()  # 预热：首次调用常包含惰性初始化
+        timings = sorted([await once(timed=True) for _ in range(iterations)])
+    except asyncio.TimeoutError:
+        return {"error": f"a single call exceeded {call_timeout:.0f}s"}
+    if failures == iterations:
+        # 每次都抛异常时的耗时只是异常路径的耗时，没有参考价值
+        return {"error": f"every call raised: {first_failure}"}
+
+    # 分配统计单独跑一轮，避免 tracemalloc 的开销污染延迟数据
+    alloc_runs = min(iterations, 20)
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(alloc_runs):
+            await once()
+        current, peak = tracemalloc.get_traced_memory()
+    except asyncio.TimeoutError:
+        current, peak = base, base
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "runs": iterations,
+        "p50": _percentile(timings, 0.50),
+        "p95": _percentile(timings, 0.95),
+        "p99": _percentile(timings, 0.99),
+        "max": timings[-1],
+        "alloc_per_call": max(0, current - base) / alloc_runs,
+        "peak": max(0, peak - base),
+        "results": results,
+        "failures": failures,
+        "first_failure": first_failure,
+    }
+
+
+async def _worker(options: dict) -> dict:
+    plugin_dir = options["plugin_dir"]
+    sys.meta_path.insert(0, _StubFinder())
+
+    # 以包的形式导入，使插件内的相对导入可用
+    package = "bench_plugin"
+    spec = importlib.util.spec_from_file_location(
+        package, os.path.join(plugin_dir, "__init__.py"), submodule_search_locations=[plugin_dir])
+    pkg = importlib.util.module_from_spec(spec)
+    sys.modules[package] = pkg
+    if os.path.exists(os.path.join(plugin_dir, "__init__.py")):
+        spec.loader.exec_module(pkg)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(f"{package}.main")
+    except BaseException as e:
+        return {"error": f"import failed: {type(e).__name__}: {e}", "traceback": traceback.format_exc(limit=8)}
+    finally:
+        import_time = time.perf_counter() - start
+        _, import_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    star_cls = next((obj for obj in vars(module).values()
+                     if isinstance(obj, type) and issubclass(obj, _Star) and obj is not _Star
+                     and obj.__module__ == module.__name__), None)
+    if star_cls is None:
+        return {"error": "no Star subclass found in main.py"}
+
+    start = time.perf_counter()
+    try:
+        params = len(inspect.signature(star_cls.__init__).parameters)
+        instance = star_cls(_Anything("context"), {}) if params >= 3 else star_cls(_Anything("context"))
+    except Exception as e:
+        return {"error": f"plugin __init__ failed: {type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(limit=8)}
+    init_time = time.perf_counter() - start
+
+    handlers = {}
+    for attr in dir(star_cls):
+        func = getattr(star_cls, attr, None)
+        name = getattr(func, "__bench_command__", None)
+        if name and inspect.isfunction(func):
+            handlers[name] = func
+
+    wanted = options["commands"] or sorted(handlers)
+    result = {
+        "import_time": import_time,
+        "import_alloc": import_alloc,
+        "init_time": init_time,
+        "commands": {},
+        "missing": [c for c in wanted if c.lstrip("/") not in handlers],
+        "available": sorted(handlers),
+    }
+    for name in wanted:
+        name = name.lstrip("/")
+        if name in handlers:
+            result["commands"][name] = await _bench_command(instance, name, handlers[name], options)
+    return result
+
+
+def _main():
+    options = json.loads(sys.argv[1])
+    output = sys.argv[2]
+    try:
+        result = asyncio.run(_worker(options))
+    except BaseException as e:
+        result = {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc(limit=8)}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    _main()
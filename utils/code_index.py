@@ -0,0 +1,230 @@
+import ast
+import os
+import re
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .dir_index import DirIndex
+
+KIND_CLASS = "class"
+KIND_FUNCTION = "function"
+KIND_METHOD = "method"
+KIND_COMMAND = "command"
+KIND_IMPORT = "import"
+KIND_CALL = "call"
+
+DEFINITION_KINDS = (KIND_CLASS, KIND_FUNCTION, KIND_METHOD, KIND_COMMAND)
+# 会登记为指令/事件入口的装饰器（取最后一段名字）
+_COMMAND_DECORATORS = {"command", "command_group", "regex", "llm_tool", "permission_type"}
+
+# 单条符号: (类型, 名字, 起始行, 结束行, 附加信息)
+Symbol = Tuple[str, str, int, int, str]
+
+
+def _dotted(node) -> Optional[str]:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+    elif isinstance(node, ast.Call):
+        # 例如 self.context.get_config().get(...) 只保留可识别的尾部
+        parts.append("()")
+    else:
+        return None
+    return ".".join(reversed(parts))
+
+
+def _intern(name: str) -> str:
+    # 大量重复的名字（self.context.send_message 等）只保留一份
+    return sys.intern(name)
+
+
+def extract_symbols(source: str) -> List[Symbol]:
+    """从源码中提取定义、指令、导入和调用点。语法错误时返回空列表"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    symbols: List[Symbol] = []
+
+    def visit(body, prefix: str, in_class: bool):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                name = prefix + node.name
+                symbols.append((KIND_CLASS, _intern(name), node.lineno, node.end_lineno, ""))
+                visit(node.body, name + ".", True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = prefix + node.name
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                kind = KIND_METHOD if in_class else KIND_FUNCTION
+                detail = "async" if isinstance(node, ast.AsyncFunctionDef) else ""
+                symbols.append((kind, _intern(name), start, node.end_lineno, detail))
+                for deco in node.decorator_list:
+                    if not isinstance(deco, ast.Call):
+                        continue
+                    deco_name = _dotted(deco.func) or ""
+                    if deco_name.split(".")[-1] not in _COMMAND_DECORATORS:
+                        continue
+                    arg = deco.args[0] if deco.args else None
+                    if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                        symbols.append((KIND_COMMAND, _intern(arg.value), start, node.end_lineno,
+                                        f"@{deco_name} -> {name}"))
+                visit(node.body, name + ".", False)
+            elif isinstance(node, (ast.If, ast.Try, ast.With, ast.AsyncWith)):
+                # 条件导入、try/except 中的定义
+                visit(getattr(node, "body", []), prefix, in_class)
+                visit(getattr(node, "orelse", []), prefix, in_class)
+                for handler in getattr(node, "handlers", []):
+                    visit(handler.body, prefix, in_class)
+
+    visit(tree.body, "", False)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                symbols.append((KIND_IMPORT, _intern(alias.name), node.lineno, node.lineno, alias.asname or ""))
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            for alias in node.names:
+                symbols.append((KIND_IMPORT, _intern(f"{module}.{alias.name}" if node.module else module + alias.name),
+                                node.lineno, node.lineno, alias.asname or ""))
+        elif isinstance(node, ast.Call):
+            name = _dotted(node.func)
+            if name:
+                symbols.append((KIND_CALL, _intern(name), node.lineno, node.lineno, ""))
+    return symbols
+
+
+class _FileEntry:
+    __slots__ = ("mtime_ns", "size", "symbols")
+
+    def __init__(self, mtime_ns: int, size: int, symbols: List[Symbol]):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.symbols = symbols
+
+
+class CodeIndex:
+    """
+    plugin_base_dir 下所有 .py 文件的符号索引。
+    查询前借助 DirIndex 列出 .py 文件，逐个 stat 找出 mtime / 大小变化的文件并只重新解析它们
+    （DirIndex 只在目录 mtime 变化时重新 stat 其中的文件，无法发现外部原地修改）；
+    本插件自己写入的文件通过 FileManager 的写入回调直接用新内容更新，无需再读盘。
+    文件内容通过 reader 读取（通常是 FileManager 的内容缓存），供正则搜索使用。
+    """
+
+    def __init__(self, dir_index: DirIndex, reader: Callable[[str], str]):
+        self.dir_index = dir_index
+        self.root = dir_index.root
+        self._reader = reader
+        self._files: Dict[str, _FileEntry] = {}
+        self._lock = threading.Lock()
+
+    def on_write(self, full_path: str, content: str, st: os.stat_result):
+        """FileManager 写入文件后的回调"""
+        if not full_path.endswith(".py"):
+            return
+        rel = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+        entry = _FileEntry(st.st_mtime_ns, st.st_size, extract_symbols(content))
+        with self._lock:
+            self._files[rel] = entry
+
+    def refresh(self, plugin: Optional[str] = None) -> int:
+        """增量刷新索引，返回重新解析的文件数"""
+        entries, _ = self.dir_index.list_tree(plugin or ".")
+        prefix = f"{plugin}/" if plugin else ""
+        seen = set()
+        changed = 0
+        for rel, entry in entries:
+            if not rel.endswith(".py") or entry.is_dir:
+                continue
+            rel = prefix + rel
+            seen.add(rel)
+            full_path = os.path.join(self.root, rel)
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            with self._lock:
+                current = self._files.get(rel)
+            if current is not None and current.mtime_ns == st.st_mtime_ns and current.size == st.st_size:
+                continue
+            try:
+                source = self._reader(full_path)
+            except (OSError, UnicodeDecodeError):
+                continue
+            with self._lock:
+                self._files[rel] = _FileEntry(st.st_mtime_ns, st.st_size, extract_symbols(source))
+            changed += 1
+        with self._lock:
+            for rel in [r for r in self._files if r.startswith(prefix) and r not in seen]:
+                del self._files[rel]
+        return changed
+
+    def search(self, query: str, mode: str = "definition", plugin: Optional[str] = None,
+               limit: int = 50) -> List[Tuple[str, int, str]]:
+        """
+        mode: definition（类/函数/方法/指令名）、command、import、call（调用点）、grep（正则搜索源码）。
+        非 grep 模式下 query 为不区分大小写的子串，或以 / 包裹的正则。
+        返回 [(相对路径, 行号, 说明)]。
+        """
+        self.refresh(plugin)
+        prefix = f"{plugin}/" if plugin else ""
+        with self._lock:
+            files = sorted((rel, e) for rel, e in self._files.items() if rel.startswith(prefix))
+
+        if mode == "grep":
+            return self._grep(query, [rel for rel, _ in files], limit)
+
+        if len(query) > 2 and query.startswith("/") and query.endswith("/"):
+            pattern = re.compile(query[1:-1], re.IGNORECASE)
+            matches = lambda name: pattern.search(name) is not None
+        else:
+            needle = query.lower()
+            matches = lambda name: needle in name.lower()
+        kinds = DEFINITION_KINDS if mode == "definition" else (mode,)
+
+        results = []
+        for rel, entry in files:
+            for kind, name, line, end, detail in entry.symbols:
+                if kind not in kinds or not matches(name):
+                    continue
+                if kind == KIND_CALL:
+                    description = f"call {name}()"
+                elif kind == KIND_IMPORT:
+                    description = f"import {name}" + (f" as {detail}" if detail else "")
+                elif kind == KIND_COMMAND:
+                    description = f"command '{name}' ({detail}, lines {line}-{end})"
+                else:
+                    description = f"{(detail + ' ') if detail else ''}{kind} {name} (lines {line}-{end})"
+                results.append((rel, line, description))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _grep(self, query: str, files: List[str], limit: int) -> List[Tuple[str, int, str]]:
+        pattern = re.compile(query)
+        results = []
+        for rel in files:
+            try:
+                text = self._reader(os.path.join(self.root, rel))
+            except (OSError, UnicodeDecodeError):
+                continue
+            line_no, counted_to, last_line_start = 1, 0, -1
+            for match in pattern.finditer(text):
+                line_start = text.rfind("\n", 0, match.start()) + 1
+                if line_start == last_line_start:
+                    # 同一行只报告一次
+                    continue
+                last_line_start = line_start
+                line_no += text.count("\n", counted_to, line_start)
+                counted_to = line_start
+                line_end = text.find("\n", line_start)
+                line = text[line_start:line_end if line_end != -1 else len(text)].strip()
+                results.append((rel, line_no, line[:200]))
+                if len(results) >= limit:
+                    return results
+        return results
@@ -0,0 +1,229 @@
+import asyncio
+import fnmatch
+import os
+import stat
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_IGNORE = (
+    "__pycache__", ".git", ".svn", ".hg", "node_modules", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".idea", ".vscode",
+    "*.pyc", "*.pyo", ".DS_Store", "*.tmp",
+)
+
+
+class IndexedEntry:
+    """目录中的一项：文件或子目录"""
+    __slots__ = ("name", "is_dir", "is_link", "size", "mtime_ns")
+
+    def __init__(self, name: str, is_dir: bool, is_link: bool, size: int, mtime_ns: int):
+        self.name = name
+        self.is_dir = is_dir
+        self.is_link = is_link
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+
+class _DirNode:
+    __slots__ = ("mtime_ns", "entries", "ignored")
+
+    def __init__(self, mtime_ns: int, entries: Dict[str, IndexedEntry], ignored: int):
+        self.mtime_ns = mtime_ns
+        self.entries = entries
+        # 被忽略规则跳过的条目数，仅用于在输出中提示
+        self.ignored = ignored
+
+
+class DirIndex:
+    """
+    插件目录树的常驻索引。
+    每个目录记录扫描时的 mtime，刷新时只需对每个目录 stat 一次，只有 mtime 变化
+    （增删改名）或被显式标记为脏的目录才会重新 scandir。
+    开启 watchfiles 监听后，未收到事件的目录连 stat 都可以省掉。
+
+    注意：原地修改文件内容不会改变目录 mtime，此时缓存的文件大小可能滞后，
+    本插件自己的写入都会通过 mark_dirty 主动通知；需要准确大小时用 list_tree(stat_files=True)。
+    """
+
+    def __init__(self, root: str, ignore: Iterable[str] = DEFAULT_IGNORE):
+        self.root = os.path.abspath(root)
+        self._patterns = tuple(ignore)
+        self._exact = {p for p in self._patterns if not any(c in p for c in "*?[")}
+        self._globs = tuple(p for p in self._patterns if p not in self._exact)
+        self._nodes: Dict[str, _DirNode] = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.RLock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._watch_stop: Optional[asyncio.Event] = None
+        self.watching = False
+
+    def _ignored(self, name: str) -> bool:
+        if name in self._exact:
+            return True
+        return any(fnmatch.fnmatch(name, p) for p in self._globs)
+
+    def mark_dirty(self, path: str) -> None:
+        """通知索引某个目录（或文件所在目录）已经变化"""
+        path = os.path.abspath(path)
+        prefix = self.root + os.sep
+        with self._lock:
+            while path == self.root or path.startswith(prefix):
+                self._dirty.add(path)
+                if path == self.root:
+                    break
+                path = os.path.dirname(path)
+
+    def _scan(self, path: str, mtime_ns: int) -> _DirNode:
+        entries = {}
+        ignored = 0
+        with os.scandir(path) as it:
+            for item in it:
+                if self._ignored(item.name):
+                    ignored += 1
+                    continue
+                try:
+                    st = item.stat(follow_symlinks=True)
+                except OSError:
+                    # 悬空的符号链接
+                    entries[item.name] = IndexedEntry(item.name, False, True, 0, 0)
+                    continue
+                is_dir = stat.S_ISDIR(st.st_mode)
+                entries[item.name] = IndexedEntry(
+                    item.name, is_dir, item.is_symlink(), 0 if is_dir else st.st_size, st.st_mtime_ns
+                )
+        return _DirNode(mtime_ns, entries, ignored)
+
+    def _refresh_dir(self, path: str) -> Optional[_DirNode]:
+        """刷新单个目录（不递归），目录不存在时返回 None。调用方需持有锁"""
+        node = self._nodes.get(path)
+        dirty = path in self._dirty
+        if node is not None and self.watching and not dirty:
+            return node
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            self._forget(path)
+            return None
+        if node is None or dirty or node.mtime_ns != st.st_mtime_ns:
+            fresh = self._scan(path, st.st_mtime_ns)
+            if node is not None:
+                # 已被删除或不再是目录的子项，顺带清理其缓存
+                for name, old in node.entries.items():
+                    new = fresh.entries.get(name)
+                    if old.is_dir and (new is None or not new.is_dir):
+                        self._forget(os.path.join(path, name))
+            node = self._nodes[path] = fresh
+        self._dirty.discard(path)
+        return node
+
+    def _forget(self, path: str) -> None:
+        """移除目录及其所有子目录的缓存。调用方需持有锁"""
+        prefix = path + os.sep
+        for key in [k for k in self._nodes if k == path or k.startswith(prefix)]:
+            del self._nodes[key]
+        self._dirty.discard(path)
+
+    def _walk(self, path: str, rel: str, out: List[Tuple[str, IndexedEntry]], stats: dict,
+              stat_files: bool = False) -> None:
+        node = self._refresh_dir(path)
+        if node is None:
+            return
+        stats["ignored"] += node.ignored
+        for name in sorted(node.entries):
+            entry = node.entries[name]
+            rel_path = f"{rel}/{name}" if rel else name
+            if entry.is_dir and not entry.is_link:
+                stats["dirs"] += 1
+                before = len(out)
+                self._walk(os.path.join(path, name), rel_path, out, stats, stat_files)
+                if len(out) == before:
+                    out.append((rel_path + "/", entry))
+            else:
+                if stat_files and not entry.is_dir:
+                    try:
+                        st = os.stat(os.path.join(path, name))
+                        entry.size, entry.mtime_ns = st.st_size, st.st_mtime_ns
+                    except OSError:
+                        pass
+                out.append((rel_path, entry))
+
+    def list_tree(self, rel_dir: str, stat_files: bool = False) -> Tuple[List[Tuple[str, IndexedEntry]], dict]:
+        """
+        递归列出 rel_dir（相对根目录）下的所有文件，空目录以 'name/' 形式列出。
+        stat_files 为 True 时逐个 stat 文件并更新缓存的大小和 mtime（目录仍按 mtime 决定是否重新扫描）。
+        返回 ([(相对路径, 条目)], 统计信息)。目录不存在时抛出 FileNotFoundError。
+        """
+        path = os.path.abspath(os.path.join(self.root, rel_dir))
+        with self._lock:
+            if not os.path.isdir(path):
+                raise FileNotFoundError(path)
+            out: List[Tuple[str, IndexedEntry]] = []
+            stats = {"dirs": 0, "ignored": 0}
+            self._walk(path, "", out, stats, stat_files)
+        return out, stats
+
+    def plugin_dirs(self) -> Set[str]:
+        """根目录下包含 main.py 或 metadata.yaml 的插件目录名"""
+        result = set()
+        with self._lock:
+            root = self._refresh_dir(self.root)
+            if root is None:
+                raise FileNotFoundError(self.root)
+            for name, entry in root.entries.items():
+                if not entry.is_dir:
+                    continue
+                node = self._refresh_dir(os.path.join(self.root, name))
+                if node is not None and ("main.py" in node.entries or "metadata.yaml" in node.entries):
+                    result.add(name)
+        return result
+
+    # ========== 可选的 watchfiles 监听 ==========
+
+    def start_watching(self) -> bool:
+        """
+        在当前事件循环中启动 watchfiles 监听（AstrBot 自身的热重载也依赖它，通常已安装）。
+        不可用时返回 False，索引退化为按目录 mtime 校验。
+        监听真正生效（awatch 首次返回）后才跳过目录 stat；监听任务退出时自动退回按 mtime 校验。
+        """
+        if self._watch_task is not None:
+            return True
+        try:
+            from watchfiles import awatch
+        except ImportError:
+            return False
+
+        self._watch_stop = asyncio.Event()
+
+        async def _run():
+            # yield_on_timeout 让 awatch 在监听建立后即使没有变化也会返回，用来确认监听已生效
+            async for changes in awatch(self.root, stop_event=self._watch_stop, recursive=True,
+                                        rust_timeout=1000, yield_on_timeout=True):
+                if not self.watching:
+                    with self._lock:
+                        # 监听生效之前的变化收不到事件，已缓存的目录全部重新扫描一次
+                        self._dirty.update(self._nodes)
+                        self.watching = True
+                for _, changed in changes:
+                    self.mark_dirty(os.path.dirname(changed))
+                    self.mark_dirty(changed)
+
+        task = asyncio.get_running_loop().create_task(_run())
+        task.add_done_callback(self._on_watch_done)
+        self._watch_task = task
+        return True
+
+    def _on_watch_done(self, task: asyncio.Task) -> None:
+        """监听任务结束（正常停止或异常退出）后退回按目录 mtime 校验，之后可以重新 start_watching"""
+        if not task.cancelled():
+            task.exception()
+        if self._watch_task is task:
+            self._watch_task = None
+            self._watch_stop = None
+            self.watching = False
+
+    def stop_watching(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+        self._watch_task = None
+        self._watch_stop = None
+        self.watching = False
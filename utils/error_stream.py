@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from astrbot.api.event import MessageChain
+
+from .log_manager import TZ_SHANGHAI, LogEntry
+
+DEFAULT_SUBSCRIPTION_FILE = "./data/plugin_data/astrbot_plugin_self_iterative_core/error_subscriptions.json"
+
+
+class Subscription:
+    __slots__ = ("umo", "plugins", "min_level", "pending", "dropped", "last_sent")
+
+    def __init__(self, umo: str, plugins: Set[str], min_level: int):
+        self.umo = umo
+        # 为空时订阅所有插件目录
+        self.plugins = plugins
+        self.min_level = min_level
+        # 去重键 -> [首条日志, 次数, 最近时间]
+        self.pending: Dict[tuple, list] = {}
+        self.dropped = 0
+        self.last_sent = float("-inf")
+
+    def wants(self, entry: LogEntry) -> bool:
+        return entry.levelno >= self.min_level and (not self.plugins or entry.plugin in self.plugins)
+
+
+def _summary_line(entry: LogEntry) -> str:
+    """日志的一行摘要：消息首行，带异常时附上异常类型那一行"""
+    body = entry.message if entry.message is not None else (entry.text or "")
+    line = body.strip().split("\n", 1)[0]
+    if entry.exc_text:
+        last = entry.exc_text.strip().rsplit("\n", 1)[-1].strip()
+        if last and last not in line:
+            line = f"{line} | {last}"
+    return line[:200]
+
+
+class ErrorStream:
+    """
+    把插件运行时的 WARNING 及以上日志推送到订阅的会话。
+    LogManager.emit 所在线程只做一次级别 / 插件判断并放入 SimpleQueue，不等待任何锁或网络；
+    后台任务每 interval 秒取出新日志，按会话去重合并，同一会话两次推送至少间隔 min_interval 秒。
+    """
+
+    MAX_ITEMS = 10
+    MAX_PENDING = 200
+
+    def __init__(self, interval: float = 10.0, min_interval: float = 60.0,
+                 path: str = DEFAULT_SUBSCRIPTION_FILE):
+        self.interval = max(0.5, interval)
+        self.min_interval = max(0.0, min_interval)
+        self.path = path
+        self.ctx = None
+        self._queue: "queue.SimpleQueue[LogEntry]" = queue.SimpleQueue()
+        self._subscriptions: Dict[str, Subscription] = {}
+        # emit 线程只读取下面两个字段，订阅变化时整体替换
+        self._min_level = logging.CRITICAL + 1
+        self._plugins: Optional[frozenset] = frozenset()
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+
+    # ========== emit 线程 ==========
+
+    def on_log(self, entry: LogEntry):
+        """LogManager 的订阅回调，在产生日志的线程中调用"""
+        if entry.levelno < self._min_level or entry.plugin is None:
+            return
+        plugins = self._plugins
+        if plugins is not None and entry.plugin not in plugins:
+            return
+        self._queue.put(entry)
+
+    # ========== 订阅管理 ==========
+
+    def _refresh_filter(self):
+        subscriptions = list(self._subscriptions.values())
+        if not subscriptions:
+            self._min_level = logging.CRITICAL + 1
+            self._plugins = frozenset()
+            return
+        # None 表示至少有一个会话订阅了全部插件
+        plugins = None if any(not s.plugins for s in subscriptions) \
+            else frozenset().union(*(s.plugins for s in subscriptions))
+        self._plugins = plugins
+        self._min_level = min(s.min_level for s in subscriptions)
+
+    def subscribe(self, umo: str, plugins: Set[str], min_level: int = logging.WARNING) -> Subscription:
+        subscription = Subscription(umo, set(plugins), min_level)
+        self._subscriptions[umo] = subscription
+        self._refresh_filter()
+        self._save()
+        return subscription
+
+    def unsubscribe(self, umo: str) -> bool:
+        removed = self._subscriptions.pop(umo, None) is not None
+        if removed:
+            self._refresh_filter()
+            self._save()
+        return removed
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscriptions)
+
+    def get(self, umo: str) -> Optional[Subscription]:
+        return self._subscriptions.get(umo)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logging.getLogger("astrbot").warning(f"无法读取错误订阅: {self.path}", exc_info=True)
+            return
+        for item in data:
+            umo = item.get("umo")
+            if umo:
+                self._subscriptions[umo] = Subscription(
+                    umo, set(item.get("plugins", [])), int(item.get("min_level", logging.WARNING)))
+        self._refresh_filter()
+
+    def _save(self):
+        """订阅写入磁盘，本插件重载或 Bot 重启后继续生效"""
+        data = [{"umo": s.umo, "plugins": sorted(s.plugins), "min_level": s.min_level}
+                for s in self._subscriptions.values()]
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logging.getLogger("astrbot").warning(f"无法保存错误订阅: {self.path}", exc_info=True)
+
+    # ========== 后台任务 ==========
+
+    def start(self, ctx=None):
+        """在事件循环中启动后台任务；没有运行中的循环时什么也不做，下次订阅时再启动"""
+        if ctx is not None:
+            self.ctx = ctx
+        if self._task is not None or self.ctx is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self._drain()
+            now = time.monotonic()
+            for subscription in list(self._subscriptions.values()):
+                if subscription.pending and now - subscription.last_sent >= self.min_interval:
+                    subscription.last_sent = now
+                    await self._send(subscription, self._digest(subscription))
+
+    def _drain(self, limit: int = 10000):
+        """
+        把队列中的新日志按会话去重归并；重复的异常条目以同一对象多次到达。
+        每轮最多处理 limit 条，日志风暴时剩余部分留到下一轮，不长时间占用事件循环。
+        """
+        for _ in range(limit):
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            key = (entry.plugin, entry.levelno, entry.fingerprint or _summary_line(entry))
+            for subscription in self._subscriptions.values():
+                if not subscription.wants(entry):
+                    continue
+                item = subscription.pending.get(key)
+                if item is not None:
+                    item[1] += 1
+                    item[2] = entry.last_seen
+                elif len(subscription.pending) < self.MAX_PENDING:
+                    subscription.pending[key] = [entry, 1, entry.last_seen]
+                else:
+                    subscription.dropped += 1
+
+    def _digest(self, subscription: Subscription) -> str:
+        items = sorted(subscription.pending.values(), key=lambda item: (-item[0].levelno, -item[1]))
+        total = sum(item[1] for item in items) + subscription.dropped
+        lines = [f"🚨 插件运行时告警：{total} 条（{len(items)} 种）"]
+        for entry, count, last_seen in items[:self.MAX_ITEMS]:
+            clock = datetime.fromtimestamp(last_seen, tz=TZ_SHANGHAI).strftime("%H:%M:%S")
+            repeat = f" ×{count}" if count > 1 else ""
+            level = logging.getLevelName(entry.levelno)
+            lines.append(f"[{level}] {entry.plugin}{repeat} {clock} {_summary_line(entry)}")
+        hidden = len(items) - self.MAX_ITEMS
+        if hidden > 0:
+            lines.append(f"…另有 {hidden} 种未列出")
+        if subscription.dropped:
+            lines.append(f"…积压过多，{subscription.dropped} 条已丢弃")
+        lines.append("可让 Bot 调用 dev_check_logs 查看完整日志，发送“自迭代退订”停止推送。")
+        subscription.pending = {}
+        subscription.dropped = 0
+        return "\n".join(lines)
+
+    async def _send(self, subscription: Subscription, text: str):
+        try:
+            await self.ctx.send_message(subscription.umo, MessageChain().message(text))
+        except Exception:
+            # 不能在这里记录日志：发送失败产生的告警会再次进入订阅，形成循环
+            pass
@@ -1,66 +1,575 @@
 import os
+import re
+import ast
 import asyncio
-from typing import List
+import tempfile
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .async_lint import find_blocking_calls_cached
+from .code_index import CodeIndex
+from .dir_index import DEFAULT_IGNORE, DirIndex
+from .patcher import PatchError, apply_search_replace, apply_unified_diff
+from .snapshots import SnapshotStore
+from .stats import phased
+from .validator import format_issues, has_errors, validate_async
+
+
+class _CachedFile:
+    """缓存的文件内容，以 (mtime_ns, size) 校验是否过期"""
+    __slots__ = ("mtime_ns", "size", "text", "weight", "_line_offsets", "_symbols")
+
+    def __init__(self, mtime_ns: int, size: int, text: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.text = text
+        # 计入缓存上限的字节数：内容本身 + 行偏移索引的预估占用
+        self.weight = size + 8 * text.count("\n")
+        self._line_offsets = None
+        self._symbols = None
+
+    @property
+    def line_offsets(self) -> List[int]:
+        """每一行起始位置的字符偏移，首次按行读取时计算一次"""
+        if self._line_offsets is None:
+            offsets = [0]
+            text = self.text
+            pos = text.find("\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = text.find("\n", pos + 1)
+            if offsets[-1] == len(text) and len(offsets) > 1:
+                offsets.pop()
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_offsets) if self.text else 0
+
+    def lines(self, start: int, end: int) -> str:
+        """返回第 start 到 end 行（从 1 开始，闭区间）"""
+        offsets = self.line_offsets
+        begin = offsets[start - 1]
+        stop = offsets[end] if end < len(offsets) else len(self.text)
+        return self.text[begin:stop]
+
+    def symbols(self) -> Dict[str, Tuple[int, int]]:
+        """函数 / 类名 -> (起始行, 结束行)，包含装饰器；方法以 'Class.method' 形式登记"""
+        if self._symbols is None:
+            table = {}
+            try:
+                tree = ast.parse(self.text)
+            except SyntaxError:
+                tree = None
+            if tree is not None:
+                _collect_symbols(tree.body, "", table)
+            self._symbols = table
+        return self._symbols
+
+
+def _collect_symbols(body, prefix: str, table: dict):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            name = prefix + node.name
+            table[name] = (start, node.end_lineno)
+            # 方法名也允许直接查找，冲突时保留先出现的
+            table.setdefault(node.name, (start, node.end_lineno))
+            if isinstance(node, ast.ClassDef):
+                _collect_symbols(node.body, name + ".", table)
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 1024 / 1024:.1f} MB"
 
 
 class FileManager:
-    def __init__(self, base_path: str = "./data/plugins"):
+    def __init__(self, base_path: str = "./data/plugins", cache_bytes: int = 16 * 1024 * 1024,
+                 ignore: Optional[List[str]] = None, watch: bool = False, validate: bool = True,
+                 lint_async: bool = True, snapshots: Optional[SnapshotStore] = None):
         self.base_path = base_path
+        # 写入 .py 文件前先做语法、未定义名字、导入和插件结构检查
+        self.validate = validate
+        # 写入 .py 文件时顺带报告协程中可达的阻塞调用（只提示，不阻止写入）
+        self.lint_async = lint_async
+
+        # 插件根目录的常驻索引，dev_list_files 和 dev_load_plugin 都从这里取结果
+        self.dir_index = DirIndex(base_path, tuple(DEFAULT_IGNORE) + tuple(ignore or ()))
+        self._watch = watch
+
+        # 按总字节数限制的 LRU 内容缓存，键为绝对路径
+        self._cache: "OrderedDict[str, _CachedFile]" = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_limit = cache_bytes
+        self._cache_lock = threading.Lock()
+
+        # 写入回调: fn(绝对路径, 新内容, stat)，在写入线程中调用
+        self._write_listeners: List[Callable] = []
+        # 所有插件 .py 文件的符号索引，写入时直接用新内容更新
+        self.code_index = CodeIndex(self.dir_index, self._sync_read_file)
+        self.add_write_listener(self.code_index.on_write)
+        # 每次写入前保存被覆盖文件的旧版本，供 dev_rollback 回滚；为 None 时不保存历史
+        self.snapshots = snapshots
 
     def _get_full_path(self, plugin_name: str, file_path: str) -> str:
         full_path = os.path.join(self.base_path, plugin_name, file_path)
         return os.path.abspath(full_path)
 
+    def add_write_listener(self, listener: Callable) -> None:
+        """注册写入回调，每个文件 rename 到位后调用 listener(绝对路径, 新内容, stat)"""
+        self._write_listeners.append(listener)
+
     # ========== 同步内部方法（在线程池中执行） ==========
 
-    def _sync_write_file(self, full_path: str, content: str) -> None:
-        """同步写入，仅供内部调用"""
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    def _cache_put(self, full_path: str, cached: _CachedFile) -> None:
+        with self._cache_lock:
+            old = self._cache.pop(full_path, None)
+            if old is not None:
+                self._cache_bytes -= old.weight
+            if cached.weight > self._cache_limit:
+                return
+            self._cache[full_path] = cached
+            self._cache_bytes += cached.weight
+            while self._cache_bytes > self._cache_limit and self._cache:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.weight
+
+    def _cache_get(self, full_path: str, st: os.stat_result) -> Optional[_CachedFile]:
+        with self._cache_lock:
+            cached = self._cache.get(full_path)
+            if cached is None:
+                return None
+            if cached.mtime_ns != st.st_mtime_ns or cached.size != st.st_size:
+                del self._cache[full_path]
+                self._cache_bytes -= cached.weight
+                return None
+            self._cache.move_to_end(full_path)
+            return cached
+
+    @staticmethod
+    def _stage(full_path: str, content: str) -> str:
+        """把内容写入目标同目录下的临时文件并 fsync，返回临时文件路径"""
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # 临时文件不以 .py 结尾，避免宿主的热重载把它当成源码变化
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(full_path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.chmod(tmp_path, os.stat(full_path).st_mode & 0o7777)
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    @staticmethod
+    def _fsync_dirs(directories) -> None:
+        """重命名之后同步目录项，保证掉电后也能看到新文件（Windows 不支持，跳过）"""
+        if os.name != "posix":
+            return
+        for directory in directories:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _sync_write_file(self, full_path: str, content: str, note: str = "") -> None:
+        """同步原子写入（临时文件 + rename），仅供内部调用。写入后直接用新内容刷新缓存，而不是让它失效"""
+        self._sync_write_files([(full_path, content)], note=note)
+
+    def _sync_snapshot(self, items: List[Tuple[str, str]], deletes: List[str], note: str) -> None:
+        """把即将被覆盖或删除的文件的当前内容按插件记入快照仓库，内容未变化的文件不记录"""
+        root = os.path.abspath(self.base_path)
+        groups: Dict[str, Dict[str, Optional[bytes]]] = {}
+        targets = [(full_path, content.encode("utf-8")) for full_path, content in items]
+        targets += [(full_path, None) for full_path in deletes]
+        for full_path, new_data in targets:
+            rel = os.path.relpath(full_path, root)
+            plugin, _, rel_path = rel.partition(os.sep)
+            if not rel_path or plugin in (os.curdir, os.pardir):
+                continue
+            try:
+                with open(full_path, "rb") as f:
+                    old_data = f.read()
+            except FileNotFoundError:
+                old_data = None
+            if old_data == new_data:
+                continue
+            groups.setdefault(plugin, {})[rel_path.replace(os.sep, "/")] = old_data
+        for plugin, files in groups.items():
+            self.snapshots.record(plugin, files, note)
+
+    def _sync_write_files(self, items: List[Tuple[str, str]], deletes: Optional[List[str]] = None,
+                          note: str = "") -> None:
+        """
+        同步批量写入，仅供内部调用。
+        先把所有文件写到临时文件并 fsync，全部成功后再集中 rename 到位，
+        宿主只会在很短的窗口内看到一组完整一致的变化，只触发一次重载。
+        deletes 中的文件在 rename 之后删除（用于回滚时移除快照之后新建的文件）。
+        """
+        deletes = deletes or []
+        if self.snapshots is not None:
+            try:
+                self._sync_snapshot(items, deletes, note)
+            except OSError:
+                # 快照失败不影响写入本身
+                logging.getLogger("astrbot").warning("保存文件快照失败", exc_info=True)
+
+        staged = []
+        try:
+            for full_path, content in items:
+                staged.append((full_path, self._stage(full_path, content), content))
+        except BaseException:
+            for _, tmp_path, _ in staged:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+        # 非 .py 文件先就位，main.py 最后，保证热重载触发时依赖文件都已是新版本
+        def order(item):
+            path = item[0]
+            return (os.path.basename(path) == "main.py", path.endswith(".py"))
+
+        for full_path, tmp_path, content in sorted(staged, key=order):
+            os.replace(tmp_path, full_path)
+            st = os.stat(full_path)
+            self._cache_put(full_path, _CachedFile(st.st_mtime_ns, st.st_size, content))
+            self.dir_index.mark_dirty(os.path.dirname(full_path))
+            for listener in self._write_listeners:
+                try:
+                    listener(full_path, content, st)
+                except Exception:
+                    pass
+        for full_path in deletes:
+            try:
+                os.unlink(full_path)
+            except FileNotFoundError:
+                pass
+            with self._cache_lock:
+                cached = self._cache.pop(full_path, None)
+                if cached is not None:
+                    self._cache_bytes -= cached.weight
+            self.dir_index.mark_dirty(os.path.dirname(full_path))
+        self._fsync_dirs({os.path.dirname(full_path) for full_path, _, _ in staged}
+                         | {os.path.dirname(full_path) for full_path in deletes})
+
+    def _sync_read_cached(self, full_path: str) -> _CachedFile:
+        """同步读取，缓存命中时只需一次 stat，仅供内部调用"""
+        st = os.stat(full_path)
+        cached = self._cache_get(full_path, st)
+        if cached is not None:
+            return cached
+        with open(full_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        cached = _CachedFile(st.st_mtime_ns, st.st_size, text)
+        # 仍以读取前的 stat 为准：若读取期间文件被改动，下次校验会失配并重新读取
+        self._cache_put(full_path, cached)
+        return cached
 
     def _sync_read_file(self, full_path: str) -> str:
         """同步读取，仅供内部调用"""
-        with open(full_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return self._sync_read_cached(full_path).text
+
+    def _sync_read_range(self, full_path: str, start_line: Optional[int], end_line: Optional[int],
+                         symbol: Optional[str]) -> str:
+        """同步按行号区间或符号名读取，仅供内部调用"""
+        cached = self._sync_read_cached(full_path)
+        total = cached.line_count
+        if symbol:
+            span = cached.symbols().get(symbol)
+            if span is None:
+                names = ", ".join(sorted(n for n in cached.symbols() if "." not in n)[:30])
+                raise KeyError(f"未找到符号 '{symbol}'。可用的顶层符号: {names or '无'}")
+            start_line, end_line = span
+        start = max(1, int(start_line or 1))
+        end = min(total, int(end_line or total))
+        if total == 0 or start > end:
+            return f"[lines {start}-{end} of {total}] (empty range)"
+        return f"[lines {start}-{end} of {total}]\n{cached.lines(start, end)}"
 
-    def _sync_list_files(self, plugin_path: str) -> List[str]:
-        """同步遍历目录，仅供内部调用"""
-        file_list = []
-        for root, dirs, files in os.walk(plugin_path):
-            for file in files:
-                rel_path = os.path.relpath(os.path.join(root, file), plugin_path)
-                file_list.append(rel_path)
-        return file_list
+    def _sync_apply_edits(self, full_path: str, edits: Optional[list], diff: Optional[str]):
+        """同步读取并在内存中应用全部修改，不写盘，仅供内部调用"""
+        content = self._sync_read_file(full_path)
+        if diff:
+            new_content, notes = apply_unified_diff(content, diff)
+        else:
+            new_content, notes = apply_search_replace(content, edits)
+        return new_content, notes, new_content != content
+
+    def _sync_list_files(self, plugin_name: str) -> str:
+        """同步从目录索引生成文件列表，仅供内部调用。文件可能被宿主或其它插件原地修改，大小逐个 stat"""
+        entries, stats = self.dir_index.list_tree(plugin_name, stat_files=True)
+        if not entries:
+            return "目录为空。"
+        lines = []
+        total = files = 0
+        for rel_path, entry in entries:
+            if rel_path.endswith("/"):
+                lines.append(f"{rel_path}  [空目录]")
+                continue
+            files += 1
+            total += entry.size
+            kind = "  [链接]" if entry.is_link else ""
+            lines.append(f"{rel_path}  ({_format_size(entry.size)}){kind}")
+        summary = f"共 {files} 个文件，{stats['dirs']} 个目录，合计 {_format_size(total)}"
+        if stats["ignored"]:
+            summary += f"；已忽略 {stats['ignored']} 项（缓存、版本库等）"
+        return "\n".join(lines) + "\n" + summary
+
+    def _sync_lint_blocking(self, plugin_name: str, file_path: Optional[str]) -> str:
+        """同步检查插件中的阻塞调用，仅供内部调用"""
+        if file_path:
+            targets = [file_path]
+        else:
+            entries, _ = self.dir_index.list_tree(plugin_name)
+            targets = [rel for rel, _ in entries if rel.endswith(".py")]
+        reports = []
+        for rel in targets:
+            content = self._sync_read_file(self._get_full_path(plugin_name, rel))
+            reports.extend(b.format(rel) for b in find_blocking_calls_cached(content))
+        if not reports:
+            return f"未发现阻塞调用（共检查 {len(targets)} 个文件）。"
+        return f"发现 {len(reports)} 处可能阻塞事件循环的调用:\n" + "\n".join(reports)
+
+    def _sync_search_code(self, query: str, mode: str, plugin_name: Optional[str], limit: int) -> str:
+        """同步查询代码索引，仅供内部调用"""
+        results = self.code_index.search(query, mode=mode, plugin=plugin_name, limit=limit)
+        if not results:
+            return "没有找到匹配的结果。"
+        lines = [f"{rel}:{line}: {text}" for rel, line, text in results]
+        if len(results) >= limit:
+            lines.append(f"（只显示前 {limit} 条结果，请缩小查询范围）")
+        return "\n".join(lines)
+
+    def _sync_plugin_dirs(self) -> set:
+        """同步从目录索引取出所有插件目录名，仅供内部调用"""
+        return self.dir_index.plugin_dirs()
+
+    def _sync_list_snapshots(self, plugin_name: str, limit: int) -> str:
+        """同步列出插件最近的快照，仅供内部调用"""
+        snapshots = self.snapshots.list(plugin_name, limit)
+        if not snapshots:
+            return "该插件还没有任何快照。"
+        lines = []
+        for snapshot in reversed(snapshots):
+            created = time.strftime("%m-%d %H:%M:%S", time.localtime(snapshot.created))
+            names = sorted(snapshot.files)
+            shown = ", ".join(names[:4]) + (f" 等 {len(names)} 个文件" if len(names) > 4 else "")
+            lines.append(f"#{snapshot.id}  {created}  {snapshot.note or '-'}  [{shown}]")
+        return "快照 #N 保存的是第 N 次写入之前的状态（最新在前）:\n" + "\n".join(lines)
+
+    def _sync_rollback(self, plugin_name: str, snapshot_id: int) -> Tuple[List[str], List[str]]:
+        """同步把插件恢复到快照 #snapshot_id 之前的状态，仅供内部调用。返回 (恢复的文件, 删除的文件)"""
+        state = self.snapshots.state_at(plugin_name, snapshot_id)
+        blobs, deletes = self.snapshots.materialize(state)
+        items = [(self._get_full_path(plugin_name, rel), data.decode("utf-8")) for rel, data in blobs.items()]
+        self._sync_write_files(items, [self._get_full_path(plugin_name, rel) for rel in deletes],
+                               note=f"rollback to #{snapshot_id}")
+        return sorted(blobs), sorted(deletes)
 
     # ========== 异步公开方法 ==========
 
-    async def write_file(self, plugin_name: str, file_path: str, content: str) -> str:
+    @phased("validate")
+    async def _validate(self, plugin_name: str, items: List[Tuple[str, str]]) -> Tuple[bool, str]:
+        """
+        在进程池中校验待写入的 .py 文件，并检查协程中可达的阻塞调用，不会触碰磁盘上的插件。
+        返回 (是否存在阻止写入的错误, 问题报告)。
+        """
+        plugin_root = os.path.abspath(os.path.join(self.base_path, plugin_name))
+        pending = [full_path for full_path, _ in items]
+        targets = [(full_path, content) for full_path, content in items if full_path.endswith(".py")]
+        blocked = False
+        reports = []
+        if self.validate:
+            results = await asyncio.gather(*(
+                validate_async(content, full_path, plugin_root, pending) for full_path, content in targets
+            ))
+            for (full_path, _), issues in zip(targets, results):
+                if issues:
+                    blocked = blocked or has_errors(issues)
+                    reports.append(format_issues(os.path.relpath(full_path, plugin_root), issues))
+        if self.lint_async and not blocked:
+            for full_path, content in targets:
+                findings = await asyncio.to_thread(find_blocking_calls_cached, content)
+                rel_path = os.path.relpath(full_path, plugin_root)
+                reports.extend(b.format(rel_path) for b in findings)
+        return blocked, "\n".join(reports)
+
+    @phased("io")
+    async def write_file(self, plugin_name: str, file_path: str, content: str) -> Tuple[bool, str]:
+        """写入单个文件。与下面几个写入类方法一样返回 (是否写入了磁盘, 结果说明)"""
+        full_path = self._get_full_path(plugin_name, file_path)
+        blocked, report = await self._validate(plugin_name, [(full_path, content)])
+        if blocked:
+            return False, f"代码校验未通过，文件未写入:\n{report}"
+        try:
+            await asyncio.to_thread(self._sync_write_file, full_path, content, f"write {file_path}")
+        except Exception as e:
+            return False, f"写入文件失败: {str(e)}"
+        result = f"成功写入文件: {plugin_name}/{file_path}"
+        return True, (f"{result}\n代码校验警告:\n{report}" if report else result)
+
+    @phased("io")
+    async def write_files(self, plugin_name: str, files: List[dict]) -> Tuple[bool, str]:
+        """事务式写入多个文件：全部暂存成功后才统一替换，任一文件失败则一个都不写"""
+        items = []
+        for item in files:
+            file_path = item.get("file_path")
+            content = item.get("content")
+            if not file_path or content is None:
+                return False, "写入文件失败: 每个文件都需要提供 file_path 和 content。"
+            items.append((self._get_full_path(plugin_name, file_path), content))
+        if len({full_path for full_path, _ in items}) != len(items):
+            return False, "写入文件失败: 文件路径重复。"
+        blocked, report = await self._validate(plugin_name, items)
+        if blocked:
+            return False, f"代码校验未通过，未写入任何内容:\n{report}"
+        try:
+            note = "write " + ", ".join(item["file_path"] for item in files)
+            await asyncio.to_thread(self._sync_write_files, items, None, note)
+        except Exception as e:
+            return False, f"写入文件失败，未写入任何内容: {str(e)}"
+        names = ", ".join(item["file_path"] for item in files)
+        result = f"成功写入 {len(items)} 个文件: {plugin_name}/{{{names}}}"
+        return True, (f"{result}\n代码校验警告:\n{report}" if report else result)
+
+    @phased("io")
+    async def edit_file(self, plugin_name: str, file_path: str,
+                        edits: Optional[list] = None, diff: Optional[str] = None) -> Tuple[bool, str]:
+        """应用一组 search/replace 修改或 unified diff，有冲突时不写入任何内容"""
         full_path = self._get_full_path(plugin_name, file_path)
         try:
-            await asyncio.to_thread(self._sync_write_file, full_path, content)
-            return f"成功写入文件: {plugin_name}/{file_path}"
+            new_content, notes, changed = await asyncio.to_thread(self._sync_apply_edits, full_path, edits, diff)
+        except FileNotFoundError:
+            return False, "文件不存在。"
+        except PatchError as e:
+            return False, f"修改文件失败，未写入任何内容:\n{str(e)}"
+        except Exception as e:
+            return False, f"修改文件失败: {str(e)}"
+        summary = "\n".join(f"- {note}" for note in notes)
+        if not changed:
+            return False, f"文件内容未变化: {plugin_name}/{file_path}\n{summary}"
+        blocked, report = await self._validate(plugin_name, [(full_path, new_content)])
+        if blocked:
+            return False, f"修改后的代码校验未通过，未写入任何内容:\n{report}"
+        try:
+            await asyncio.to_thread(self._sync_write_file, full_path, new_content, f"edit {file_path}")
         except Exception as e:
-            return f"写入文件失败: {str(e)}"
+            return False, f"修改文件失败: {str(e)}"
+        result = f"成功修改文件: {plugin_name}/{file_path}\n{summary}"
+        return True, (f"{result}\n代码校验警告:\n{report}" if report else result)
 
-    async def read_file(self, plugin_name: str, file_path: str) -> str:
+    @phased("io")
+    async def read_file(self, plugin_name: str, file_path: str, start_line: Optional[int] = None,
+                        end_line: Optional[int] = None, symbol: Optional[str] = None) -> str:
+        """读取整个文件，或按行号区间 / 函数类名读取其中一段"""
         full_path = self._get_full_path(plugin_name, file_path)
         try:
-            exists = await asyncio.to_thread(os.path.exists, full_path)
-            if not exists:
-                return "文件不存在。"
-            content = await asyncio.to_thread(self._sync_read_file, full_path)
-            return content
+            if start_line is None and end_line is None and not symbol:
+                return await asyncio.to_thread(self._sync_read_file, full_path)
+            return await asyncio.to_thread(self._sync_read_range, full_path, start_line, end_line, symbol)
+        except FileNotFoundError:
+            return "文件不存在。"
+        except KeyError as e:
+            return str(e.args[0])
         except Exception as e:
             return f"读取文件失败: {str(e)}"
 
+    def _ensure_watching(self) -> None:
+        if self._watch and not self.dir_index.watching:
+            self.dir_index.start_watching()
+
+    @phased("io")
     async def list_files(self, plugin_name: str) -> str:
-        plugin_path = os.path.join(self.base_path, plugin_name)
+        self._ensure_watching()
         try:
-            exists = await asyncio.to_thread(os.path.exists, plugin_path)
-            if not exists:
-                return "插件目录不存在。"
-            file_list = await asyncio.to_thread(self._sync_list_files, plugin_path)
-            return "\n".join(file_list) if file_list else "目录为空。"
+            return await asyncio.to_thread(self._sync_list_files, plugin_name)
+        except FileNotFoundError:
+            return "插件目录不存在。"
         except Exception as e:
             return f"列出文件失败: {str(e)}"
+
+    @phased("io")
+    async def lint_blocking(self, plugin_name: str, file_path: Optional[str] = None) -> str:
+        """检查单个文件或整个插件目录中可从协程到达的阻塞调用"""
+        try:
+            return await asyncio.to_thread(self._sync_lint_blocking, plugin_name, file_path)
+        except FileNotFoundError:
+            return "文件或插件目录不存在。"
+        except Exception as e:
+            return f"检查阻塞调用失败: {str(e)}"
+
+    @phased("io")
+    async def search_code(self, query: str, mode: str = "definition", plugin_name: Optional[str] = None,
+                          limit: int = 50) -> str:
+        """在所有插件（或指定插件）的代码索引中查找定义、指令、导入、调用点，或按正则搜索源码"""
+        self._ensure_watching()
+        try:
+            return await asyncio.to_thread(self._sync_search_code, query, mode, plugin_name, limit)
+        except FileNotFoundError:
+            return "插件目录不存在。"
+        except re.error as e:
+            return f"正则表达式无效: {str(e)}"
+        except Exception as e:
+            return f"搜索代码失败: {str(e)}"
+
+    @phased("io")
+    async def list_snapshots(self, plugin_name: str, limit: int = 20) -> str:
+        if self.snapshots is None:
+            return "文件快照未启用（snapshot_enabled）。"
+        try:
+            return await asyncio.to_thread(self._sync_list_snapshots, plugin_name, limit)
+        except Exception as e:
+            return f"读取快照失败: {str(e)}"
+
+    @phased("io")
+    async def rollback(self, plugin_name: str, snapshot_id: int) -> Tuple[bool, str]:
+        """
+        把插件恢复到快照 #snapshot_id 对应那次写入之前的状态，所有文件在同一批 rename 中替换。
+        回滚本身也会生成快照，因此可以再次回滚撤销。
+        """
+        if self.snapshots is None:
+            return False, "文件快照未启用（snapshot_enabled）。"
+        try:
+            restored, deleted = await asyncio.to_thread(self._sync_rollback, plugin_name, snapshot_id)
+        except KeyError:
+            return False, f"快照 #{snapshot_id} 不存在（可能已被清理），请先不带 snapshot_id 调用查看可用快照。"
+        except UnicodeDecodeError:
+            return False, "回滚失败: 快照中包含非 UTF-8 文本文件，未写入任何内容。"
+        except Exception as e:
+            return False, f"回滚失败: {str(e)}"
+        lines = [f"已将 {plugin_name} 回滚到快照 #{snapshot_id} 之前的状态。"]
+        if restored:
+            lines.append("恢复: " + ", ".join(restored))
+        if deleted:
+            lines.append("删除: " + ", ".join(deleted))
+        return True, "\n".join(lines)
+
+    async def plugin_dirs(self) -> set:
+        """根目录下包含 main.py 或 metadata.yaml 的插件目录名，目录无法读取时抛出异常"""
+        self._ensure_watching()
+        return await asyncio.to_thread(self._sync_plugin_dirs)
+
+    def close(self) -> None:
+        self.dir_index.stop_watching()
@@ -0,0 +1,246 @@
+import bisect
+import json
+import mmap
+import os
+import threading
+from typing import Callable, List, Optional
+
+SEGMENT_PREFIX = "seg-"
+SEGMENT_SUFFIX = ".jsonl"
+# 关闭时记录已分配的最大序号。重复日志会消耗序号却不产生新行，仅靠分段末行会让游标倒退
+HIGH_SEQ_FILE = "high_seq"
+# 稀疏索引的步长：每隔多少行记录一次 (序号, 偏移)
+INDEX_STRIDE = 64
+
+
+class _Segment:
+    """一个磁盘分段文件，每行一条 JSON 数组形式的日志，首元素为序号"""
+
+    def __init__(self, path: str, first_seq: int):
+        self.path = path
+        self.first_seq = first_seq
+        self.last_seq = first_seq - 1
+        # 稀疏索引：index_seqs[i] 为第 i 个块首行的序号，index_offsets[i] 为其字节偏移
+        self.index_seqs: List[int] = []
+        self.index_offsets: List[int] = []
+        self._indexed_bytes = 0
+        self._lines_indexed = 0
+        self._map: Optional[mmap.mmap] = None
+        self._map_size = 0
+
+    def view(self) -> Optional[mmap.mmap]:
+        """返回覆盖整个文件的只读 mmap，文件变大后重新映射"""
+        size = os.path.getsize(self.path)
+        if size == 0:
+            return None
+        if self._map is None or self._map_size != size:
+            self.unmap()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = size
+        return self._map
+
+    def unmap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._map_size = 0
+
+    def refresh_index(self):
+        """增量补全稀疏索引，只扫描上次之后新写入的字节"""
+        view = self.view()
+        if view is None:
+            return
+        pos = self._indexed_bytes
+        end = len(view)
+        while pos < end:
+            nl = view.find(b"\n", pos)
+            if nl == -1:
+                # 尾部半行（进程崩溃时可能出现），等下次补全
+                break
+            seq = _peek_seq(view, pos, nl)
+            if seq is not None:
+                if self._lines_indexed % INDEX_STRIDE == 0:
+                    self.index_seqs.append(seq)
+                    self.index_offsets.append(pos)
+                self._lines_indexed += 1
+                self.last_seq = seq
+            pos = nl + 1
+        self._indexed_bytes = pos
+
+    def read_block(self, block: int) -> List[list]:
+        """解码第 block 个索引块中的所有行"""
+        view = self.view()
+        start = self.index_offsets[block]
+        end = self.index_offsets[block + 1] if block + 1 < len(self.index_offsets) else self._indexed_bytes
+        rows = []
+        for line in view[start:end].splitlines():
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+        return rows
+
+
+def _peek_seq(view, start: int, end: int) -> Optional[int]:
+    """不解码整行，直接读出行首的序号"""
+    comma = view.find(b",", start, end)
+    if comma == -1 or view[start:start + 1] != b"[":
+        return None
+    try:
+        return int(view[start + 1:comma])
+    except ValueError:
+        return None
+
+
+class LogArchive:
+    """
+    内存缓冲区之外的磁盘日志层。
+    被淘汰出内存的日志按行追加到滚动分段文件中，读取时通过 mmap + 稀疏偏移索引定位，
+    总占用由分段大小和分段数量限定。
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 4 * 1024 * 1024, max_segments: int = 32):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(2, max_segments)
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._writer = None
+        self._writer_bytes = 0
+        self.high_seq = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """接上一次运行（例如插件重载前）留下的分段，保证序号连续递增"""
+        names = sorted(
+            n for n in os.listdir(self.directory)
+            if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)
+        )
+        for name in names:
+            try:
+                first_seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            except ValueError:
+                continue
+            self._segments.append(_Segment(os.path.join(self.directory, name), first_seq))
+        if self._segments:
+            last = self._segments[-1]
+            last.refresh_index()
+            last.unmap()
+        self.high_seq = self.last_seq
+        try:
+            with open(os.path.join(self.directory, HIGH_SEQ_FILE), encoding="utf-8") as f:
+                self.high_seq = max(self.high_seq, int(f.read().strip() or 0))
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def last_seq(self) -> int:
+        if not self._segments:
+            return 0
+        return self._segments[-1].last_seq
+
+    @property
+    def first_seq(self) -> int:
+        if not self._segments:
+            return 0
+        return self._segments[0].first_seq
+
+    def append(self, row: list, high_seq: Optional[int] = None):
+        """追加一条日志，row[0] 必须是序号；high_seq 为这条日志已占用的最大序号（默认即 row[0]）"""
+        line = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._writer is None or self._writer_bytes >= self.segment_bytes:
+                self._rotate(row[0])
+            self._writer.write(line)
+            self._writer_bytes += len(line)
+            self._segments[-1].last_seq = row[0]
+            self.high_seq = max(self.high_seq, row[0] if high_seq is None else high_seq)
+
+    def _rotate(self, first_seq: int):
+        """关闭当前分段并开启新分段，超出数量上限时删除最旧的分段。调用方需持有锁"""
+        if self._writer is not None:
+            self._writer.close()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+        self._writer = open(path, "ab", buffering=64 * 1024)
+        self._writer_bytes = 0
+        self._segments.append(_Segment(path, first_seq))
+
+        while len(self._segments) > self.max_segments:
+            old = self._segments.pop(0)
+            old.unmap()
+            try:
+                os.remove(old.path)
+            except OSError:
+                pass
+
+    def flush(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+
+    def scan(self, before_seq: int, after_seq: int = 0, limit: int = 100,
+             match: Callable = None, stop: Callable = None, decode: Callable = None) -> list:
+        """
+        从新到旧扫描序号在 (after_seq, before_seq) 之间的日志，返回最多 limit 条满足 match 的记录，
+        结果按序号从新到旧排列；stop 返回 True 时立即终止扫描。
+        decode 用于把行转换为调用方的对象，match / stop 接收的是转换后的对象。
+        """
+        results = []
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            starts = [seg.first_seq for seg in self._segments]
+            idx = bisect.bisect_left(starts, before_seq) - 1
+            while idx >= 0 and len(results) < limit:
+                seg = self._segments[idx]
+                seg.refresh_index()
+                if seg.last_seq <= after_seq:
+                    break
+                if self._finish_segment(seg, before_seq, after_seq, limit, match, stop, decode, results):
+                    break
+                idx -= 1
+        return results
+
+    @staticmethod
+    def _finish_segment(seg: _Segment, before_seq, after_seq, limit, match, stop, decode, results) -> bool:
+        """在单个分段内逐块倒序扫描，返回 True 表示扫描应当整体结束"""
+        block = bisect.bisect_left(seg.index_seqs, before_seq) - 1
+        while block >= 0:
+            for row in reversed(seg.read_block(block)):
+                seq = row[0]
+                if seq >= before_seq:
+                    continue
+                if seq <= after_seq:
+                    return True
+                item = decode(row) if decode is not None else row
+                if stop is not None and stop(item):
+                    return True
+                if match is None or match(item):
+                    results.append(item)
+                    if len(results) >= limit:
+                        return True
+            block -= 1
+        return False
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                try:
+                    self._writer.flush()
+                    os.fsync(self._writer.fileno())
+                except OSError:
+                    pass
+                self._writer.close()
+                self._writer = None
+            for seg in self._segments:
+                seg.unmap()
+            path = os.path.join(self.directory, HIGH_SEQ_FILE)
+            try:
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(str(self.high_seq))
+                os.replace(path + ".tmp", path)
+            except OSError:
+                pass
@@ -1,7 +1,13 @@
+import heapq
 import logging
+import os
+import re
 import threading
 from collections import deque
-from datetime import datetime
+from itertools import islice
+from datetime import datetime, timedelta
+
+from .log_archive import LogArchive
 
 try:
     import zoneinfo
@@ -19,16 +25,160 @@ class ShanghaiFormatter(logging.Formatter):
         return dt.isoformat()
 
 
+class LogEntry:
+    """缓冲区中的一条日志，只保存原始字段，格式化推迟到读取时"""
+    __slots__ = ("seq", "created", "levelno", "name", "message", "exc_text", "text", "plugin",
+                 "fingerprint", "count", "last_seen", "last_seq")
+
+    def __init__(self, created, levelno, name, message, exc_text=None, text=None):
+        # 单调递增的序号，由 LogManager 在入队时分配，用作增量读取的游标
+        self.seq = 0
+        self.created = created
+        self.levelno = levelno
+        self.name = name
+        self.message = message
+        self.exc_text = exc_text
+        # 非惰性模式下写入时即格式化好的文本
+        self.text = text
+        # 产生这条日志的插件目录名，无法归属时为 None
+        self.plugin = None
+        # 带异常栈的日志会被指纹化，重复出现时只累加计数，不再占用新的缓冲位置
+        self.fingerprint = None
+        self.count = 1
+        self.last_seen = created
+        self.last_seq = 0
+
+    def search_text(self) -> str:
+        """用于正则过滤的原始文本"""
+        body = self.message if self.text is None else self.text
+        if self.exc_text and self.text is None:
+            return f"{body}\n{self.exc_text}"
+        return body
+
+
+_TRACEBACK_HEAD = "Traceback (most recent call last)"
+_FRAME_RE = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+_EXC_LINE_RE = re.compile(r"^([A-Za-z_][\w.]*)(?::|$)")
+
+
+def fingerprint_record(record: logging.LogRecord):
+    """
+    异常类型 + 归一化调用栈（文件名与函数名，不含行号）的指纹。
+    既处理带 exc_info 的记录，也处理把 traceback.format_exc() 直接写进消息的记录。
+    不带异常栈的记录返回 None。
+    """
+    if record.exc_info and record.exc_info[0] is not None:
+        exc_type, _, tb = record.exc_info
+        frames = []
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frames.append((code.co_filename, code.co_name))
+            tb = tb.tb_next
+        return hash((exc_type.__qualname__, tuple(frames)))
+
+    if record.levelno < logging.ERROR:
+        return None
+    msg = record.msg if isinstance(record.msg, str) else None
+    if not msg or _TRACEBACK_HEAD not in msg:
+        return None
+    text = record.getMessage()
+    frames = tuple(_FRAME_RE.findall(text))
+    exc_type = None
+    for line in reversed(text.rstrip().splitlines()):
+        found = _EXC_LINE_RE.match(line.strip())
+        if found:
+            exc_type = found.group(1)
+            break
+    return hash((exc_type, frames))
+
+
+def parse_clock(value: str, now: float = None) -> float:
+    """
+    把日志中显示的 'HH:MM[:SS]' 时间换算成时间戳。
+    日志只显示时分秒，若该时刻晚于当前时间则视为前一天。
+    """
+    parts = [int(p) for p in value.strip().split(":")]
+    while len(parts) < 3:
+        parts.append(0)
+    current = datetime.fromtimestamp(now, tz=TZ_SHANGHAI) if now else datetime.now(tz=TZ_SHANGHAI)
+    target = current.replace(hour=parts[0], minute=parts[1], second=parts[2], microsecond=0)
+    if target > current:
+        target -= timedelta(days=1)
+    return target.timestamp()
+
+
+def parse_level(value) -> int:
+    """把 'warning' / 'ERROR' / 30 之类的输入转换为日志级别数值"""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().upper()
+    if text.isdigit():
+        return int(text)
+    level = logging.getLevelName(text)
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {value}")
+    return level
+
+
+DEFAULT_ARCHIVE_DIR = "./data/plugin_data/astrbot_plugin_self_iterative_core/log_archive"
+
+
+def _to_row(entry: LogEntry) -> list:
+    """磁盘层的行格式，首元素必须是序号"""
+    return [entry.seq, entry.created, entry.levelno, entry.name,
+            entry.message, entry.exc_text, entry.text, entry.plugin,
+            entry.count, entry.last_seen, entry.last_seq]
+
+
+def _from_row(row: list) -> LogEntry:
+    entry = LogEntry(row[1], row[2], row[3], row[4], row[5], row[6])
+    entry.seq = row[0]
+    entry.last_seq = row[10] if len(row) > 10 else row[0]
+    entry.plugin = row[7]
+    if len(row) > 9:
+        entry.count = row[8]
+        entry.last_seen = row[9]
+    return entry
+
+
 class LogManager(logging.Handler):
-    def __init__(self, config=None):
+    # 轻量模式下预先挂载的小环形缓冲区容量
+    LIGHT_HISTORY = 500
+
+    def __init__(self, config=None, light: bool = False):
         logging.Handler.__init__(self)
 
         self.max_history = 3000
+        self.lazy_format = True
+        self.archive = None
+        self._config = config
         if config:
             self.max_history = getattr(config, 'log_max_history', 3000)
+            self.lazy_format = config.get("log_lazy_format", True)
+            if config.get("log_disk_history", False) and not light:
+                self.archive = self._open_archive(config)
+        # 轻量模式：emit 只把原始字段追加到这个无锁环形缓冲区，不做格式化、指纹、索引和落盘，
+        # 首次使用开发工具时由 upgrade() 回放到完整结构中。为 None 表示已是完整模式
+        self._light = deque(maxlen=self.LIGHT_HISTORY) if light else None
 
         self.log_buffer = deque(maxlen=self.max_history)
         self._buffer_lock = threading.Lock()
+        # 接续磁盘层中已有的序号，保证插件重载后游标依然单调递增
+        self._seq = self.archive.high_seq if self.archive else 0
+
+        # 二级索引：按级别 / Logger 名 / 插件目录分别维护一份有序引用，
+        # 条目被淘汰出主缓冲区时同步从索引左端弹出
+        self._level_index = {}
+        self._name_index = {}
+        self._plugin_index = {}
+        # 指纹 -> 缓冲区中对应的首条日志，条目被淘汰时一并移除
+        self._fingerprints = {}
+        # 新日志的订阅回调，在 emit 所在线程中同步调用，必须足够轻量且线程安全
+        self._listeners = []
+
+        base_dir = config.get("plugin_base_dir", "./data/plugins") if config else "./data/plugins"
+        self._plugin_prefix = os.path.abspath(base_dir) + os.sep
+        self._plugin_path_re = re.compile(re.escape(self._plugin_prefix) + r"([^\\/\s\"']+)")
 
         formatter = ShanghaiFormatter(
             '[%(asctime)s] [%(name)s] [%(levelname)s]: %(message)s',
@@ -39,6 +189,19 @@ class LogManager(logging.Handler):
         self.target_logger_names = ["", "Core", "astrbot", "uvicorn", "aiocqhttp"]
         self._attach_target_loggers()
 
+    @staticmethod
+    def _open_archive(config):
+        """开启磁盘历史层，失败时退化为纯内存模式"""
+        directory = config.get("log_disk_dir", DEFAULT_ARCHIVE_DIR)
+        max_mb = max(8, int(config.get("log_disk_max_mb", 128)))
+        segment_bytes = 4 * 1024 * 1024
+        try:
+            return LogArchive(directory, segment_bytes=segment_bytes,
+                              max_segments=max_mb * 1024 * 1024 // segment_bytes)
+        except OSError:
+            logging.getLogger("astrbot").warning(f"无法开启磁盘日志历史: {directory}", exc_info=True)
+            return None
+
     def _attach_target_loggers(self):
         """主动挂载到关键 Logger"""
         for name in self.target_logger_names:
@@ -46,23 +209,391 @@ class LogManager(logging.Handler):
             if self not in logger.handlers:
                 logger.addHandler(self)
 
+    def _make_entry(self, record: logging.LogRecord) -> LogEntry:
+        """提取记录的原始字段；参数必须在此解析，否则可能引用到之后被修改的对象"""
+        if not self.lazy_format:
+            entry = LogEntry(record.created, record.levelno, record.name,
+                             None, text=self.format(record))
+            entry.plugin = self._attribute_plugin(record.pathname, record.exc_text, record.getMessage())
+            return entry
+
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            # traceback 对象会持有整条调用栈的帧，不能留在缓冲区里
+            exc_text = self.formatter.formatException(record.exc_info)
+        if record.stack_info:
+            stack = self.formatter.formatStack(record.stack_info)
+            exc_text = f"{exc_text}\n{stack}" if exc_text else stack
+        entry = LogEntry(record.created, record.levelno, record.name,
+                         record.getMessage(), exc_text)
+        entry.plugin = self._attribute_plugin(record.pathname, exc_text, entry.message)
+        return entry
+
+    def _attribute_plugin(self, pathname: str, exc_text: str = None, message: str = None):
+        """
+        根据产生日志的源文件或异常栈中的路径，判断日志属于哪个插件目录。
+        AstrBot 核心常用 logger.error(traceback.format_exc()) 把异常栈直接写进消息，这种消息也按异常栈处理。
+        """
+        if pathname and pathname.startswith(self._plugin_prefix):
+            return pathname[len(self._plugin_prefix):].split(os.sep, 1)[0]
+        for text in (exc_text, message if message and _TRACEBACK_HEAD in message else None):
+            if text:
+                found = self._plugin_path_re.findall(text)
+                if found:
+                    # 取最内层（最后出现）的插件帧
+                    return found[-1]
+        return None
+
+    def _index_add(self, entry: LogEntry):
+        """调用方需持有锁"""
+        self._level_index.setdefault(entry.levelno, deque()).append(entry)
+        self._name_index.setdefault(entry.name, deque()).append(entry)
+        if entry.plugin:
+            self._plugin_index.setdefault(entry.plugin, deque()).append(entry)
+
+    def _index_evict(self, entry: LogEntry):
+        """被淘汰的条目一定是各索引中最旧的一条，调用方需持有锁"""
+        for index, key in ((self._level_index, entry.levelno),
+                           (self._name_index, entry.name),
+                           (self._plugin_index, entry.plugin)):
+            bucket = index.get(key)
+            if bucket and bucket[0] is entry:
+                bucket.popleft()
+                if not bucket:
+                    del index[key]
+
+    def _render(self, entry: LogEntry) -> str:
+        """按当前 formatter 格式化一条缓冲日志，重复的异常折叠显示为一条"""
+        if entry.text is not None:
+            text = entry.text
+        else:
+            record = logging.makeLogRecord({
+                "name": entry.name,
+                "levelno": entry.levelno,
+                "levelname": logging.getLevelName(entry.levelno),
+                "msg": entry.message,
+                "created": entry.created,
+                "exc_text": entry.exc_text,
+            })
+            text = self.format(record)
+        if entry.count > 1:
+            first, sep, rest = text.partition("\n")
+            text = (
+                f"{first} (×{entry.count}, first {self._clock(entry.created)}, "
+                f"last {self._clock(entry.last_seen)}){sep}{rest}"
+            )
+        return text
+
+    @staticmethod
+    def _clock(ts: float) -> str:
+        return datetime.fromtimestamp(ts, tz=TZ_SHANGHAI).strftime("%H:%M:%S")
+
     def emit(self, record: logging.LogRecord):
         try:
             if record.name == "uvicorn.access":
                 return
 
-            msg = self.format(record)
-            with self._buffer_lock:
-                self.log_buffer.append(msg)
+            light = self._light
+            if light is not None:
+                exc_text = record.exc_text
+                if record.exc_info and not exc_text:
+                    # traceback 对象会持有整条调用栈的帧，异常记录只能当场格式化
+                    exc_text = self.formatter.formatException(record.exc_info)
+                light.append((record.created, record.levelno, record.name, record.pathname,
+                              record.getMessage(), exc_text))
+                return
+
+            fingerprint = fingerprint_record(record)
+            if fingerprint is not None:
+                repeated = self._count_repeat(fingerprint, record.created)
+                if repeated is not None:
+                    self._notify(repeated)
+                    return
+
+            entry = self._make_entry(record)
+            entry.fingerprint = fingerprint
+            self._append(entry)
+            self._notify(entry)
         except Exception:
             self.handleError(record)
 
+    def _append(self, entry: LogEntry):
+        with self._buffer_lock:
+            self._append_locked(entry)
+
+    def _append_locked(self, entry: LogEntry):
+        """分配序号并放入缓冲区和各索引，调用方需持有锁"""
+        self._seq += 1
+        entry.seq = entry.last_seq = self._seq
+        evicted = None
+        if len(self.log_buffer) == self.log_buffer.maxlen:
+            evicted = self.log_buffer[0]
+        self.log_buffer.append(entry)
+        self._index_add(entry)
+        if entry.fingerprint is not None:
+            self._fingerprints[entry.fingerprint] = entry
+        if evicted is not None:
+            self._index_evict(evicted)
+            if evicted.fingerprint is not None and self._fingerprints.get(evicted.fingerprint) is evicted:
+                del self._fingerprints[evicted.fingerprint]
+            if self.archive is not None:
+                self.archive.append(_to_row(evicted), evicted.last_seq)
+
+    @property
+    def light(self) -> bool:
+        return self._light is not None
+
+    def upgrade(self):
+        """从轻量模式切换到完整模式：开启磁盘历史层，并把环形缓冲区中的日志回放为完整条目"""
+        light = self._light
+        if light is None:
+            return
+        archive = None
+        if self._config and self._config.get("log_disk_history", False):
+            archive = self._open_archive(self._config)
+        # 回放期间持有锁：切换后走完整路径的新日志会等待回放完成，序号保持时间顺序
+        with self._buffer_lock:
+            if archive is not None:
+                self.archive = archive
+                self._seq = max(self._seq, archive.high_seq)
+            self._light = None
+            # 逐条弹出而不是复制后清空，切换瞬间仍在追加的记录也能被回放
+            while light:
+                created, levelno, name, pathname, message, exc_text = light.popleft()
+                if not self.lazy_format:
+                    record = logging.makeLogRecord({
+                        "name": name, "levelno": levelno, "levelname": logging.getLevelName(levelno),
+                        "msg": message, "created": created, "exc_text": exc_text,
+                    })
+                    entry = LogEntry(created, levelno, name, None, text=self.format(record))
+                else:
+                    entry = LogEntry(created, levelno, name, message, exc_text)
+                entry.plugin = self._attribute_plugin(pathname, exc_text, message)
+                self._append_locked(entry)
+
+    def add_listener(self, callback):
+        """订阅新日志，callback(entry) 会在产生日志的线程中被调用"""
+        # 整体替换列表而非原地修改，emit 遍历时无需加锁
+        self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback):
+        self._listeners = [cb for cb in self._listeners if cb is not callback]
+
+    def _notify(self, entry: LogEntry):
+        for callback in self._listeners:
+            try:
+                callback(entry)
+            except Exception:
+                pass
+
+    def _count_repeat(self, fingerprint: int, created: float):
+        """
+        同一异常仍在缓冲区中时只累加计数并返回该条目，连异常栈格式化也省去；否则返回 None。
+        重复也会消耗一个序号，使游标读取能感知到"又发生了一次"。
+        """
+        with self._buffer_lock:
+            existing = self._fingerprints.get(fingerprint)
+            if existing is None:
+                return None
+            self._seq += 1
+            existing.count += 1
+            existing.last_seen = created
+            existing.last_seq = self._seq
+            return existing
+
+    def _repeated_since(self, cursor: int, match=None) -> list:
+        """首条位于游标及之前、但之后又重复发生的异常条目。调用方需持有锁"""
+        return [e for e in self._fingerprints.values()
+                if e.seq <= cursor < e.last_seq and (match is None or match(e))]
+
+    @staticmethod
+    def _by_last_seen(entries: list, lines: int) -> list:
+        """重复的异常按最近一次发生的位置排列，超出 lines 时丢弃最早的部分"""
+        entries.sort(key=lambda e: e.last_seq)
+        return entries[-lines:] if len(entries) > lines else entries
+
+    @property
+    def cursor(self) -> int:
+        """当前最新一条日志的序号，可作为之后增量读取的起点"""
+        return self._seq
+
+    def _oldest_buffered(self) -> int:
+        """内存缓冲区中最旧一条的序号，更早的日志只可能在磁盘层。调用方需持有锁"""
+        return self.log_buffer[0].seq if self.log_buffer else self._seq + 1
+
+    def _tail(self, lines: int) -> list:
+        """
+        从尾部取出最多 lines 条日志，只遍历需要的部分，不复制整个缓冲区。
+        首条在窗口之前、但窗口内又重复发生的异常也会被带上，并排在最近一次发生的位置。
+        """
+        with self._buffer_lock:
+            tail = list(islice(reversed(self.log_buffer), lines))
+            oldest = self._oldest_buffered()
+            repeated = self._repeated_since(tail[-1].seq - 1) if len(tail) >= lines else []
+        if len(tail) < lines and self.archive is not None:
+            tail.extend(self.archive.scan(oldest, limit=lines - len(tail), decode=_from_row))
+        return self._by_last_seen(tail + repeated, lines)
+
+    def _tail_after(self, lines: int, after: int) -> tuple:
+        """
+        倒序取出序号大于 after 的最多 lines 条日志，调用方需持有锁。
+        返回 (日志列表, 是否因 lines 限制而停止)；重复的异常会消耗序号，序号不连续并不代表有日志被丢弃。
+        """
+        tail = []
+        for entry in reversed(self.log_buffer):
+            if entry.seq <= after:
+                return tail, False
+            if len(tail) >= lines:
+                return tail, True
+            tail.append(entry)
+        return tail, False
+
     def get_logs(self, lines: int = 50) -> str:
+        self._ensure_still_attached()
+        entries = self._tail(lines)
+        if not entries:
+            return "暂无日志记录 (Log buffer is empty)."
+        return "\n".join(self._render(entry) for entry in entries)
+
+    def read_since(self, cursor: int, lines: int = 50) -> tuple:
+        """
+        增量读取游标之后的新日志。
+        返回 (日志列表, 新游标, 是否有更早的新日志未返回)。未返回的部分包括超出 lines 限制的
+        以及已被淘汰出内存且没有磁盘层可回溯的日志。
+        游标之前已读过、之后又重复发生的异常也会带着最新计数，排在最近一次发生的位置。
+        游标大于当前序号说明日志管理器已被重置（例如未开启磁盘层时插件重载），此时按从头读取处理。
+        """
         self._ensure_still_attached()
         with self._buffer_lock:
-            if not self.log_buffer:
-                return "暂无日志记录 (Log buffer is empty)."
-            return "\n".join(list(self.log_buffer)[-lines:])
+            latest = self._seq
+            if cursor > latest:
+                cursor = 0
+            entries, truncated = self._tail_after(lines, cursor)
+            oldest = self._oldest_buffered()
+            repeated = self._repeated_since(cursor)
+        if not truncated and cursor < oldest - 1:
+            # 内存缓冲区已读完但还没到达游标：更早的部分只能从磁盘层回溯，没有磁盘层则已丢弃
+            if self.archive is not None:
+                entries.extend(self.archive.scan(oldest, after_seq=cursor,
+                                                 limit=lines - len(entries), decode=_from_row))
+                truncated = len(entries) >= lines
+            else:
+                truncated = True
+        return self._by_last_seen(entries + repeated, lines + len(repeated)), latest, truncated
+
+    def get_logs_since(self, cursor: int, lines: int = 50) -> tuple:
+        """read_since 的文本版本，返回 (文本, 新游标)"""
+        entries, latest, truncated = self.read_since(cursor, lines)
+        reset = cursor > latest
+        if not entries:
+            return "暂无新日志 (No new logs since cursor).", latest
+        text = "\n".join(self._render(entry) for entry in entries)
+        if truncated:
+            text = f"...(earlier lines since cursor omitted)...\n{text}"
+        if reset:
+            text = (f"...(cursor {cursor} is ahead of the log buffer, which was reset by a reload; "
+                    f"showing the latest lines instead)...\n{text}")
+        return text, latest
+
+    def _candidate_sources(self, min_level, logger_name, plugin):
+        """
+        根据过滤条件挑选最小的候选集合，避免扫描整个缓冲区。
+        返回若干按序号递增的 deque；没有可用索引时返回整个缓冲区。调用方需持有锁。
+        """
+        options = []
+        if plugin is not None:
+            bucket = self._plugin_index.get(plugin)
+            options.append([bucket] if bucket else [])
+        if logger_name is not None:
+            options.append([
+                bucket for name, bucket in self._name_index.items()
+                if name == logger_name or name.startswith(logger_name + ".")
+            ])
+        if min_level is not None:
+            options.append([
+                bucket for level, bucket in self._level_index.items() if level >= min_level
+            ])
+        if not options:
+            return [self.log_buffer]
+        return min(options, key=lambda buckets: sum(len(b) for b in buckets))
+
+    def query(self, lines: int = 50, min_level=None, logger_name: str = None, plugin: str = None,
+              start: float = None, end: float = None, pattern: str = None, since_cursor: int = 0) -> tuple:
+        """
+        按条件查询缓冲日志，返回 (按时间排序的日志列表, 当前游标)。
+        级别 / Logger / 插件过滤走二级索引；时间范围和游标利用序号有序性提前终止；
+        正则只作用于通过其它过滤的候选条目。
+        """
+        self._ensure_still_attached()
+        if min_level is not None:
+            min_level = parse_level(min_level)
+        regex = re.compile(pattern) if pattern else None
+
+        def stop(entry: LogEntry) -> bool:
+            return start is not None and entry.created < start
+
+        def match(entry: LogEntry) -> bool:
+            if end is not None and entry.created > end:
+                return False
+            if min_level is not None and entry.levelno < min_level:
+                return False
+            if plugin is not None and entry.plugin != plugin:
+                return False
+            if logger_name is not None and not (
+                    entry.name == logger_name or entry.name.startswith(logger_name + ".")):
+                return False
+            if regex is not None and not regex.search(entry.search_text()):
+                return False
+            return True
+
+        matches = []
+        stopped = False
+        with self._buffer_lock:
+            latest = self._seq
+            if since_cursor > latest:
+                # 日志管理器已重置，旧游标失效
+                since_cursor = 0
+            oldest = self._oldest_buffered()
+            sources = self._candidate_sources(min_level, logger_name, plugin)
+            if len(sources) == 1:
+                candidates = reversed(sources[0])
+            else:
+                candidates = heapq.merge(*(reversed(b) for b in sources), key=lambda e: -e.seq)
+
+            for entry in candidates:
+                if entry.seq <= since_cursor or stop(entry):
+                    stopped = True
+                    break
+                if match(entry):
+                    matches.append(entry)
+                    if len(matches) >= lines:
+                        break
+
+            # 首次出现在查询窗口之前、但窗口内又重复发生的异常，不能因为首条过早而漏掉。
+            # 窗口起点为游标，或结果已满 lines 条时最早一条的位置
+            floor = since_cursor
+            if len(matches) >= lines:
+                floor = max(floor, matches[-1].seq - 1)
+            repeated = [
+                e for e in self._fingerprints.values()
+                if e.count > 1 and floor < e.last_seq
+                and (start is None or e.last_seen >= start) and match(e)
+            ]
+
+        # 内存中不够时继续向磁盘层回溯（磁盘层没有二级索引，逐块解码过滤）
+        if (not stopped and len(matches) < lines and self.archive is not None
+                and since_cursor < oldest - 1):
+            matches.extend(self.archive.scan(oldest, after_seq=since_cursor, limit=lines - len(matches),
+                                             match=match, stop=stop, decode=_from_row))
+
+        if repeated:
+            seen = {id(e) for e in matches}
+            matches.extend(e for e in repeated if id(e) not in seen)
+        return self._by_last_seen(matches, lines), latest
+
+    def render(self, entries: list) -> str:
+        """把日志条目列表格式化为文本"""
+        return "\n".join(self._render(entry) for entry in entries)
 
     def _ensure_still_attached(self):
         """保活机制"""
@@ -81,4 +612,14 @@ class LogManager(logging.Handler):
             if self in logger.handlers:
                 logger.removeHandler(self)
 
+        if self.archive is not None:
+            # 先把仍在内存中的日志落盘，重载后的新实例才能接着读到完整历史
+            with self._buffer_lock:
+                for entry in self.log_buffer:
+                    self.archive.append(_to_row(entry), entry.last_seq)
+                self.log_buffer.clear()
+                self.archive.high_seq = max(self.archive.high_seq, self._seq)
+            self.archive.close()
+            self.archive = None
+
         self.close()
@@ -0,0 +1,196 @@
+import asyncio
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+# 卡顿时长直方图的桶上界（秒），最后一个桶收集更长的卡顿
+BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+HOST = "<host>"
+
+
+class Stall:
+    """一次事件循环卡顿"""
+    __slots__ = ("at", "duration", "plugin", "location", "samples")
+
+    def __init__(self, at: float, duration: float, plugin: str, location: str, samples: int):
+        self.at = at
+        self.duration = duration
+        self.plugin = plugin
+        self.location = location
+        self.samples = samples
+
+
+class _PluginStats:
+    __slots__ = ("count", "total", "max", "buckets", "locations")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.locations: Counter = Counter()
+
+    def add(self, stall: Stall):
+        self.count += 1
+        self.total += stall.duration
+        self.max = max(self.max, stall.duration)
+        self.buckets[bisect.bisect_left(BUCKETS, stall.duration)] += 1
+        if stall.location:
+            self.locations[stall.location] += 1
+
+
+class LoopMonitor:
+    """
+    事件循环卡顿监控。
+    心跳协程每隔 interval 秒醒来一次并计算实际延迟；看门狗线程在心跳超时期间
+    用 sys._current_frames() 反复采样事件循环线程的调用栈，
+    把卡顿归属到调用栈中最内层位于 plugin_base_dir 下的插件目录。
+    """
+
+    def __init__(self, plugin_base_dir: str, threshold: float = 0.25, interval: float = 0.1,
+                 history: int = 200):
+        self.threshold = threshold
+        self.interval = interval
+        self._prefix = os.path.abspath(plugin_base_dir) + os.sep
+        self._sample_interval = max(0.01, min(0.05, threshold / 4))
+
+        self._lock = threading.Lock()
+        self._stalls: deque = deque(maxlen=history)
+        self._stats: Dict[str, _PluginStats] = {}
+        self._samples: List[Tuple[str, str]] = []
+        self._max_lag = 0.0
+        self._started_at = None
+
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> bool:
+        """必须在事件循环线程中调用；当前没有运行中的事件循环时返回 False，稍后可再次调用"""
+        if self._task is not None:
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._started_at = time.time()
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ========== 心跳与采样 ==========
+
+    async def _heartbeat(self):
+        interval = self.interval
+        while True:
+            expected = time.monotonic() + interval
+            self._beat = time.monotonic()
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = now - expected
+            with self._lock:
+                samples, self._samples = self._samples, []
+                self._max_lag = max(self._max_lag, lag)
+            if lag >= self.threshold:
+                self._record(lag, samples)
+
+    def _watchdog(self):
+        while not self._stop.wait(self._sample_interval):
+            if time.monotonic() - self._beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            sample = self._attribute(frame)
+            del frame
+            with self._lock:
+                self._samples.append(sample)
+
+    def _attribute(self, frame) -> Tuple[str, str]:
+        """从最内层帧向外找第一个位于插件目录下的帧，返回 (插件目录, 位置)"""
+        innermost = None
+        while frame is not None:
+            code = frame.f_code
+            location = f"{code.co_filename}:{frame.f_lineno} in {code.co_name}"
+            if innermost is None:
+                innermost = location
+            if code.co_filename.startswith(self._prefix):
+                rel = code.co_filename[len(self._prefix):]
+                plugin = rel.split(os.sep, 1)[0]
+                return plugin, f"{rel}:{frame.f_lineno} in {code.co_name}"
+            frame = frame.f_back
+        return HOST, innermost or ""
+
+    def _record(self, lag: float, samples: List[Tuple[str, str]]):
+        if samples:
+            plugin, location = Counter(samples).most_common(1)[0][0]
+        else:
+            # 卡顿过短，看门狗来不及采样
+            plugin, location = HOST, ""
+        stall = Stall(time.time(), lag, plugin, location, len(samples))
+        with self._lock:
+            self._stalls.append(stall)
+            self._stats.setdefault(plugin, _PluginStats()).add(stall)
+
+    # ========== 查询 ==========
+
+    def reset(self):
+        with self._lock:
+            self._stalls.clear()
+            self._stats.clear()
+            self._max_lag = 0.0
+            self._started_at = time.time()
+
+    def report(self, plugin: Optional[str] = None, recent: int = 10) -> str:
+        with self._lock:
+            stats = {k: v for k, v in self._stats.items() if plugin is None or k == plugin}
+            stalls = [s for s in self._stalls if plugin is None or s.plugin == plugin][-recent:]
+            max_lag = self._max_lag
+            started_at = self._started_at
+
+        since = time.strftime("%H:%M:%S", time.localtime(started_at)) if started_at else "-"
+        lines = [
+            f"[Loop Monitor] {'running' if self.running else 'stopped'}, threshold {self.threshold * 1000:.0f}ms, "
+            f"since {since}, max lag {max_lag * 1000:.0f}ms"
+        ]
+        if not stats:
+            lines.append("No stalls recorded.")
+            return "\n".join(lines)
+
+        labels = [f"<{b:g}s" for b in BUCKETS] + [f">={BUCKETS[-1]:g}s"]
+        lines.append("Stalls by plugin (count / total / max | histogram):")
+        for name, st in sorted(stats.items(), key=lambda kv: kv[1].total, reverse=True):
+            histogram = " ".join(f"{label}:{n}" for label, n in zip(labels, st.buckets) if n)
+            lines.append(f"- {name}: {st.count} / {st.total:.2f}s / {st.max:.2f}s | {histogram}")
+            for location, n in st.locations.most_common(3):
+                lines.append(f"    {n}x at {location}")
+        lines.append("Recent stalls:")
+        for s in reversed(stalls):
+            at = time.strftime("%H:%M:%S", time.localtime(s.at))
+            where = s.location or "not sampled (too short)"
+            lines.append(f"- [{at}] {s.duration * 1000:.0f}ms in {s.plugin}: {where}")
+        return "\n".join(lines)
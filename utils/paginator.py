@@ -0,0 +1,152 @@
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# 适合作为分页点的行：顶层定义、装饰器，以及空行
+_SEMANTIC_BREAK_RE = re.compile(r"^(?:(?:async\s+)?def |class |@)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数：ASCII 约 4 个字符一个 token，中日韩等宽字符约一个字符一个 token。
+    利用 UTF-8 编码长度推算非 ASCII 字符数，避免逐字符遍历。
+    """
+    n = len(text)
+    wide = (len(text.encode("utf-8", "surrogatepass")) - n) // 2
+    return (max(0, n - wide) + 3) // 4 + wide
+
+
+class _Paged:
+    __slots__ = ("text", "spans", "label", "from_end")
+
+    def __init__(self, text: str, spans: List[Tuple[int, int]], label: str, from_end: bool):
+        self.text = text
+        # 每页在原文中的 (起始字符, 结束字符)，按页码顺序排列
+        self.spans = spans
+        self.label = label
+        self.from_end = from_end
+
+    def line_range(self, start: int, end: int) -> Tuple[int, int]:
+        """页面覆盖的行号（从 1 开始）"""
+        return self.text.count("\n", 0, start) + 1, self.text.count("\n", 0, max(start, end - 1)) + 1
+
+
+def _split_lines(text: str) -> List[str]:
+    return text.splitlines(keepends=True)
+
+
+def _page_spans(text: str, budget: int) -> List[Tuple[int, int]]:
+    """按行切分，每页估算 token 不超过 budget；页尾最后 1/4 范围内若有空行或顶层定义则在那里断开"""
+    spans = []
+    lines = _split_lines(text)
+    start = pos = 0
+    used = 0
+    last_break = None  # (字符位置, 该位置之前已用的 token)
+    for line in lines:
+        cost = estimate_tokens(line)
+        if used + cost > budget and pos > start:
+            cut = pos
+            if last_break is not None and last_break[0] > start and last_break[1] >= budget * 3 // 4:
+                cut = last_break[0]
+            spans.append((start, cut))
+            start = cut
+            used = estimate_tokens(text[start:pos])
+            last_break = None
+        if cost > budget:
+            # 单行过长，按字符硬切
+            if pos > start:
+                spans.append((start, pos))
+            chunk = max(1, budget * 2)
+            for i in range(0, len(line), chunk):
+                spans.append((pos + i, pos + min(len(line), i + chunk)))
+            pos += len(line)
+            start = pos
+            used = 0
+            continue
+        if pos > start and (not line.strip() or _SEMANTIC_BREAK_RE.match(line)):
+            last_break = (pos, used)
+        used += cost
+        pos += len(line)
+    if pos > start or not spans:
+        spans.append((start, pos))
+    return spans
+
+
+def _page_spans_from_end(text: str, budget: int) -> List[Tuple[int, int]]:
+    """从末尾向前分页（日志：第一页是最新的内容）"""
+    spans = []
+    lines = _split_lines(text)
+    end = pos = len(text)
+    used = 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line)
+        if used + cost > budget and pos < end:
+            spans.append((pos, end))
+            end = pos
+            used = 0
+        if cost > budget:
+            # 单行过长，按字符从后向前硬切
+            if pos < end:
+                spans.append((pos, end))
+            chunk = max(1, budget * 2)
+            line_start = pos - len(line)
+            while pos > line_start:
+                spans.append((max(line_start, pos - chunk), pos))
+                pos -= chunk
+            pos = end = line_start
+            used = 0
+            continue
+        used += cost
+        pos -= len(line)
+    if pos < end or not spans:
+        spans.append((pos, end))
+    return spans
+
+
+class Paginator:
+    """把超长的工具输出按 token 预算分页，剩余页面保存在一个小型 LRU 中，通过游标取回"""
+
+    def __init__(self, budget_tokens: int = 3000, max_entries: int = 32):
+        self.budget = max(200, budget_tokens)
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, _Paged]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def paginate(self, text: str, label: str = "output", from_end: bool = False) -> str:
+        """输出不超过预算时原样返回，否则返回第一页并附上下一页的游标"""
+        if estimate_tokens(text) <= self.budget:
+            return text
+        spans = _page_spans_from_end(text, self.budget) if from_end else _page_spans(text, self.budget)
+        if len(spans) <= 1:
+            return text
+        key = secrets.token_hex(4)
+        with self._lock:
+            self._entries[key] = _Paged(text, spans, label, from_end)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._render(key, self._entries[key], 0)
+
+    def page(self, cursor: str) -> Optional[str]:
+        """按游标取页；游标已过期或无效时返回 None"""
+        key, _, index = (cursor or "").strip().partition(":")
+        with self._lock:
+            paged = self._entries.get(key)
+            if paged is not None:
+                self._entries.move_to_end(key)
+        if paged is None or not index.isdigit() or not 0 <= int(index) < len(paged.spans):
+            return None
+        return self._render(key, paged, int(index))
+
+    def _render(self, key: str, paged: _Paged, index: int) -> str:
+        start, end = paged.spans[index]
+        body = paged.text[start:end]
+        first, last = paged.line_range(start, end)
+        total_lines = paged.text.count("\n") + (0 if paged.text.endswith("\n") else 1)
+        footer = f"[{paged.label}: page {index + 1}/{len(paged.spans)}, lines {first}-{last} of {total_lines}"
+        if index + 1 < len(paged.spans):
+            direction = "older" if paged.from_end else "next"
+            footer += f"; {direction} page: call 'dev_more_output' with cursor='{key}:{index + 1}'"
+        footer += "]"
+        return body.rstrip("\n") + "\n" + footer
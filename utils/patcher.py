@@ -0,0 +1,241 @@
+import difflib
+import re
+from typing import List, Optional, Tuple
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(Exception):
+    """补丁无法干净地应用，message 中包含所有冲突的说明"""
+
+
+def _split(text: str) -> Tuple[List[str], bool]:
+    """按行拆分，同时记录原文件末尾是否有换行"""
+    return text.split("\n")[:-1] if text.endswith("\n") else text.split("\n"), text.endswith("\n")
+
+
+def _join(lines: List[str], trailing_newline: bool) -> str:
+    text = "\n".join(lines)
+    return text + "\n" if trailing_newline and lines else text
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _find_block(lines: List[str], block: List[str], normalize) -> List[int]:
+    """返回 block 在 lines 中所有（按 normalize 比较后）匹配的起始行号"""
+    if not block:
+        return []
+    target = [normalize(b) for b in block]
+    first = target[0]
+    hits = []
+    for i in range(len(lines) - len(block) + 1):
+        if normalize(lines[i]) == first and all(
+                normalize(lines[i + k]) == target[k] for k in range(1, len(block))):
+            hits.append(i)
+    return hits
+
+
+def _closest(lines: List[str], block: List[str]) -> Optional[Tuple[int, float]]:
+    """找出与 block 最相似的同长度窗口，用于冲突提示"""
+    if not block or not lines:
+        return None
+    size = len(block)
+    target = "\n".join(b.strip() for b in block)
+    best = None
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    for i in range(max(1, len(lines) - size + 1)):
+        matcher.set_seq1("\n".join(l.strip() for l in lines[i:i + size]))
+        if matcher.real_quick_ratio() < (best[1] if best else 0):
+            continue
+        ratio = matcher.ratio()
+        if best is None or ratio > best[1]:
+            best = (i, ratio)
+    return best
+
+
+def _reindent(block: List[str], old_indent: str, new_indent: str) -> List[str]:
+    """按缩进差异调整替换文本，用于缩进不一致时的模糊匹配"""
+    if old_indent == new_indent:
+        return block
+    result = []
+    for line in block:
+        if not line.strip():
+            # 空行保持原样，避免留下行尾空白
+            result.append(line)
+        elif line.startswith(old_indent):
+            result.append(new_indent + line[len(old_indent):])
+        else:
+            result.append(new_indent + line.lstrip())
+    return result
+
+
+def _locate(lines: List[str], block: List[str], expected: int = None) -> Tuple[Optional[int], str]:
+    """
+    依次尝试精确匹配、忽略行尾空白、忽略缩进三种方式定位 block。
+    有多处匹配时取离 expected 最近的一处（未给出 expected 时视为歧义）。
+    返回 (起始行号或 None, 匹配方式 / 失败原因)。
+    """
+    for mode, normalize in (("exact", lambda l: l),
+                            ("trailing-whitespace", str.rstrip),
+                            ("indentation", str.strip)):
+        hits = _find_block(lines, block, normalize)
+        if len(hits) == 1:
+            return hits[0], mode
+        if len(hits) > 1:
+            if expected is None:
+                return None, f"ambiguous: matches {len(hits)} places (lines {', '.join(str(h + 1) for h in hits[:5])})"
+            return min(hits, key=lambda h: abs(h - expected)), mode
+    return None, "not found"
+
+
+def _conflict(label: str, reason: str, lines: List[str], block: List[str]) -> str:
+    message = f"{label}: {reason}"
+    closest = _closest(lines, block)
+    if closest and closest[1] >= 0.5:
+        start, ratio = closest
+        preview = "\n".join(f"    {start + k + 1:>5} | {l}" for k, l in enumerate(lines[start:start + len(block)]))
+        message += f"\n  closest match ({ratio:.0%} similar) at line {start + 1}:\n{preview}"
+    return message
+
+
+def apply_search_replace(text: str, edits: List[dict]) -> Tuple[str, List[str]]:
+    """
+    按顺序应用一组 {search, replace, replace_all} 修改。
+    任一处冲突都会抛出 PatchError 并列出所有冲突，不做部分修改。
+    返回 (新文本, 每处修改的说明)。
+    """
+    lines, trailing = _split(text)
+    notes, conflicts = [], []
+
+    for n, edit in enumerate(edits, 1):
+        search = edit.get("search") or ""
+        replace = edit.get("replace") or ""
+        label = f"edit #{n}"
+        if not search:
+            conflicts.append(f"{label}: empty 'search' text")
+            continue
+        block = search.split("\n")
+        if block and block[-1] == "":
+            block.pop()
+        # 空的 replace 表示删除整块，而不是替换成一个空行
+        new_block = replace.split("\n") if replace else []
+        if new_block and new_block[-1] == "" and replace.endswith("\n"):
+            new_block.pop()
+
+        if edit.get("replace_all"):
+            current = _join(lines, trailing)
+            occurrences = current.count(search)
+            if not occurrences:
+                conflicts.append(_conflict(label, "not found", lines, block))
+                continue
+            lines, trailing = _split(current.replace(search, replace))
+            notes.append(f"{label}: replaced {occurrences} occurrence(s)")
+            continue
+
+        # 先按原样做子串匹配，允许只截取行内的一部分
+        current = _join(lines, trailing)
+        occurrences = current.count(search)
+        if occurrences == 1:
+            pos = current.index(search)
+            lines, trailing = _split(current[:pos] + replace + current[pos + len(search):])
+            notes.append(f"{label}: line {current.count(chr(10), 0, pos) + 1}")
+            continue
+        if occurrences > 1:
+            conflicts.append(f"{label}: ambiguous: matches {occurrences} places; "
+                             f"include more surrounding lines or set 'replace_all'")
+            continue
+
+        start, mode = _locate(lines, block)
+        if start is None:
+            conflicts.append(_conflict(label, mode, lines, block))
+            continue
+        if mode == "indentation":
+            new_block = _reindent(new_block, _indent(block[0]), _indent(lines[start]))
+        lines[start:start + len(block)] = new_block
+        fuzzy = "" if mode == "exact" else f" (fuzzy: {mode})"
+        notes.append(f"{label}: line {start + 1}, -{len(block)}/+{len(new_block)}{fuzzy}")
+
+    if conflicts:
+        raise PatchError("\n".join(conflicts))
+    return _join(lines, trailing), notes
+
+
+def _parse_unified_diff(diff: str) -> List[dict]:
+    """解析 hunk，依据头部声明的行数判断 hunk 结束，因此能正确处理以 '---' 开头的删除行"""
+    hunks = []
+    current = None
+    old_left = new_left = 0
+    for raw in diff.splitlines():
+        if current is None or (old_left <= 0 and new_left <= 0):
+            match = _HUNK_RE.match(raw)
+            if match:
+                current = {"old_start": int(match.group(1)), "old": [], "new": []}
+                old_left = int(match.group(2)) if match.group(2) is not None else 1
+                new_left = int(match.group(4)) if match.group(4) is not None else 1
+                hunks.append(current)
+            else:
+                current = None
+            continue
+        if raw.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        tag, body = (raw[:1], raw[1:]) if raw else (" ", "")
+        if tag == " ":
+            current["old"].append(body)
+            current["new"].append(body)
+            old_left -= 1
+            new_left -= 1
+        elif tag == "-":
+            current["old"].append(body)
+            old_left -= 1
+        elif tag == "+":
+            current["new"].append(body)
+            new_left -= 1
+    return hunks
+
+
+def apply_unified_diff(text: str, diff: str) -> Tuple[str, List[str]]:
+    """
+    应用 unified diff。每个 hunk 优先在声明的行号附近定位，
+    行号漂移或缩进不一致时退化为模糊匹配；任一 hunk 冲突都会抛出 PatchError。
+    """
+    hunks = _parse_unified_diff(diff)
+    if not hunks:
+        raise PatchError("no hunks found in diff")
+
+    lines, trailing = _split(text)
+    notes, conflicts = [], []
+    offset = 0
+
+    for n, hunk in enumerate(hunks, 1):
+        label = f"hunk #{n} (@@ -{hunk['old_start']})"
+        old, new = hunk["old"], hunk["new"]
+        # 纯新增的 hunk 头部 "-N,0" 表示插入在第 N 行之后，其余 hunk 从第 N 行开始
+        base = hunk["old_start"] - 1 if old else hunk["old_start"]
+        expected = max(0, base + offset)
+        if not old:
+            # 纯新增的 hunk（例如向空文件追加）
+            start, mode = min(expected, len(lines)), "exact"
+        else:
+            start, mode = _locate(lines, old, expected)
+        if start is None:
+            conflicts.append(_conflict(label, mode, lines, old))
+            continue
+        if mode == "indentation" and old:
+            new = _reindent(new, _indent(old[0]), _indent(lines[start]))
+        lines[start:start + len(old)] = new
+        drift = start - expected if old else 0
+        offset = start - base + len(new) - len(old)
+        extra = []
+        if mode != "exact":
+            extra.append(f"fuzzy: {mode}")
+        if drift:
+            extra.append(f"offset {drift:+d} lines")
+        notes.append(f"{label}: applied at line {start + 1}" + (f" ({', '.join(extra)})" if extra else ""))
+
+    if conflicts:
+        raise PatchError("\n".join(conflicts))
+    return _join(lines, trailing), notes
@@ -0,0 +1,164 @@
+import asyncio
+import re
+import time
+import logging
+from typing import List, Optional
+
+from .log_manager import LogManager, LogEntry
+
+# AstrBot 热重载过程中宿主打印的关键日志
+FILE_CHANGED_RE = re.compile(r"检测到文件变化|文件变化|File changed", re.IGNORECASE)
+LOADING_RE = re.compile(r"正在载入|正在重载|正在加载|Loading plugin|Reloading", re.IGNORECASE)
+FAILED_RE = re.compile(r"载入失败|加载失败|重载失败|failed to (?:re)?load|Traceback \(most recent call last\)",
+                       re.IGNORECASE)
+
+STATUS_SUCCESS = "SUCCESS"
+STATUS_FAILED = "FAILED"
+STATUS_NOT_LOADED = "NOT_LOADED"
+STATUS_TIMEOUT = "TIMEOUT"
+
+
+class ReloadResult:
+    """一次重载等待的结构化结果"""
+
+    def __init__(self, status: str, plugin: str, elapsed: float, entries: List[LogEntry], detail: str = ""):
+        self.status = status
+        self.plugin = plugin
+        self.elapsed = elapsed
+        self.entries = entries
+        self.detail = detail
+
+    def format(self, log_manager: LogManager, cursor: Optional[int] = None) -> str:
+        lines = [f"[Reload Result] {self.status} for '{self.plugin}' after {self.elapsed:.1f}s."]
+        if self.detail:
+            lines.append(self.detail)
+        if self.entries:
+            lines.append("Relevant logs:")
+            lines.append(log_manager.render(self.entries))
+        if cursor is not None:
+            lines.append(f"[Cursor] {cursor}")
+        return "\n".join(lines)
+
+
+class ReloadWatcher:
+    """
+    订阅 LogManager 的新日志，判断指定插件目录的热重载结果。
+    必须在写文件之前创建，避免重载日志在订阅前就已经打印完毕。
+    """
+
+    def __init__(self, log_manager: LogManager, plugin_dir: str,
+                 settle: float = 1.5, no_reload_grace: float = 3.0):
+        self.log_manager = log_manager
+        self.plugin_dir = plugin_dir
+        self.settle = settle
+        self.no_reload_grace = no_reload_grace
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._seen = set()
+        log_manager.add_listener(self._on_entry)
+
+    def _relevant(self, entry: LogEntry) -> bool:
+        if entry.plugin == self.plugin_dir or entry.levelno >= logging.ERROR:
+            return True
+        return self.plugin_dir in entry.search_text()
+
+    def _on_entry(self, entry: LogEntry):
+        """在产生日志的线程中调用，只做筛选并把条目转交给事件循环"""
+        if not self._relevant(entry):
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, entry)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    def replay(self, entries: List[LogEntry]):
+        """补充订阅之前已经产生的日志（例如从某个游标开始等待）"""
+        for entry in entries:
+            if self._relevant(entry):
+                self._queue.put_nowait(entry)
+
+    def close(self):
+        self.log_manager.remove_listener(self._on_entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def _next(self, timeout: float) -> Optional[LogEntry]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return None
+
+    async def wait(self, timeout: float = 20.0) -> ReloadResult:
+        """
+        等待重载结果：
+        文件变化 → 正在载入/重载 → 静默 settle 秒无报错 = SUCCESS；
+        载入后出现错误 = FAILED（继续收集随后的错误行）；
+        检测到文件变化但 no_reload_grace 秒内没有载入 = NOT_LOADED；
+        超时 = TIMEOUT。
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        entries: List[LogEntry] = []
+        changed_at = loading_at = failed_at = None
+
+        while True:
+            now = time.monotonic()
+            if failed_at is not None:
+                wait_for = min(deadline, failed_at + 0.5) - now
+            elif loading_at is not None:
+                wait_for = min(deadline, loading_at + self.settle) - now
+            elif changed_at is not None:
+                wait_for = min(deadline, changed_at + self.no_reload_grace) - now
+            else:
+                wait_for = deadline - now
+
+            entry = await self._next(wait_for) if wait_for > 0 else None
+            now = time.monotonic()
+            elapsed = now - start
+
+            if entry is None:
+                if failed_at is not None:
+                    return ReloadResult(STATUS_FAILED, self.plugin_dir, elapsed, entries,
+                                        "The plugin failed to load. Fix the error shown below.")
+                if loading_at is not None and now >= loading_at + self.settle:
+                    return ReloadResult(STATUS_SUCCESS, self.plugin_dir, elapsed, entries,
+                                        "The plugin was reloaded without errors. Ask the user to test it.")
+                if changed_at is not None and loading_at is None and now >= changed_at + self.no_reload_grace:
+                    return ReloadResult(STATUS_NOT_LOADED, self.plugin_dir, elapsed, entries,
+                                        "File change detected but the plugin was not (re)loaded. "
+                                        "It is probably not installed: call 'dev_load_plugin'.")
+                if now >= deadline:
+                    return ReloadResult(STATUS_TIMEOUT, self.plugin_dir, elapsed, entries,
+                                        "No conclusive reload logs before the timeout. "
+                                        "Check 'dev_check_logs' or call 'dev_load_plugin' if the plugin is new.")
+                continue
+
+            # 重复的异常会以同一条目再次送达，用 last_seq 区分每次发生
+            if entry.last_seq in self._seen:
+                continue
+            self._seen.add(entry.last_seq)
+
+            text = entry.search_text()
+            mentions = entry.plugin == self.plugin_dir or self.plugin_dir in text
+
+            if mentions and LOADING_RE.search(text):
+                loading_at = now
+                entries.append(entry)
+            elif mentions and FILE_CHANGED_RE.search(text):
+                changed_at = changed_at or now
+                entries.append(entry)
+            elif failed_at is not None and entry.levelno >= logging.ERROR:
+                # 宿主会把 traceback 拆成多行 error 日志，持续收集
+                failed_at = now
+                entries.append(entry)
+            elif entry.levelno >= logging.ERROR and (loading_at or changed_at) and (
+                    mentions or (loading_at and FAILED_RE.search(text))):
+                failed_at = now
+                entries.append(entry)
+            elif mentions and entry.levelno >= logging.WARNING:
+                entries.append(entry)
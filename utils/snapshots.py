@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SNAPSHOT_DIR = "./data/plugin_data/astrbot_plugin_self_iterative_core/snapshots"
+
+
+class Snapshot:
+    """一次写入之前的状态：被写入的文件在写入前的内容哈希（None 表示当时文件不存在）"""
+    __slots__ = ("id", "created", "note", "files")
+
+    def __init__(self, id: int, created: float, note: str, files: Dict[str, Optional[str]]):
+        self.id = id
+        self.created = created
+        self.note = note
+        self.files = files
+
+    def to_line(self) -> str:
+        return json.dumps({"id": self.id, "t": round(self.created, 3), "note": self.note, "files": self.files},
+                          ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_line(cls, line: str) -> "Snapshot":
+        data = json.loads(line)
+        return cls(data["id"], data["t"], data.get("note", ""), data["files"])
+
+
+class SnapshotStore:
+    """
+    内容寻址的快照仓库。
+    objects/ 下按 sha256 存放 zlib 压缩的文件内容，相同内容在所有插件、所有版本间只存一份；
+    manifests/<插件>.jsonl 是只追加的快照日志，每条只记录本次写入涉及的文件，体积很小。
+    回滚到快照 #k 时，对 k 之后每条快照涉及的文件取其最早一次记录的“写入前”内容，即 #k 时刻的状态。
+    """
+
+    def __init__(self, directory: str = DEFAULT_SNAPSHOT_DIR, keep: int = 200):
+        self.directory = os.path.abspath(directory)
+        self.keep = max(1, keep)
+        self._objects = os.path.join(self.directory, "objects")
+        self._manifests = os.path.join(self.directory, "manifests")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._manifests, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache: Dict[str, List[Snapshot]] = {}
+
+    # ========== 对象 ==========
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._objects, digest[:2], digest[2:])
+
+    def put_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        with open(self._object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    # ========== 快照日志 ==========
+
+    def _manifest_path(self, plugin: str) -> str:
+        return os.path.join(self._manifests, f"{plugin}.jsonl")
+
+    def _load(self, plugin: str) -> List[Snapshot]:
+        """读取并缓存插件的快照日志。调用方需持有锁"""
+        snapshots = self._cache.get(plugin)
+        if snapshots is None:
+            snapshots = []
+            try:
+                with open(self._manifest_path(plugin), encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            try:
+                                snapshots.append(Snapshot.from_line(line))
+                            except (ValueError, KeyError):
+                                # 掉电时可能留下半行
+                                continue
+            except FileNotFoundError:
+                pass
+            self._cache[plugin] = snapshots
+        return snapshots
+
+    def record(self, plugin: str, files: Dict[str, Optional[bytes]], note: str = "") -> Optional[int]:
+        """保存一组文件在写入前的内容（None 表示文件尚不存在），返回快照编号；files 为空时返回 None"""
+        if not files:
+            return None
+        with self._lock:
+            # 在锁内写入对象，避免与压缩时的垃圾回收交错而被误删
+            hashes = {rel: (self.put_blob(data) if data is not None else None) for rel, data in files.items()}
+            snapshots = self._load(plugin)
+            snapshot = Snapshot((snapshots[-1].id + 1) if snapshots else 1, time.time(), note, hashes)
+            with open(self._manifest_path(plugin), "a", encoding="utf-8") as f:
+                f.write(snapshot.to_line() + "\n")
+            snapshots.append(snapshot)
+            if len(snapshots) > self.keep * 2:
+                self._compact(plugin, snapshots)
+        return snapshot.id
+
+    def _compact(self, plugin: str, snapshots: List[Snapshot]):
+        """只保留最近 keep 条快照，重写日志后清理不再被任何插件引用的对象。调用方需持有锁"""
+        del snapshots[:-self.keep]
+        path = self._manifest_path(plugin)
+        fd, tmp_path = tempfile.mkstemp(dir=self._manifests, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(s.to_line() + "\n" for s in snapshots)
+        os.replace(tmp_path, path)
+        self._collect_garbage()
+
+    def _collect_garbage(self):
+        referenced = set()
+        for name in os.listdir(self._manifests):
+            if name.endswith(".jsonl"):
+                for snapshot in self._load(name[:-len(".jsonl")]):
+                    referenced.update(h for h in snapshot.files.values() if h)
+        for prefix in os.listdir(self._objects):
+            folder = os.path.join(self._objects, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for rest in os.listdir(folder):
+                if prefix + rest not in referenced and not rest.endswith(".tmp"):
+                    try:
+                        os.unlink(os.path.join(folder, rest))
+                    except OSError:
+                        pass
+
+    def list(self, plugin: str, limit: int = 20) -> List[Snapshot]:
+        with self._lock:
+            return list(self._load(plugin)[-limit:])
+
+    def state_at(self, plugin: str, snapshot_id: int) -> Dict[str, Optional[str]]:
+        """
+        计算回滚到快照 #snapshot_id（该次写入之前）需要的文件状态: {相对路径: 内容哈希或 None(应删除)}。
+        快照不存在时抛出 KeyError。
+        """
+        with self._lock:
+            snapshots = list(self._load(plugin))
+        index = next((i for i, s in enumerate(snapshots) if s.id == snapshot_id), None)
+        if index is None:
+            raise KeyError(snapshot_id)
+        state: Dict[str, Optional[str]] = {}
+        for snapshot in snapshots[index:]:
+            for rel, digest in snapshot.files.items():
+                state.setdefault(rel, digest)
+        return state
+
+    def materialize(self, state: Dict[str, Optional[str]]) -> Tuple[Dict[str, bytes], List[str]]:
+        """把 state_at 的结果展开为 ({相对路径: 内容}, [需要删除的相对路径])"""
+        writes, deletes = {}, []
+        for rel, digest in state.items():
+            if digest is None:
+                deletes.append(rel)
+            else:
+                writes[rel] = self.get_blob(digest)
+        return writes, deletes
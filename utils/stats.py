@@ -0,0 +1,209 @@
+import contextvars
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# 所有计数都只在事件循环线程中更新，因此不需要加锁
+ENABLED = True
+
+_SUB_BITS = 4  # 每个 2 的幂区间再线性细分为 16 个桶，相对误差约 6%
+# 尾数取最高 _SUB_BITS + 1 位（首位恒为 1），低于 2 ** _MANTISSA_BITS 微秒的值精确记录
+_MANTISSA_BITS = _SUB_BITS + 1
+
+
+class Histogram:
+    """HDR 风格的对数-线性直方图，以微秒为单位记录，内存占用与取值范围的对数成正比"""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    @staticmethod
+    def _key(us: int) -> int:
+        if us < (1 << _MANTISSA_BITS):
+            return us
+        shift = us.bit_length() - _MANTISSA_BITS
+        return (shift << _MANTISSA_BITS) | (us >> shift)
+
+    @staticmethod
+    def _upper(key: int) -> int:
+        """桶的上界（微秒）"""
+        shift, mantissa = key >> _MANTISSA_BITS, key & ((1 << _MANTISSA_BITS) - 1)
+        if shift == 0:
+            return mantissa
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        key = self._key(int(seconds * 1_000_000))
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return min(self._upper(key) / 1_000_000, self.max)
+        return self.max
+
+
+class ToolStats:
+    __slots__ = ("calls", "errors", "output_chars", "latency", "phases")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.output_chars = 0
+        self.latency = Histogram()
+        self.phases: Dict[str, Histogram] = {}
+
+
+_tools: Dict[str, ToolStats] = {}
+_started_at = time.time()
+_current: contextvars.ContextVar[Optional[ToolStats]] = contextvars.ContextVar("tool_stats", default=None)
+
+
+def _record_phase(name: str, seconds: float):
+    stats = _current.get()
+    if stats is None:
+        stats = _tools.setdefault("<outside tools>", ToolStats())
+    histogram = stats.phases.get(name)
+    if histogram is None:
+        histogram = stats.phases[name] = Histogram()
+    histogram.record(seconds)
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+@contextmanager
+def _timed_phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_phase(name, time.perf_counter() - start)
+
+
+def phase(name: str):
+    """用 with 语句给当前工具调用中的一段代码计时，未启用统计时几乎零开销"""
+    return _timed_phase(name) if ENABLED else _NULL_PHASE
+
+
+def phased(name: str):
+    """装饰同步或异步函数，把整个函数的耗时计入当前工具调用的某个阶段"""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _record_phase(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_phase(name, time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+
+def instrumented(call):
+    """装饰 FunctionTool.call，记录调用次数、异常次数、输出长度和耗时"""
+
+    @functools.wraps(call)
+    async def wrapper(self, *args, **kwargs):
+        if not ENABLED:
+            return await call(self, *args, **kwargs)
+        stats = _tools.get(self.name)
+        if stats is None:
+            stats = _tools[self.name] = ToolStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            result = await call(self, *args, **kwargs)
+        except BaseException:
+            stats.errors += 1
+            raise
+        finally:
+            stats.calls += 1
+            stats.latency.record(time.perf_counter() - start)
+            _current.reset(token)
+        if isinstance(result, str):
+            stats.output_chars += len(result)
+        return result
+
+    return wrapper
+
+
+def set_enabled(enabled: bool):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def reset():
+    global _started_at
+    _tools.clear()
+    _started_at = time.time()
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+
+def report(tool: Optional[str] = None) -> str:
+    since = time.strftime("%m-%d %H:%M:%S", time.localtime(_started_at))
+    if not ENABLED:
+        return "[Tool Stats] disabled (stats_enabled)."
+    items = [(name, st) for name, st in _tools.items() if tool is None or name == tool]
+    if not items:
+        return f"[Tool Stats] since {since}: no tool calls recorded."
+
+    lines = [f"[Tool Stats] since {since} (calls / errors | p50 p95 p99 max | avg output chars)"]
+    for name, st in sorted(items, key=lambda kv: kv[1].latency.total, reverse=True):
+        h = st.latency
+        if h.count:
+            lines.append(
+                f"- {name}: {st.calls} / {st.errors} | {_ms(h.percentile(0.5))} {_ms(h.percentile(0.95))} "
+                f"{_ms(h.percentile(0.99))} {_ms(h.max)} | {st.output_chars // max(1, st.calls)}"
+            )
+        else:
+            lines.append(f"- {name}")
+        for phase_name, ph in sorted(st.phases.items(), key=lambda kv: kv[1].total, reverse=True):
+            share = f", {ph.total / h.total:.0%} of tool time" if h.total else ""
+            lines.append(
+                f"    {phase_name}: {ph.count}x, p50 {_ms(ph.percentile(0.5))}, p95 {_ms(ph.percentile(0.95))}, "
+                f"max {_ms(ph.max)}, total {_ms(ph.total)}{share}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from astrbot.api.event import MessageChain
+
+
+class _Session:
+    __slots__ = ("ctx", "umo", "pending", "first_tip", "last_tip", "last_sent", "task")
+
+    def __init__(self, ctx, umo: str):
+        self.ctx = ctx
+        self.umo = umo
+        self.pending: List[str] = []
+        self.first_tip = 0.0
+        self.last_tip = 0.0
+        self.last_sent = float("-inf")
+        self.task: Optional[asyncio.Task] = None
+
+
+class TipDispatcher:
+    """
+    步骤提示的后台发送器。
+    submit 只把提示放进对应会话的队列并立即返回，工具的耗时不再受平台发送延迟影响。
+    每个会话有一个后台任务：在 window 秒内没有新提示（或距第一条提示超过 max_delay 秒）时
+    把积攒的提示合并成一条消息发出，同一会话两次发送之间至少间隔 min_interval 秒。
+    """
+
+    MAX_LINES = 8
+
+    def __init__(self, window: float = 0.8, min_interval: float = 3.0, max_delay: float = 5.0):
+        self.window = window
+        self.min_interval = min_interval
+        self.max_delay = max(max_delay, window)
+        self._sessions: Dict[str, _Session] = {}
+
+    def submit(self, ctx, umo: str, message: str):
+        now = time.monotonic()
+        session = self._sessions.get(umo)
+        if session is None:
+            self._prune(now)
+            session = self._sessions[umo] = _Session(ctx, umo)
+        session.ctx = ctx
+        if not session.pending:
+            session.first_tip = now
+        session.last_tip = now
+        session.pending.append(message)
+        if session.task is None:
+            session.task = asyncio.get_running_loop().create_task(self._run(session))
+
+    def _prune(self, now: float):
+        """清理长时间空闲的会话，避免会话表无限增长"""
+        if len(self._sessions) < 256:
+            return
+        for umo in [u for u, s in self._sessions.items()
+                    if s.task is None and now - s.last_sent > max(self.min_interval, 60)]:
+            del self._sessions[umo]
+
+    async def _run(self, session: _Session):
+        try:
+            while session.pending:
+                while True:
+                    now = time.monotonic()
+                    if now - session.first_tip >= self.max_delay:
+                        # 提示源源不断时也不能无限推迟
+                        debounce = 0.0
+                    else:
+                        debounce = min(session.last_tip + self.window, session.first_tip + self.max_delay) - now
+                    delay = max(debounce, session.last_sent + self.min_interval - now)
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                batch, session.pending = session.pending, []
+                session.last_sent = time.monotonic()
+                await self._send(session, batch)
+        finally:
+            session.task = None
+
+    def _merge(self, batch: List[str]) -> str:
+        lines = []
+        for message in batch:
+            if not lines or lines[-1] != message:
+                lines.append(message)
+        if len(lines) > self.MAX_LINES:
+            skipped = len(lines) - self.MAX_LINES
+            lines = lines[:self.MAX_LINES - 1] + [f"…（另有 {skipped} 条步骤）", lines[-1]]
+        return "\n".join(lines)
+
+    async def _send(self, session: _Session, batch: List[str]):
+        try:
+            chain = MessageChain().message(self._merge(batch))
+            await session.ctx.send_message(session.umo, chain)
+        except Exception:
+            pass
+
+    async def flush(self, timeout: float = 3.0):
+        """立即发出所有会话中积攒的提示（插件卸载时调用），不再等待合并窗口和限流"""
+        sends = []
+        for session in self._sessions.values():
+            if session.task is not None:
+                session.task.cancel()
+                session.task = None
+            if session.pending:
+                batch, session.pending = session.pending, []
+                sends.append(self._send(session, batch))
+        if sends:
+            try:
+                await asyncio.wait_for(asyncio.gather(*sends), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._sessions.clear()
@@ -1,38 +1,267 @@
 import os
+import re
+import time
 import asyncio
+import functools
+import logging
+# FunctionTool 本身就是 pydantic dataclass，AstrBot 核心启动时已经导入了 pydantic，
+# 工具类也必须在注册时以 FunctionTool 实例的形式提供，因此这两处无法延迟导入
 from pydantic import Field
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from pydantic.dataclasses import dataclass
 from astrbot.api.event import MessageChain
 from astrbot.core.agent.run_context import ContextWrapper
 from astrbot.core.agent.tool import FunctionTool
 from astrbot.core.astr_agent_context import AstrAgentContext
-from astrbot.core.star.star_manager import PluginManager
 
 
-from .file_manager import FileManager
-from .log_manager import LogManager
+from .log_manager import LogManager, parse_clock
+from .stats import instrumented, phase, phased
+from . import stats
 
-file_manager: Optional[FileManager] = None
+if TYPE_CHECKING:
+    # 以下组件只在初始化或首次使用开发工具时才导入，见 init_managers / _ensure_managers
+    from astrbot.core.star.star_manager import PluginManager
+    from .error_stream import ErrorStream
+    from .file_manager import FileManager
+    from .loop_monitor import LoopMonitor
+    from .paginator import Paginator
+    from .tip_dispatcher import TipDispatcher
+
+file_manager: Optional["FileManager"] = None
 log_manager: Optional[LogManager] = None
+loop_monitor: Optional["LoopMonitor"] = None
+tip_dispatcher: Optional["TipDispatcher"] = None
+paginator: Optional["Paginator"] = None
+error_stream: Optional["ErrorStream"] = None
 TOOL_CONFIG: dict = {}
+_managers_ready = False
+# 本插件的加载耗时（秒）：模块导入、Star 初始化、首次使用开发工具时的延迟初始化
+STARTUP_TIMES: dict = {"import": None, "init": None, "lazy": None}
 
 
 def init_managers(config: dict):
-    """根据传入的配置初始化管理器"""
-    global file_manager, log_manager, TOOL_CONFIG
+    """
+    根据传入的配置初始化管理器。
+    延迟初始化模式（lazy_init，默认开启）下只挂载轻量日志拦截、错误推送和卡顿监控，
+    文件管理、输出分页、提示发送等在首次调用开发工具时才创建，缩短 Bot 启动和本插件热重载的耗时。
+    """
+    global log_manager, loop_monitor, error_stream, TOOL_CONFIG, _managers_ready
+    # 已订阅的会话在开发工具被调用之前就需要收到告警，错误推送不能延迟创建
+    from .error_stream import ErrorStream
+
     TOOL_CONFIG = config if config else {}
+    stats.set_enabled(config.get("stats_enabled", True))
+    lazy = config.get("lazy_init", True)
 
-    base_path = config.get("plugin_base_dir", "./data/plugins")
-    file_manager = FileManager(base_path=base_path)
+    _close_file_manager()
+    _managers_ready = False
     if log_manager is not None:
         try:
             log_manager.shutdown()
         except Exception:
             pass
 
-    log_manager = LogManager(config=config)
+    log_manager = LogManager(config=config, light=lazy)
+
+    if error_stream is not None:
+        error_stream.stop()
+    error_stream = ErrorStream(
+        interval=max(1, int(config.get("error_stream_interval", 10))),
+        min_interval=max(0, int(config.get("error_stream_min_interval", 60))),
+    )
+    log_manager.add_listener(error_stream.on_log)
+    if error_stream.active:
+        # 已有会话订阅了告警，订阅回调只在完整模式下触发
+        log_manager.upgrade()
+
+    if loop_monitor is not None:
+        loop_monitor.stop()
+        loop_monitor = None
+    # 卡顿监控需要从启动起就观察事件循环（例如新生成的插件安装后），且只依赖标准库，不延迟
+    _start_loop_monitor(config)
+
+    if not lazy:
+        _ensure_managers()
+
+
+def _start_loop_monitor(config: dict):
+    """创建并启动卡顿监控，loop_monitor_enabled 关闭时不创建"""
+    global loop_monitor
+    if loop_monitor is not None or not config.get("loop_monitor_enabled", True):
+        return
+    from .loop_monitor import LoopMonitor
+
+    loop_monitor = LoopMonitor(
+        config.get("plugin_base_dir", "./data/plugins"),
+        threshold=max(10, int(config.get("loop_stall_threshold_ms", 250))) / 1000,
+    )
+    # 插件通常在事件循环中实例化；若此时没有运行中的循环，首次调用 dev_loop_stats 时再启动
+    loop_monitor.start()
+
+
+def _ensure_managers():
+    """创建文件管理等重量级组件，并把日志拦截切换到完整模式。重复调用时直接返回"""
+    global file_manager, tip_dispatcher, paginator, _managers_ready
+    if _managers_ready:
+        return
+    start = time.perf_counter()
+    from .file_manager import FileManager
+    from .paginator import Paginator
+    from .snapshots import DEFAULT_SNAPSHOT_DIR, SnapshotStore
+    from .tip_dispatcher import TipDispatcher
+
+    config = TOOL_CONFIG
+    paginator = Paginator(
+        budget_tokens=int(config.get("output_token_budget", 3000)),
+        max_entries=int(config.get("output_cursor_cache", 32)),
+    )
+    tip_dispatcher = TipDispatcher(
+        window=max(0, int(config.get("tip_merge_window_ms", 800))) / 1000,
+        min_interval=max(0.0, float(config.get("tip_min_interval", 3))),
+    )
+
+    base_path = config.get("plugin_base_dir", "./data/plugins")
+    cache_mb = max(1, int(config.get("file_cache_mb", 16)))
+    snapshots = None
+    if config.get("snapshot_enabled", True):
+        snapshot_dir = config.get("snapshot_dir") or DEFAULT_SNAPSHOT_DIR
+        try:
+            snapshots = SnapshotStore(snapshot_dir, keep=max(1, int(config.get("snapshot_keep", 200))))
+        except OSError:
+            logging.getLogger("astrbot").warning(f"无法开启文件快照: {snapshot_dir}", exc_info=True)
+    file_manager = FileManager(
+        base_path=base_path,
+        cache_bytes=cache_mb * 1024 * 1024,
+        ignore=config.get("list_ignore_patterns", []),
+        watch=config.get("dir_index_watch", False),
+        validate=config.get("validate_before_write", True),
+        lint_async=config.get("async_lint_on_write", True),
+        snapshots=snapshots,
+    )
+    if log_manager is not None:
+        log_manager.upgrade()
+    _managers_ready = True
+    STARTUP_TIMES["lazy"] = time.perf_counter() - start
+
+
+def _close_file_manager():
+    global file_manager
+    if file_manager is not None:
+        file_manager.close()
+        file_manager = None
+        # 只有用过文件管理才可能创建过校验进程池
+        from .validator import shutdown_pool
+        shutdown_pool()
+
+
+def _ready(call):
+    """
+    装饰 FunctionTool.call：首次调用任一开发工具时完成延迟初始化，耗时计入 init 阶段。
+    先做权限检查，无权限的调用不会触发初始化。
+    """
+
+    @functools.wraps(call)
+    async def wrapper(self, context, *args, **kwargs):
+        if not _managers_ready:
+            if not _check_permission(context):
+                return PERMISSION_DENIED_MSG
+            with phase("init"):
+                _ensure_managers()
+        return await call(self, context, *args, **kwargs)
+
+    return wrapper
+
+
+def record_startup(import_seconds: float, init_seconds: float):
+    STARTUP_TIMES["import"] = import_seconds
+    STARTUP_TIMES["init"] = init_seconds
+
+
+def startup_report() -> str:
+    """“自迭代测试”指令附带的加载耗时"""
+    def ms(value):
+        return f"{value * 1000:.1f}ms" if value is not None else "-"
+
+    lines = [f"加载耗时: 导入 {ms(STARTUP_TIMES['import'])}，初始化 {ms(STARTUP_TIMES['init'])}"]
+    if not TOOL_CONFIG.get("lazy_init", True):
+        lines.append("延迟初始化: 已关闭（启动时已完成全部初始化）")
+    elif STARTUP_TIMES["lazy"] is None:
+        lines.append("延迟初始化: 开发工具尚未使用，日志拦截处于轻量模式")
+    else:
+        lines.append(f"延迟初始化: 首次使用开发工具时耗时 {ms(STARTUP_TIMES['lazy'])}")
+    return "\n".join(lines)
+
+
+def start_error_stream(context):
+    """绑定用于推送消息的 Context 并启动错误推送的后台任务"""
+    if error_stream is not None:
+        error_stream.start(context)
+
+
+def subscribe_error_stream(event, context) -> str:
+    """“自迭代订阅”指令：参数为插件目录名和可选的级别（WARNING / ERROR / CRITICAL）"""
+    if error_stream is None:
+        return "错误推送未初始化。"
+    args = event.message_str.split()
+    if args and args[0].lstrip("/") == "自迭代订阅":
+        args = args[1:]
+    min_level = logging.WARNING
+    plugins = set()
+    for arg in args:
+        if arg.upper() in ("WARNING", "ERROR", "CRITICAL"):
+            min_level = logging.getLevelName(arg.upper())
+        else:
+            plugins.add(arg)
+    error_stream.subscribe(event.unified_msg_origin, plugins, min_level)
+    if log_manager is not None:
+        log_manager.upgrade()
+    error_stream.start(context)
+    scope = "、".join(sorted(plugins)) if plugins else "所有插件"
+    return (
+        f"已订阅 {scope} 的 {logging.getLevelName(min_level)} 及以上日志，"
+        f"新的告警每 {error_stream.interval:.0f} 秒汇总一次推送到本会话"
+        f"（两次推送至少间隔 {error_stream.min_interval:.0f} 秒）。发送“自迭代退订”停止。"
+    )
+
+
+def unsubscribe_error_stream(event) -> str:
+    if error_stream is not None and error_stream.unsubscribe(event.unified_msg_origin):
+        return "已停止向本会话推送插件告警。"
+    return "本会话没有订阅插件告警。"
+
+
+async def flush_tips():
+    """插件卸载前调用，把尚未发出的步骤提示立即发出"""
+    if tip_dispatcher is not None:
+        await tip_dispatcher.flush()
 
+
+def shutdown_managers():
+    """插件卸载时调用，释放日志拦截及磁盘日志分段等资源"""
+    global log_manager, loop_monitor, error_stream
+    if error_stream is not None:
+        error_stream.stop()
+        if log_manager is not None:
+            log_manager.remove_listener(error_stream.on_log)
+        error_stream = None
+    if loop_monitor is not None:
+        loop_monitor.stop()
+        loop_monitor = None
+    _close_file_manager()
+    if log_manager is not None:
+        try:
+            log_manager.shutdown()
+        finally:
+            log_manager = None
+
+def _paged(text: str, label: str, from_end: bool = False) -> str:
+    """按 token 预算截取工具输出的第一页，剩余部分通过 dev_more_output 翻页"""
+    if paginator is None:
+        return text
+    return paginator.paginate(text, label, from_end=from_end)
+
+@phased("tip")
 async def _send_tip(context: ContextWrapper[AstrAgentContext], message: str):
     if not TOOL_CONFIG.get("verbose_steps", True):
         return
@@ -40,13 +269,17 @@ async def _send_tip(context: ContextWrapper[AstrAgentContext], message: str):
     try:
         ctx = context.context.context
         event = context.context.event
+        if tip_dispatcher is not None:
+            # 只入队，由后台任务合并、限流后发送，不等待平台发送完成
+            tip_dispatcher.submit(ctx, event.unified_msg_origin, message)
+            return
         chain = MessageChain().message(message)
         await ctx.send_message(event.unified_msg_origin, chain)
     except Exception:
         pass
 
-def _check_permission(context: ContextWrapper[AstrAgentContext]) -> bool:
-    """检查当前用户是否有权限使用开发者工具"""
+def is_whitelisted(event) -> bool:
+    """检查消息发送者是否在白名单中（未启用白名单时总是允许）"""
     if not TOOL_CONFIG.get("enable_whitelist", True):
         return True
 
@@ -55,15 +288,74 @@ def _check_permission(context: ContextWrapper[AstrAgentContext]) -> bool:
         return False
 
     try:
-        event = context.context.event
         user_id = str(event.get_sender_id())
         return user_id in [str(uid) for uid in whitelist]
     except Exception:
         return False
 
+@phased("permission")
+def _check_permission(context: ContextWrapper[AstrAgentContext]) -> bool:
+    """检查当前用户是否有权限使用开发者工具"""
+    if not TOOL_CONFIG.get("enable_whitelist", True):
+        return True
+    try:
+        event = context.context.event
+    except Exception:
+        return False
+    return is_whitelisted(event)
+
 PERMISSION_DENIED_MSG = "此用户没有最高权限无法对系统的核心功能进行修改！"
 
 
+def _watch_reload(plugin_name: str):
+    """创建 ReloadWatcher。reload_watcher 模块只在等待重载时才导入"""
+    from .reload_watcher import ReloadWatcher
+
+    return ReloadWatcher(log_manager, plugin_name)
+
+
+async def _write_and_verify(kwargs: dict, plugin_name: str, write, hint: str, rules: str = "") -> str:
+    """
+    执行一次写入类操作并衔接热重载校验。write 是返回 (是否写入, 结果说明) 的无参协程函数，未写入时原样返回说明。
+    wait_for_reload 时先订阅再写入并等待重载结果；否则附上带游标的 dev_check_logs 提示。
+    """
+    cursor = log_manager.cursor if log_manager else None
+    if kwargs.get("wait_for_reload") and log_manager:
+        # 先订阅再写入，避免重载日志在订阅之前就已打印
+        with _watch_reload(plugin_name) as watcher:
+            ok, result = await write()
+            if not ok:
+                return result
+            reload_result = await watcher.wait(_reload_timeout(kwargs))
+        return f"{result}\n{reload_result.format(log_manager, log_manager.cursor)}"
+
+    ok, result = await write()
+    if not ok:
+        return result
+    cursor_hint = f" with since_cursor={cursor}" if cursor is not None else ""
+    return (
+        f"{result}\n"
+        f"[System Hint] {hint} AstrBot is detecting changes.\n"
+        f"--> Please call 'dev_check_logs'{cursor_hint} NOW to verify the reload status{rules}."
+    )
+
+
+def _cursor_arg(kwargs: dict) -> tuple:
+    """解析 since_cursor 参数，返回 (游标或 None, 错误信息或 None)"""
+    value = kwargs.get("since_cursor")
+    if value is None or value == "":
+        return None, None
+    try:
+        return max(0, int(value)), None
+    except (TypeError, ValueError):
+        return None, f"Error: Invalid 'since_cursor' {value!r}; pass the integer shown after '[Cursor]'."
+
+
+def _reload_timeout(kwargs: dict) -> float:
+    timeout = kwargs.get("timeout") or TOOL_CONFIG.get("reload_wait_timeout", 20)
+    return max(1.0, min(float(timeout), 120.0))
+
+
 @dataclass
 class WriteFileTool(FunctionTool[AstrAgentContext]):
     name: str = "dev_write_file"
@@ -87,8 +379,14 @@ class WriteFileTool(FunctionTool[AstrAgentContext]):
         "   (D) NOT INSTALLED: If logs show 'File changed' BUT there is NO 'Loading/Reloading' message afterwards, "
         "       it means the plugin is not loaded. You MUST call 'dev_load_plugin' immediately to install it. "
         "4. FOR MODIFICATIONS: You MUST read the file first to preserve existing logic. "
-        "5. Writes are atomic; always write the FULL file content."
-        "6. MANDATORY VERIFICATION: After calling 'dev_write_file', you MUST immediately call 'dev_check_logs' to verify the execution result based on the 'LOG INTERPRETATION RULES' below."
+        "5. Writes are atomic; always write the FULL file content. For small fixes to an existing file, prefer 'dev_edit_file'. "
+        "6. MANDATORY VERIFICATION: After calling 'dev_write_file', you MUST immediately call 'dev_check_logs' to verify the execution result based on the 'LOG INTERPRETATION RULES' below. "
+        "   SHORTCUT: Pass 'wait_for_reload': true to block until the reload finishes; the result then already contains "
+        "   SUCCESS / FAILED (with traceback) / NOT_LOADED / TIMEOUT and you do NOT need to poll 'dev_check_logs'. "
+        "7. PRE-WRITE VALIDATION: '.py' files are checked before writing (syntax, undefined names, imports, "
+        "   Star subclass and @filter.command handler shape). If an 'error' is reported NOTHING is written: "
+        "   fix the reported lines and write again. 'warning' lines do not block the write. "
+        "   'blocking call' warnings mean the code stalls the whole bot: fix them as suggested before finishing."
     )
     parameters: dict = Field(
         default_factory=lambda: {
@@ -106,11 +404,17 @@ class WriteFileTool(FunctionTool[AstrAgentContext]):
                     "type": "string",
                     "description": "The FULL content of the file.",
                 },
+                "wait_for_reload": {
+                    "type": "boolean",
+                    "description": "Wait until AstrBot finishes hot-reloading the plugin and return the reload result.",
+                },
             },
             "required": ["plugin_name", "file_path", "content"],
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
@@ -125,12 +429,195 @@ class WriteFileTool(FunctionTool[AstrAgentContext]):
 
         await _send_tip(context, f"📝 正在编写文件: {plugin_name}/{file_path} ...")
 
-        result = await file_manager.write_file(plugin_name, file_path, content)
+        return await _write_and_verify(
+            kwargs, plugin_name,
+            lambda: file_manager.write_file(plugin_name, file_path, content),
+            "File updated.", " based on the 'LOG INTERPRETATION RULES' in the tool description",
+        )
 
-        return (
-            f"{result}\n"
-            f"[System Hint] File updated. AstrBot is detecting changes.\n"
-            f"--> Please call 'dev_check_logs' NOW to verify the reload status based on the 'LOG INTERPRETATION RULES' in the tool description."
+
+@dataclass
+class WriteFilesTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_write_files"
+    description: str = (
+        "Write several files of ONE plugin in a single transaction (e.g. main.py, metadata.yaml, "
+        "_conf_schema.json and helper modules of a new plugin). All files are staged first and then renamed "
+        "into place together, so AstrBot sees one consistent change and reloads ONCE instead of loading "
+        "half-written states. If any file cannot be staged, nothing is written. "
+        "Prefer this over multiple 'dev_write_file' calls whenever more than one file changes. "
+        "The same rules and verification steps as 'dev_write_file' apply."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin_name": {
+                    "type": "string",
+                    "description": "The name of the plugin directory (e.g., 'Auto_Fly').",
+                },
+                "files": {
+                    "type": "array",
+                    "description": "Files to write, each with its FULL content.",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "file_path": {"type": "string", "description": "Relative file path (e.g., 'main.py')."},
+                            "content": {"type": "string", "description": "The FULL content of the file."},
+                        },
+                        "required": ["file_path", "content"],
+                    },
+                },
+                "wait_for_reload": {
+                    "type": "boolean",
+                    "description": "Wait until AstrBot finishes hot-reloading the plugin and return the reload result.",
+                },
+            },
+            "required": ["plugin_name", "files"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not file_manager: return "Error: FileManager not initialized."
+
+        plugin_name = kwargs.get("plugin_name")
+        files = kwargs.get("files")
+
+        if not plugin_name or not files or not isinstance(files, list):
+            return "Error: Missing required parameters (plugin_name or files)."
+
+        await _send_tip(context, f"📝 正在批量写入 {len(files)} 个文件: {plugin_name} ...")
+
+        return await _write_and_verify(
+            kwargs, plugin_name, lambda: file_manager.write_files(plugin_name, files), "Files updated.",
+        )
+
+
+@dataclass
+class EditFileTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_edit_file"
+    description: str = (
+        "Modify an existing file by applying small edits instead of rewriting it. "
+        "Provide EITHER 'edits' (a list of search/replace blocks) OR 'diff' (a unified diff). "
+        "Each 'search' block must be copied verbatim from the current file (read it first with 'dev_read_file') "
+        "and should include enough surrounding lines to be unique. Indentation and trailing-whitespace "
+        "differences are tolerated. All edits are applied together: if any block cannot be located, "
+        "NOTHING is written and the conflicts (with the closest matching lines) are reported. "
+        "The same reload verification rules as 'dev_write_file' apply afterwards."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin_name": {"type": "string", "description": "The plugin directory name."},
+                "file_path": {"type": "string", "description": "Relative file path (e.g., 'main.py')."},
+                "edits": {
+                    "type": "array",
+                    "description": "Search/replace blocks applied in order.",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "search": {"type": "string", "description": "Exact existing text to replace."},
+                            "replace": {"type": "string", "description": "Replacement text."},
+                            "replace_all": {
+                                "type": "boolean",
+                                "description": "Replace every occurrence instead of requiring a unique match.",
+                            },
+                        },
+                        "required": ["search", "replace"],
+                    },
+                },
+                "diff": {"type": "string", "description": "A unified diff (with @@ hunk headers) against the file."},
+                "wait_for_reload": {
+                    "type": "boolean",
+                    "description": "Wait until AstrBot finishes hot-reloading the plugin and return the reload result.",
+                },
+            },
+            "required": ["plugin_name", "file_path"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not file_manager: return "Error: FileManager not initialized."
+
+        plugin_name = kwargs.get("plugin_name")
+        file_path = kwargs.get("file_path")
+        edits = kwargs.get("edits")
+        diff = kwargs.get("diff")
+
+        if not plugin_name or not file_path:
+            return "Error: Missing required parameters (plugin_name or file_path)."
+        if not edits and not diff:
+            return "Error: Provide either 'edits' or 'diff'."
+        if edits and diff:
+            return "Error: Provide only one of 'edits' or 'diff'."
+        if edits and not isinstance(edits, list):
+            return "Error: 'edits' must be a list of {search, replace} objects."
+
+        await _send_tip(context, f"✏️ 正在修改文件: {plugin_name}/{file_path} ...")
+
+        return await _write_and_verify(
+            kwargs, plugin_name,
+            lambda: file_manager.edit_file(plugin_name, file_path, edits=edits, diff=diff), "File updated.",
+        )
+
+
+@dataclass
+class RollbackTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_rollback"
+    description: str = (
+        "Undo file changes. Every write/edit saves the previous version of the touched files as a numbered "
+        "snapshot; snapshot #N is the plugin state right BEFORE write #N. "
+        "Call without 'snapshot_id' to list recent snapshots, then call again with 'snapshot_id' to restore "
+        "ALL files of the plugin to that state in one atomic batch (files created after it are removed). "
+        "The rollback itself is snapshotted, so it can be undone the same way. "
+        "The same reload verification rules as 'dev_write_file' apply afterwards."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin_name": {"type": "string", "description": "The plugin directory name."},
+                "snapshot_id": {"type": "integer", "description": "Snapshot number to restore. Omit to list snapshots."},
+                "limit": {"type": "integer", "description": "How many recent snapshots to list (default 20)."},
+                "wait_for_reload": {
+                    "type": "boolean",
+                    "description": "Wait until AstrBot finishes hot-reloading the plugin and return the reload result.",
+                },
+            },
+            "required": ["plugin_name"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not file_manager: return "Error: FileManager not initialized."
+
+        plugin_name = kwargs.get("plugin_name")
+        snapshot_id = kwargs.get("snapshot_id")
+        if not plugin_name:
+            return "Error: Missing required parameter 'plugin_name'."
+        if snapshot_id is None:
+            return _paged(await file_manager.list_snapshots(plugin_name, int(kwargs.get("limit") or 20)), "snapshots")
+        try:
+            snapshot_id = int(snapshot_id)
+        except (TypeError, ValueError):
+            return "Error: 'snapshot_id' must be an integer."
+
+        await _send_tip(context, f"⏪ 正在回滚插件 {plugin_name} 到快照 #{snapshot_id} ...")
+
+        return await _write_and_verify(
+            kwargs, plugin_name, lambda: file_manager.rollback(plugin_name, snapshot_id), "Files restored.",
         )
 
 
@@ -140,7 +627,10 @@ class ReadFileTool(FunctionTool[AstrAgentContext]):
     description: str = (
         "Read the content of an existing file. "
         "MANDATORY STEP: Always use this tool FIRST when modifying code or analyzing bugs. "
-        "Combine the code content with the error logs from 'dev_check_logs' to diagnose issues accurately."
+        "Combine the code content with the error logs from 'dev_check_logs' to diagnose issues accurately. "
+        "For large files, read only what you need with 'start_line'/'end_line' (e.g. around a traceback line) "
+        "or 'symbol' (a function/class name such as 'MyPlugin.handle'); ranged reads are prefixed with "
+        "'[lines a-b of N]'."
     )
     parameters: dict = Field(
         default_factory=lambda: {
@@ -148,11 +638,19 @@ class ReadFileTool(FunctionTool[AstrAgentContext]):
             "properties": {
                 "plugin_name": {"type": "string", "description": "The plugin directory name."},
                 "file_path": {"type": "string", "description": "Relative file path."},
+                "start_line": {"type": "integer", "description": "First line to read (1-based, inclusive)."},
+                "end_line": {"type": "integer", "description": "Last line to read (1-based, inclusive)."},
+                "symbol": {
+                    "type": "string",
+                    "description": "Read only this function or class (decorators included), e.g. 'helloworld' or 'MyPlugin.helloworld'.",
+                },
             },
             "required": ["plugin_name", "file_path"],
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
@@ -160,8 +658,92 @@ class ReadFileTool(FunctionTool[AstrAgentContext]):
         plugin_name = kwargs.get("plugin_name")
         file_path = kwargs.get("file_path")
         await _send_tip(context, f"📖 正在读取文件: {plugin_name}/{file_path} ...")
-        content = await file_manager.read_file(plugin_name, file_path)
-        return content
+        content = await file_manager.read_file(
+            plugin_name, file_path,
+            start_line=kwargs.get("start_line"),
+            end_line=kwargs.get("end_line"),
+            symbol=kwargs.get("symbol"),
+        )
+        return _paged(content, f"{plugin_name}/{file_path}")
+
+
+@dataclass
+class CheckAsyncTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_check_async"
+    description: str = (
+        "Statically scan a plugin for blocking calls reachable from 'async def' handlers "
+        "(time.sleep, requests/httpx sync calls, subprocess, sqlite3, sync file reads ...). "
+        "A single blocking call stalls the whole bot for every user. Each finding shows the call chain from the "
+        "coroutine and the async replacement. Omit 'file_path' to scan every .py file of the plugin. "
+        "Add '# noqa' to a line to accept a call deliberately."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin_name": {"type": "string", "description": "The plugin directory name."},
+                "file_path": {"type": "string", "description": "Optional relative .py file path."},
+            },
+            "required": ["plugin_name"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not file_manager: return "Error: FileManager not initialized."
+        plugin_name = kwargs.get("plugin_name")
+        if not plugin_name:
+            return "Error: Missing required parameter 'plugin_name'."
+        await _send_tip(context, f"🔍 正在检查阻塞调用: {plugin_name} ...")
+        return _paged(await file_manager.lint_blocking(plugin_name, kwargs.get("file_path")), "findings")
+
+
+@dataclass
+class SearchCodeTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_search_code"
+    description: str = (
+        "Search the code of ALL plugins (or one plugin) through a cached index instead of reading files one by one. "
+        "Modes: 'definition' (class / function / method / command names, default), 'command' (@filter.command "
+        "names), 'import' (imported modules), 'call' (call sites, e.g. 'send_message'), 'grep' (regex over source, "
+        "with line numbers). Non-grep queries are case-insensitive substrings, or a regex wrapped in slashes. "
+        "Then use 'dev_read_file' with 'symbol' or 'start_line'/'end_line' to read just the relevant part."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Name fragment, /regex/, or a regex in 'grep' mode."},
+                "mode": {
+                    "type": "string",
+                    "enum": ["definition", "command", "import", "call", "grep"],
+                    "description": "What to search (default 'definition').",
+                },
+                "plugin_name": {"type": "string", "description": "Restrict the search to one plugin directory."},
+                "limit": {"type": "integer", "description": "Maximum number of results (default 50)."},
+            },
+            "required": ["query"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not file_manager: return "Error: FileManager not initialized."
+        query = kwargs.get("query")
+        if not query:
+            return "Error: Missing required parameter 'query'."
+        mode = kwargs.get("mode") or "definition"
+        if mode not in ("definition", "command", "import", "call", "grep"):
+            return f"Error: Unknown mode '{mode}'."
+        limit = min(500, max(1, int(kwargs.get("limit") or 50)))
+        await _send_tip(context, f"🔎 正在搜索代码: {query} ...")
+        result = await file_manager.search_code(query, mode, kwargs.get("plugin_name") or None, limit)
+        return _paged(result, "search results")
 
 
 @dataclass
@@ -181,6 +763,8 @@ class ListFilesTool(FunctionTool[AstrAgentContext]):
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
@@ -194,11 +778,29 @@ class ListFilesTool(FunctionTool[AstrAgentContext]):
 
         try:
             result = await file_manager.list_files(plugin_name)
-            return result
+            return _paged(result, f"files of {plugin_name}")
         except Exception as e:
             return f"Error listing files: {str(e)}"
 
 
+@phased("load")
+async def _load_plugin_dir(star_manager: "PluginManager", dir_name: str, timeout: Optional[float]) -> tuple:
+    """
+    加载单个插件目录，超时或异常都只影响它自己；timeout 为 None 时不限时。
+    返回 (目录名, 是否成功, 错误信息, 耗时)
+    """
+    start = time.perf_counter()
+    try:
+        success, error_msg = await asyncio.wait_for(
+            star_manager.load(specified_dir_name=dir_name), timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        success, error_msg = False, f"timed out after {timeout:.0f}s"
+    except Exception as e:
+        success, error_msg = False, str(e)
+    return dir_name, bool(success), error_msg, time.perf_counter() - start
+
+
 @dataclass
 class LoadPluginTool(FunctionTool[AstrAgentContext]):
     name: str = "dev_load_plugin"
@@ -208,41 +810,43 @@ class LoadPluginTool(FunctionTool[AstrAgentContext]):
         "1. After creating a new plugin."
         "2. When the user asks to 'install', 'load', or 'activate' plugin(s)."
         "3. After modifying a plugin, if logs only show '检测到文件变化' but not '正在重载/正在载入'."
-        "NO PARAMETERS NEEDED - just call it directly."
+        "NO PARAMETERS NEEDED - just call it directly. "
+        "Optional: 'parallel' loads independent plugins concurrently (useful after restoring many plugins); "
+        "'sequential' lists plugin directories that must be loaded one by one, in that order, before the rest."
     )
     parameters: dict = Field(
         default_factory=lambda: {
             "type": "object",
-            "properties": {},
+            "properties": {
+                "parallel": {
+                    "type": "boolean",
+                    "description": "Load independent plugins concurrently (default from config).",
+                },
+                "sequential": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Plugin directories to load first, strictly in this order.",
+                },
+            },
             "required": [],
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
         ctx = context.context.context
         event = context.context.event
-        star_manager: PluginManager = ctx._star_manager
+        star_manager: "PluginManager" = ctx._star_manager
 
         if not star_manager:
             return "Error: Could not access PluginManager."
-
-        base_path = TOOL_CONFIG.get("plugin_base_dir", "./data/plugins")
-
-        def _scan_plugin_dirs(path: str) -> set:
-            """同步扫描插件目录，在线程池中执行"""
-            dirs = set()
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    if os.path.exists(os.path.join(item_path, "main.py")) or \
-                       os.path.exists(os.path.join(item_path, "metadata.yaml")):
-                        dirs.add(item)
-            return dirs
+        if not file_manager: return "Error: FileManager not initialized."
 
         try:
-            all_dirs_on_disk = await asyncio.to_thread(_scan_plugin_dirs, base_path)
+            all_dirs_on_disk = await file_manager.plugin_dirs()
         except Exception as e:
             return f"Error scanning plugin directory: {str(e)}"
 
@@ -258,21 +862,55 @@ class LoadPluginTool(FunctionTool[AstrAgentContext]):
                 f"({len(loaded_dir_names)} plugins active)"
             )
 
+        parallel = kwargs.get("parallel")
+        if parallel is None:
+            parallel = TOOL_CONFIG.get("plugin_load_parallel", False)
+        concurrency = max(1, int(TOOL_CONFIG.get("plugin_load_concurrency", 4)))
+        # 超时只在并发加载时生效，逐个加载保持原有的不限时行为
+        timeout = max(1.0, float(TOOL_CONFIG.get("plugin_load_timeout", 300))) if parallel else None
+        sequential = kwargs.get("sequential") or TOOL_CONFIG.get("plugin_load_sequential", [])
+
+        # 需要按顺序加载的插件先逐个加载，其余插件按名称排序保证结果顺序确定
+        ordered = [d for d in dict.fromkeys(sequential) if d in unloaded_dirs]
+        rest = sorted(unloaded_dirs - set(ordered))
+        if not parallel:
+            ordered, rest = ordered + rest, []
+
+        total = len(ordered) + len(rest)
+        outcomes = {}
+
+        async def _report(outcome):
+            outcomes[outcome[0]] = outcome
+            if parallel:
+                dir_name, success, _, elapsed = outcome
+                await _send_tip(context, f"{'✅' if success else '❌'} [{len(outcomes)}/{total}] {dir_name} ({elapsed:.1f}s)")
+
+        if parallel:
+            await _send_tip(context, f"📦 正在加载 {total} 个插件（并发 {concurrency}）...")
+
+        for dir_name in ordered:
+            await _report(await _load_plugin_dir(star_manager, dir_name, timeout))
+
+        if rest:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def _limited(dir_name):
+                async with semaphore:
+                    return await _load_plugin_dir(star_manager, dir_name, timeout)
+
+            for next_done in asyncio.as_completed([_limited(d) for d in rest]):
+                await _report(await next_done)
+
         results = []
         success_count = 0
         fail_count = 0
-
-        for dir_name in sorted(unloaded_dirs):
-            try:
-                success, error_msg = await star_manager.load(specified_dir_name=dir_name)
-                if success:
-                    results.append(f"✅ {dir_name}")
-                    success_count += 1
-                else:
-                    results.append(f"❌ {dir_name}: {error_msg}")
-                    fail_count += 1
-            except Exception as e:
-                results.append(f"❌ {dir_name}: {str(e)}")
+        for dir_name in ordered + rest:
+            _, success, error_msg, elapsed = outcomes[dir_name]
+            if success:
+                results.append(f"✅ {dir_name} ({elapsed:.2f}s)")
+                success_count += 1
+            else:
+                results.append(f"❌ {dir_name} ({elapsed:.2f}s): {error_msg}")
                 fail_count += 1
 
         try:
@@ -311,11 +949,47 @@ class CheckLogsTool(FunctionTool[AstrAgentContext]):
                     "type": "integer",
                     "description": "Number of lines to retrieve (default 100).",
                 },
+                "since_cursor": {
+                    "type": "integer",
+                    "description": "Only return logs newer than this cursor. "
+                                   "Use the cursor returned by a previous 'dev_check_logs' or 'dev_write_file' call "
+                                   "to avoid re-reading lines you have already seen.",
+                },
+                "level": {
+                    "type": "string",
+                    "description": "Minimum log level, e.g. 'WARNING' or 'ERROR'.",
+                },
+                "plugin": {
+                    "type": "string",
+                    "description": "Only logs produced by (or with tracebacks inside) this plugin directory.",
+                },
+                "logger": {
+                    "type": "string",
+                    "description": "Only logs from this logger name (children included), e.g. 'astrbot'.",
+                },
+                "since_minutes": {
+                    "type": "number",
+                    "description": "Only logs from the last N minutes.",
+                },
+                "start_time": {
+                    "type": "string",
+                    "description": "Only logs at or after this time as shown in the logs ('HH:MM:SS').",
+                },
+                "end_time": {
+                    "type": "string",
+                    "description": "Only logs at or before this time as shown in the logs ('HH:MM:SS').",
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Python regular expression matched against the message and traceback.",
+                },
             },
             "required": [],
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
@@ -325,12 +999,56 @@ class CheckLogsTool(FunctionTool[AstrAgentContext]):
         if lines is None:
             lines = default_lines
 
-        await _send_tip(context, f"🔍 正在检查最近 {lines} 行日志...")
-        logs = log_manager.get_logs(lines)
-        # 简单截断防止过长
-        if len(logs) > 4000:
-            logs = "...(truncated)...\n" + logs[-4000:]
-        return f"Recent Logs (In-Memory Intercept):\n{logs}"
+        since_cursor, error = _cursor_arg(kwargs)
+        if error:
+            return error
+        filters = {
+            key: kwargs.get(key)
+            for key in ("level", "plugin", "logger", "since_minutes", "start_time", "end_time", "pattern")
+            if kwargs.get(key) not in (None, "")
+        }
+
+        if filters:
+            await _send_tip(context, "🔍 正在按条件检索日志...")
+            try:
+                start = end = None
+                if "since_minutes" in filters:
+                    start = time.time() - float(filters["since_minutes"]) * 60
+                if "start_time" in filters:
+                    start = max(start or 0, parse_clock(filters["start_time"]))
+                if "end_time" in filters:
+                    end = parse_clock(filters["end_time"]) + 1
+                with phase("logs"):
+                    entries, cursor = await asyncio.to_thread(
+                        log_manager.query,
+                        lines=lines,
+                        min_level=filters.get("level"),
+                        logger_name=filters.get("logger"),
+                        plugin=filters.get("plugin"),
+                        start=start,
+                        end=end,
+                        pattern=filters.get("pattern"),
+                        since_cursor=since_cursor or 0,
+                    )
+            except (ValueError, re.error) as e:
+                return f"Error: Invalid log filter: {str(e)}"
+            with phase("logs"):
+                logs = log_manager.render(entries) if entries else "No matching logs."
+        elif since_cursor is not None:
+            await _send_tip(context, "🔍 正在检查新增日志...")
+            with phase("logs"):
+                logs, cursor = await asyncio.to_thread(log_manager.get_logs_since, since_cursor, lines)
+        else:
+            await _send_tip(context, f"🔍 正在检查最近 {lines} 行日志...")
+            cursor = log_manager.cursor
+            with phase("logs"):
+                logs = await asyncio.to_thread(log_manager.get_logs, lines)
+        # 超出预算时先给出最新的一页，更早的日志通过 dev_more_output 翻页
+        logs = _paged(logs, "logs", from_end=True)
+        return (
+            f"Recent Logs (In-Memory Intercept):\n{logs}\n"
+            f"[Cursor] {cursor} (pass as 'since_cursor' next time to read only newer logs)"
+        )
 
 
 @dataclass
@@ -349,6 +1067,8 @@ class ListPluginsTool(FunctionTool[AstrAgentContext]):
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
@@ -391,6 +1111,8 @@ class UninstallPluginTool(FunctionTool[AstrAgentContext]):
         }
     )
 
+    @instrumented
+    @_ready
     async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
         if not _check_permission(context):
             return PERMISSION_DENIED_MSG
@@ -400,7 +1122,7 @@ class UninstallPluginTool(FunctionTool[AstrAgentContext]):
             return "Error: Missing parameter 'plugin_name'."
 
         ctx = context.context.context
-        star_manager: PluginManager = ctx._star_manager
+        star_manager: "PluginManager" = ctx._star_manager
 
         if not star_manager:
             return "Error: Could not access PluginManager."
@@ -410,4 +1132,206 @@ class UninstallPluginTool(FunctionTool[AstrAgentContext]):
             await star_manager.uninstall_plugin(plugin_name=plugin_name, delete_config=False, delete_data=False)
             return f"Plugin '{plugin_name}' uninstalled successfully."
         except Exception as e:
-            return f"Failed to uninstall plugin '{plugin_name}': {str(e)}"
\ No newline at end of file
+            return f"Failed to uninstall plugin '{plugin_name}': {str(e)}"
+
+
+@dataclass
+class WaitReloadTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_wait_reload"
+    description: str = (
+        "Block until AstrBot finishes hot-reloading a plugin and return a structured result: "
+        "SUCCESS, FAILED (with the traceback), NOT_LOADED (call 'dev_load_plugin') or TIMEOUT. "
+        "Use this instead of repeatedly polling 'dev_check_logs' after a write. "
+        "Pass the cursor returned by 'dev_write_file' as 'since_cursor' so that reload logs printed "
+        "before this call are taken into account."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin_name": {"type": "string", "description": "The plugin directory name."},
+                "since_cursor": {
+                    "type": "integer",
+                    "description": "Log cursor from before the write; earlier reload logs after it are replayed.",
+                },
+                "timeout": {"type": "number", "description": "Maximum seconds to wait (default 20)."},
+            },
+            "required": ["plugin_name"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not log_manager: return "Error: LogManager not initialized."
+
+        plugin_name = kwargs.get("plugin_name")
+        if not plugin_name:
+            return "Error: Missing parameter 'plugin_name'."
+        since_cursor, error = _cursor_arg(kwargs)
+        if error:
+            return error
+
+        await _send_tip(context, f"⏳ 正在等待插件 {plugin_name} 重载结果...")
+
+        with _watch_reload(plugin_name) as watcher:
+            if since_cursor is not None:
+                entries, _, _ = log_manager.read_since(since_cursor, 500)
+                watcher.replay(entries)
+            result = await watcher.wait(_reload_timeout(kwargs))
+        return result.format(log_manager, log_manager.cursor)
+
+
+@dataclass
+class LoopStatsTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_loop_stats"
+    description: str = (
+        "Show event-loop stalls (moments when the whole bot froze) recorded since startup, attributed to the "
+        "plugin directory whose code was running during the stall, with a duration histogram and the hottest "
+        "file:line locations. Use this when users report slow or frozen responses, especially after a plugin was "
+        "created or changed; then fix the blocking code (see 'dev_check_async')."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin": {"type": "string", "description": "Only show stalls attributed to this plugin directory."},
+                "reset": {"type": "boolean", "description": "Clear the statistics after showing them."},
+            },
+            "required": [],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not loop_monitor: return "Error: Loop monitor is disabled (loop_monitor_enabled)."
+        loop_monitor.start()
+        report = loop_monitor.report(plugin=kwargs.get("plugin"))
+        if kwargs.get("reset"):
+            loop_monitor.reset()
+        return report
+
+
+@dataclass
+class BenchmarkPluginTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_benchmark_plugin"
+    description: str = (
+        "Micro-benchmark the '@filter.command' handlers of a plugin in an isolated worker process with stubbed "
+        "AstrBot objects (Context, AstrMessageEvent). Reports import time, per-command p50/p95/p99 latency, "
+        "allocations per call (tracemalloc) and exceptions. The live bot is not touched and a hard timeout kills "
+        "runaway handlers. NOTE: real network / disk calls made by the handler still happen. "
+        "Use it after writing a plugin to catch slow handlers before users do."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "plugin_name": {"type": "string", "description": "The plugin directory name."},
+                "commands": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Command names to benchmark (default: all commands).",
+                },
+                "iterations": {"type": "integer", "description": "Calls per command (default 20, max 1000)."},
+                "args": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Command arguments passed to every handler, e.g. [\"3\", \"abc\"].",
+                },
+                "message": {"type": "string", "description": "Synthetic message text (default '/<command> <args>')."},
+            },
+            "required": ["plugin_name"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        plugin_name = kwargs.get("plugin_name")
+        if not plugin_name:
+            return "Error: Missing required parameter 'plugin_name'."
+        plugin_dir = os.path.join(TOOL_CONFIG.get("plugin_base_dir", "./data/plugins"), plugin_name)
+        if not os.path.isfile(os.path.join(plugin_dir, "main.py")):
+            return f"Error: '{plugin_name}/main.py' does not exist."
+
+        iterations = min(1000, max(1, int(kwargs.get("iterations") or 20)))
+        timeout = max(5.0, float(TOOL_CONFIG.get("benchmark_timeout", 60)))
+        await _send_tip(context, f"⏱️ 正在对插件 {plugin_name} 进行基准测试 ...")
+        from .benchmark import format_report, run_benchmark
+
+        result = await run_benchmark(
+            plugin_dir,
+            commands=kwargs.get("commands"),
+            iterations=iterations,
+            message=kwargs.get("message"),
+            args=[str(a) for a in kwargs.get("args") or []],
+            timeout=timeout,
+        )
+        return format_report(result)
+
+
+@dataclass
+class StatsTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_stats"
+    description: str = (
+        "Show latency / throughput statistics of the developer tools themselves: calls, errors, p50/p95/p99 "
+        "latency, average output size, and where the time went per phase (permission, tip, io, validate, load, "
+        "logs). Use it to find out why a development session is slow."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "tool": {"type": "string", "description": "Only show this tool, e.g. 'dev_load_plugin'."},
+                "reset": {"type": "boolean", "description": "Clear the statistics after showing them."},
+            },
+            "required": [],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        result = stats.report(kwargs.get("tool"))
+        if kwargs.get("reset"):
+            stats.reset()
+        return result
+
+
+@dataclass
+class MoreOutputTool(FunctionTool[AstrAgentContext]):
+    name: str = "dev_more_output"
+    description: str = (
+        "Fetch another page of a long tool output (file content, file list, logs, findings). "
+        "Long outputs end with a line like \"[...: page 1/4 ...; next page: call 'dev_more_output' with "
+        "cursor='ab12cd34:1']\"; pass that cursor. Only request further pages if you actually need them."
+    )
+    parameters: dict = Field(
+        default_factory=lambda: {
+            "type": "object",
+            "properties": {
+                "cursor": {"type": "string", "description": "The page cursor printed at the end of the previous page."},
+            },
+            "required": ["cursor"],
+        }
+    )
+
+    @instrumented
+    @_ready
+    async def call(self, context: ContextWrapper[AstrAgentContext], **kwargs) -> str:
+        if not _check_permission(context):
+            return PERMISSION_DENIED_MSG
+        if not paginator: return "Error: Paginator not initialized."
+        page = paginator.page(kwargs.get("cursor") or "")
+        if page is None:
+            return "Error: Unknown or expired cursor. Call the original tool again (e.g. with a narrower range)."
+        return page
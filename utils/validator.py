@@ -0,0 +1,304 @@
+import ast
+import asyncio
+import builtins
+import importlib.util
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, List, Optional, Tuple
+
+# 单条问题: (级别, 行号, 列号, 说明)。使用元组以便在进程间传递
+Issue = Tuple[str, int, int, str]
+
+ERROR = "error"
+WARNING = "warning"
+
+_MODULE_NAMES = {"__file__", "__name__", "__doc__", "__package__", "__spec__", "__loader__",
+                 "__builtins__", "__path__", "__annotations__", "__dict__"}
+_BUILTIN_NAMES = set(dir(builtins)) | _MODULE_NAMES
+
+
+# ========== 各项检查（在子进程中执行） ==========
+
+def _check_syntax(source: str, filename: str) -> Tuple[Optional[ast.Module], List[Issue]]:
+    """ast.parse 只检查语法，compile 还能发现 return 在函数外、nonlocal 错误等"""
+    try:
+        tree = ast.parse(source, filename)
+        compile(tree, filename, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        line = e.lineno or 0
+        message = f"SyntaxError: {e.msg}"
+        # e.text 可能被 linecache 按文件名从磁盘读取（旧内容），这里直接取待写入的源码行
+        lines = source.splitlines()
+        if 0 < line <= len(lines):
+            message += f"\n    {lines[line - 1].rstrip()}\n    {' ' * max(0, (e.offset or 1) - 1)}^"
+        return None, [(ERROR, line, e.offset or 0, message)]
+    except ValueError as e:
+        # 例如源码中含有空字节
+        return None, [(ERROR, 0, 0, f"ValueError: {e}")]
+    return tree, []
+
+
+def _bound_names(tree: ast.Module) -> set:
+    """
+    收集文件中任何位置绑定过的名字。不区分作用域，只用来发现“整个文件都没定义过”的名字，
+    宁可漏报也不误报。
+    """
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add((alias.asname or alias.name).split(".")[0])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            names.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            names.add(node.rest)
+    return names
+
+
+def _check_undefined(tree: ast.Module, source: str, filename: str) -> List[Issue]:
+    """优先使用 pyflakes（若已安装），否则退化为不区分作用域的简单检查"""
+    try:
+        from pyflakes import checker, messages
+    except ImportError:
+        checker = None
+    if checker is not None:
+        issues = []
+        for msg in checker.Checker(tree, filename=filename).messages:
+            if isinstance(msg, (messages.UndefinedName, messages.UndefinedLocal, messages.UndefinedExport)):
+                issues.append((ERROR, msg.lineno, msg.col + 1, msg.message % msg.message_args))
+        return issues
+
+    if any(isinstance(n, ast.ImportFrom) and any(a.name == "*" for a in n.names) for n in ast.walk(tree)):
+        return []
+    known = _bound_names(tree) | _BUILTIN_NAMES
+    issues, reported = [], set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in known:
+            if node.id in reported:
+                continue
+            reported.add(node.id)
+            issues.append((ERROR, node.lineno, node.col_offset + 1, f"undefined name '{node.id}'"))
+    return issues
+
+
+def _module_exists(base: str, parts: List[str], pending: set) -> bool:
+    path = os.path.join(base, *parts)
+    candidates = (path + ".py", os.path.join(path, "__init__.py"))
+    return os.path.isdir(path) or any(os.path.isfile(c) or c in pending for c in candidates) or \
+        any(p.startswith(path + os.sep) for p in pending)
+
+
+def _check_imports(tree: ast.Module, file_path: str, plugin_root: Optional[str], pending: set) -> List[Issue]:
+    """
+    绝对导入用 importlib.util.find_spec 检查顶层包（不会真正执行导入），
+    插件目录内的同名模块、requirements.txt 中声明的依赖视为可用；
+    相对导入检查目标文件是否存在（包括同一批次待写入的文件）。
+    """
+    issues = []
+    requirements = set()
+    if plugin_root:
+        try:
+            with open(os.path.join(plugin_root, "requirements.txt"), encoding="utf-8") as f:
+                for line in f:
+                    name = line.split("#")[0].strip()
+                    for sep in "=<>~![; ":
+                        name = name.split(sep)[0]
+                    if name:
+                        requirements.add(name.lower().replace("-", "_"))
+        except OSError:
+            pass
+
+    def absolute_ok(module: str) -> bool:
+        top = module.split(".")[0]
+        if top in sys.builtin_module_names or top.lower() in requirements:
+            return True
+        if plugin_root and _module_exists(plugin_root, [top], pending):
+            return True
+        try:
+            return importlib.util.find_spec(top) is not None
+        except (ImportError, ValueError):
+            return False
+
+    file_dir = os.path.dirname(file_path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if not absolute_ok(alias.name):
+                    issues.append((WARNING, node.lineno, node.col_offset + 1,
+                                   f"module '{alias.name}' is not installed; add it to requirements.txt "
+                                   f"or the plugin will fail to load"))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level == 0:
+                if node.module and not absolute_ok(node.module):
+                    issues.append((WARNING, node.lineno, node.col_offset + 1,
+                                   f"module '{node.module}' is not installed; add it to requirements.txt "
+                                   f"or the plugin will fail to load"))
+                continue
+            if not plugin_root:
+                continue
+            base = file_dir
+            for _ in range(node.level - 1):
+                base = os.path.dirname(base)
+            if not base.startswith(plugin_root):
+                issues.append((WARNING, node.lineno, node.col_offset + 1,
+                               "relative import goes above the plugin directory"))
+                continue
+            if node.module:
+                if not _module_exists(base, node.module.split("."), pending):
+                    issues.append((WARNING, node.lineno, node.col_offset + 1,
+                                   f"relative module '{'.' * node.level}{node.module}' does not exist yet; "
+                                   f"create it in the same 'dev_write_files' call"))
+            else:
+                for alias in node.names:
+                    if not _module_exists(base, [alias.name], pending):
+                        issues.append((WARNING, node.lineno, node.col_offset + 1,
+                                       f"relative module '{'.' * node.level}{alias.name}' does not exist yet"))
+    return issues
+
+
+def _decorator_name(node: ast.expr) -> str:
+    """把装饰器表达式还原成点分名字，例如 filter.command"""
+    if isinstance(node, ast.Call):
+        node = node.func
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+# 注册消息处理函数的装饰器，被装饰的函数签名必须是 (self, event, ...)
+_HANDLER_DECORATORS = frozenset((
+    "command", "command_group", "regex", "event_message_type", "permission_type",
+    "platform_adapter_type", "custom_filter",
+))
+# 指令组只是子指令的容器，按文档写成 def group(self): pass，不检查 async 和签名
+_GROUP_DECORATORS = frozenset(("command_group",))
+# 生命周期 / LLM 钩子，签名各不相同（例如 on_astrbot_loaded 只有 self），不做检查
+_HOOK_DECORATORS = frozenset((
+    "on_astrbot_loaded", "on_platform_loaded", "on_llm_request", "on_llm_response",
+    "on_decorating_result", "after_message_sent", "llm_tool", "on_waiting_llm_request",
+))
+
+
+def _check_plugin_shape(tree: ast.Module) -> List[Issue]:
+    """
+    插件入口 main.py 需要有一个 Star 子类，指令处理函数需要是该类中的 async 方法。
+    未识别的 filter.* 装饰器只给出警告，避免误拦新版本 AstrBot 增加的钩子。
+    """
+    issues = []
+    star_classes = [
+        node for node in tree.body
+        if isinstance(node, ast.ClassDef) and any(_decorator_name(b).split(".")[-1] == "Star" for b in node.bases)
+    ]
+    if not star_classes:
+        issues.append((ERROR, 1, 1, "main.py defines no subclass of 'Star'; AstrBot cannot load this plugin"))
+
+    in_star = {id(n) for cls in star_classes for n in cls.body}
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for deco in node.decorator_list:
+            name = _decorator_name(deco)
+            short = name.split(".")[-1]
+            if not name.startswith("filter.") and name not in _HANDLER_DECORATORS:
+                continue
+            if short in _HOOK_DECORATORS:
+                continue
+            level = ERROR if short in _HANDLER_DECORATORS else WARNING
+            where = f"handler '{node.name}' (@{name})"
+            if id(node) not in in_star:
+                issues.append((level, node.lineno, node.col_offset + 1,
+                               f"{where} must be a method of the Star subclass"))
+            if short not in _GROUP_DECORATORS:
+                if not isinstance(node, ast.AsyncFunctionDef):
+                    issues.append((level, node.lineno, node.col_offset + 1, f"{where} must be 'async def'"))
+                args = node.args.args
+                if len(args) < 2 or args[0].arg != "self":
+                    issues.append((level, node.lineno, node.col_offset + 1,
+                                   f"{where} must take (self, event: AstrMessageEvent, ...)"))
+            if name.endswith((".command", ".command_group")) and isinstance(deco, ast.Call):
+                if not deco.args or not (isinstance(deco.args[0], ast.Constant) and isinstance(deco.args[0].value, str)):
+                    issues.append((ERROR, deco.lineno, deco.col_offset + 1,
+                                   f"@{name} needs the command name as its first string argument"))
+            elif name.endswith((".command", ".command_group")):
+                issues.append((ERROR, deco.lineno, deco.col_offset + 1,
+                               f"@{name} must be called, e.g. @{name}(\"name\")"))
+    return issues
+
+
+def validate_source(source: str, file_path: str, plugin_root: Optional[str] = None,
+                    pending: Iterable[str] = ()) -> List[Issue]:
+    """
+    校验一个 .py 文件的内容（不写盘、不导入被校验的代码）。
+    file_path / plugin_root 为绝对路径；pending 为同一批次将要写入的其它文件。
+    """
+    filename = os.path.basename(file_path)
+    tree, issues = _check_syntax(source, filename)
+    if tree is None:
+        return issues
+    issues += _check_undefined(tree, source, filename)
+    issues += _check_imports(tree, file_path, plugin_root, set(pending))
+    if plugin_root and os.path.join(plugin_root, "main.py") == file_path:
+        issues += _check_plugin_shape(tree)
+    return sorted(issues, key=lambda i: (i[1], i[2]))
+
+
+def format_issues(rel_path: str, issues: List[Issue]) -> str:
+    return "\n".join(f"{rel_path}:{line}:{col}: {level}: {message}" for level, line, col, message in issues)
+
+
+def has_errors(issues: List[Issue]) -> bool:
+    return any(level == ERROR for level, _, _, _ in issues)
+
+
+# ========== 进程池 ==========
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None:
+        try:
+            # 宿主进程中有事件循环和多个线程，使用 spawn 避免 fork 继承到被占用的锁
+            _pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        except (OSError, NotImplementedError, ValueError):
+            return None
+    return _pool
+
+
+async def validate_async(source: str, file_path: str, plugin_root: Optional[str] = None,
+                         pending: Iterable[str] = ()) -> List[Issue]:
+    """在进程池中校验，进程池不可用或崩溃时退化为线程池"""
+    global _pool
+    args = (source, file_path, plugin_root, tuple(pending))
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, validate_source, *args)
+        except (BrokenProcessPool, OSError, RuntimeError):
+            shutdown_pool()
+    return await asyncio.to_thread(validate_source, *args)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None